@@ -1,41 +1,197 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Sequence
+
+import numpy as np
 import pandas as pd
 
+from python import chord_vocabulary
+from python.analyzer import chord_levels
+
 MUSIC_PIECES_LENGTH = 13
 SOUND_SOURCE_LENGTH = 4
 
+PAD_LABEL = ""
+CORRECT_SUFFIX = "_correct"
 
-def get_score(correct: pd.Series, predict: pd.Series) -> float:
+
+def read_result_csv(path: str) -> pd.DataFrame:
     """
-    単純に文字列を比較し、正解率を返す
+    交差検証の結果CSVを読み込む。1行目はヘッダ(推定器名)なので読み飛ばす
+    空セルはNaNではなくPAD_LABELとして扱う
     """
-    progression_length = 20
-    count = 0
+    return pd.read_csv(path, dtype=str, skiprows=1, header=None, keep_default_na=False)
 
-    for i in range(1, progression_length + 1):
-        if correct[i] == predict[i]:
-            count += 1
 
-    return count / progression_length
+def read_result_csvs(paths: Sequence[str], workers: int | None = None) -> list[pd.DataFrame]:
+    """
+    read_result_csvをプロセスプールで並列に実行する。戻り値の順番はpathsと同じ
+    workersがNoneの場合はCPU数、1の場合はプールを使わずに逐次読み込む
+    """
+    if workers == 1 or len(paths) <= 1:
+        return [read_result_csv(path) for path in paths]
 
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(read_result_csv, paths))
 
-def get_scores(df: pd.DataFrame) -> list[float]:
+
+def stack_results(dfs: Sequence[pd.DataFrame], pad: Any = PAD_LABEL) -> tuple[np.ndarray, np.ndarray]:
     """
-    音源ごとに分けて正解率をリストで返す
+    複数の結果を (ファイル数 × 行数) の行名配列と (ファイル数 × 行数 × コード数) のラベル配列に積む
+    行数やコード数が異なる場合は、足りない部分をpadで埋める
+    """
+    rows = max((len(df) for df in dfs), default=0)
+    chords = max((len(df.columns) - 1 for df in dfs), default=0)
+
+    names = np.full((len(dfs), rows), PAD_LABEL, dtype=object)
+    labels = np.full((len(dfs), rows, chords), pad, dtype=object)
+
+    for i, df in enumerate(dfs):
+        array = df.to_numpy(dtype=object)
+        names[i, : len(array)] = array[:, 0]
+        labels[i, : len(array), : array.shape[1] - 1] = array[:, 1:]
+
+    return names, labels
+
+
+def _get_correct_indices(names: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    各行の添字、"_correct" 行かどうか、各行が比較される直前の "_correct" 行の添字
+    """
+    files, rows = names.shape
+    row_indices = np.broadcast_to(np.arange(rows), (files, rows))
+
+    is_correct = np.char.endswith(names.astype(str), CORRECT_SUFFIX)
+    correct_indices = np.maximum.accumulate(np.where(is_correct, row_indices, 0), axis=1)
+
+    return row_indices, is_correct, correct_indices
+
+
+def _average_by_source(
+    names: np.ndarray,
+    matches: np.ndarray,
+    valid_cells: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    (..., ファイル数 × 行数 × コード数) の一致と評価の対象から、(..., ファイル数 × 音源数) の正解率を求める
+    (ファイル数 × 音源数) の そのファイルにその音源があるかどうか も返す
+    """
+    row_indices, is_correct, correct_indices = _get_correct_indices(names)
+
+    accuracies = matches.sum(axis=-1) / np.maximum(valid_cells.sum(axis=-1), 1)
+
+    source_indices = row_indices - correct_indices - 1
+    valid_rows = (names != PAD_LABEL) & ~is_correct & np.maximum.accumulate(is_correct, axis=1)
+    source_indices = np.where(valid_rows, source_indices, -1)
+
+    sources = int(source_indices.max(initial=-1)) + 1
+    one_hot = source_indices[..., None] == np.arange(sources)
+
+    totals = (accuracies[..., None] * one_hot).sum(axis=-2)
+    counts = one_hot.sum(axis=-2)
+
+    has_sources = counts != 0
+    return np.divide(totals, counts, out=np.zeros_like(totals, dtype=float), where=has_sources), has_sources
+
+
+def _append_average(scores: np.ndarray, has_sources: np.ndarray) -> np.ndarray:
+    """
+    末尾の列に音源の平均を加える。音源数の少ないファイルは、埋められた列を除いた実際の音源数で平均する
+    """
+    totals = (scores * has_sources).sum(axis=-1, keepdims=True)
+    counts = has_sources.sum(axis=-1, keepdims=True)
+    average = np.divide(totals, counts, out=np.zeros_like(totals, dtype=float), where=counts != 0)
+    return np.concatenate([scores, average], axis=-1)
+
+
+def _get_correct_labels(names: np.ndarray, labels: np.ndarray) -> np.ndarray:
+    _, _, correct_indices = _get_correct_indices(names)
+    return np.take_along_axis(labels, correct_indices[..., None], axis=1)
+
+
+def _get_batch_scores(names: np.ndarray, labels: np.ndarray, pad: Any) -> tuple[np.ndarray, np.ndarray]:
+    correct = _get_correct_labels(names, labels)
+
+    valid_cells = correct != pad
+    matches = (labels == correct) & valid_cells
+
+    return _average_by_source(names, matches, valid_cells)
+
+
+def get_batch_scores(names: np.ndarray, labels: np.ndarray, pad: Any = PAD_LABEL) -> np.ndarray:
     """
-    scores = [0.0] * SOUND_SOURCE_LENGTH
+    (ファイル数 × 音源数) の正解率を一度の比較で計算する
+    各行は直前の "_correct" 行と比較され、その行からの距離で音源を区別する
+    ラベルは文字列でも整数コードでもよい。padは比較から除外される
+    """
+    return _get_batch_scores(names, labels, pad)[0]
 
-    for i in range(MUSIC_PIECES_LENGTH):
-        start = i * (SOUND_SOURCE_LENGTH + 1)
 
-        correct = df.iloc[start]
+def _get_batch_level_scores(
+    names: np.ndarray,
+    codes: np.ndarray,
+    levels: list[str],
+) -> tuple[np.ndarray, np.ndarray]:
+    matches, valid_cells = chord_levels.compare(_get_correct_labels(names, codes), codes, levels)
+    return _average_by_source(names, matches, valid_cells)
 
-        for j in range(SOUND_SOURCE_LENGTH):
-            predict = df.iloc[start + j + 1]
-            scores[j] += get_score(correct, predict)
 
-    return list(map(lambda x: x / MUSIC_PIECES_LENGTH, scores))
+def get_batch_level_scores(
+    names: np.ndarray,
+    codes: np.ndarray,
+    levels: list[str] = chord_levels.LEVELS,
+) -> np.ndarray:
+    """
+    get_batch_scoresを chord_levels の比較レベルごとに計算し、(レベル数 × ファイル数 × 音源数) で返す
+    codesは chord_vocabulary の整数コードで、全てのレベルを一度の比較で求める
+    """
+    return _get_batch_level_scores(names, codes, levels)[0]
+
+
+def get_batch_scores_with_average(names: np.ndarray, labels: np.ndarray, pad: Any = PAD_LABEL) -> np.ndarray:
+    """
+    get_batch_scoresの末尾の列に音源の平均を加えたもの
+    """
+    return _append_average(*_get_batch_scores(names, labels, pad))
+
+
+def get_score(correct: pd.Series, predict: pd.Series) -> float:
+    """
+    ラベルを整数コードにして比較し、正解率を返す。コードはラベルと1対1なので、文字列の比較と同じ結果になる
+    """
+    codes = chord_vocabulary.encode(np.stack([correct.to_numpy()[1:], predict.to_numpy()[1:]]))
+    return float(np.mean(codes[0] == codes[1]))
+
+
+def get_scores(df: pd.DataFrame) -> list[float]:
+    """
+    音源ごとに分けて正解率をリストで返す
+    """
+    names, labels = stack_results([df])
+    return get_batch_scores(names, chord_vocabulary.encode(labels), pad=chord_vocabulary.PAD_CODE)[0].tolist()
 
 
 def get_scores_with_average(df: pd.DataFrame) -> list[float]:
     scores = get_scores(df)
-    return [*scores, sum(scores) / SOUND_SOURCE_LENGTH]
+    return [*scores, sum(scores) / len(scores)]
+
+
+def get_scores_with_average_from_paths(paths: Sequence[str], workers: int | None = None) -> np.ndarray:
+    """
+    結果CSVのパスのリストから、(ファイル数 × (音源数 + 1)) の正解率の配列を返す
+    ラベルは整数コードにしてから比較する
+    """
+    names, labels = stack_results(read_result_csvs(paths, workers))
+    return get_batch_scores_with_average(names, chord_vocabulary.encode(labels), pad=chord_vocabulary.PAD_CODE)
+
+
+def get_level_scores_with_average_from_paths(
+    paths: Sequence[str],
+    levels: list[str] = chord_levels.LEVELS,
+    workers: int | None = None,
+) -> np.ndarray:
+    """
+    結果CSVのパスのリストから、(レベル数 × ファイル数 × (音源数 + 1)) の正解率の配列を返す
+    CSVは1度だけ読み込み、整数コードにしてから全てのレベルを計算する
+    """
+    names, labels = stack_results(read_result_csvs(paths, workers))
+    return _append_average(*_get_batch_level_scores(names, chord_vocabulary.encode(labels), levels))
@@ -0,0 +1,96 @@
+"""
+MIREXのコード認識の評価と同じく、語彙を縮約した複数の比較レベルで正解かどうかを判定する
+python.chord_vocabulary の整数コードから根音と構成音のビットマスクを取り出し、
+レベルごとに 比較するビット と 評価の対象にする正解の構成音 の表を引くだけなので、全てのレベルを一度に計算できる
+
+    - root     : 根音のみ
+    - majmin   : 根音と短3度・長3度・完全5度のみ。正解がメジャーかマイナーのトライアドを含む場合のみ評価する
+    - sevenths : 根音と全ての構成音。正解が maj, min, maj7, 7, min7 の場合のみ評価する
+    - tetrads  : 根音と全ての構成音。全てのコードを評価する(転回形は区別しない)
+
+どのレベルも根音と構成音のみを比較するので、表記の違い(C#とDb、C/EとCなど)は区別しない
+正解がNの場合はどのレベルでも評価し、推定もNの場合のみ正解とする
+正解が空(PAD_CODE)や文法に合わないラベルの場合は評価しない
+"""
+
+import numpy as np
+
+from python.chord_vocabulary import NO_CHORD_CODE, get_masks, get_roots, to_mask
+
+LEVELS = ["root", "majmin", "sevenths", "tetrads"]
+
+_MASK_COUNT = 1 << 12
+_ALL_MASKS = np.arange(_MASK_COUNT)
+
+_MAJOR = to_mask((0, 4, 7))
+_MINOR = to_mask((0, 3, 7))
+_MAJMIN_BITS = to_mask((0, 3, 4, 7))
+_SEVENTHS = [_MAJOR, _MINOR, to_mask((0, 4, 7, 11)), to_mask((0, 4, 7, 10)), to_mask((0, 3, 7, 10))]
+
+# 比較する構成音のビット
+_COMPARED_BITS = {
+    "root": 0,
+    "majmin": _MAJMIN_BITS,
+    "sevenths": _MASK_COUNT - 1,
+    "tetrads": _MASK_COUNT - 1,
+}
+
+# 正解の構成音のビットマスクごとに、評価の対象にするかどうか
+_VALID_MASKS = {
+    "root": _ALL_MASKS > 0,
+    "majmin": np.isin(_ALL_MASKS & _MAJMIN_BITS, [_MAJOR, _MINOR]),
+    "sevenths": np.isin(_ALL_MASKS, _SEVENTHS),
+    "tetrads": _ALL_MASKS > 0,
+}
+
+
+def compare(
+    reference: np.ndarray,
+    estimated: np.ndarray,
+    levels: list[str] = LEVELS,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    同じ形のコードの配列同士を比較し、(レベル数, *形) の 正解かどうか と 評価の対象かどうか を返す
+    """
+    reference = np.asarray(reference)
+    estimated = np.asarray(estimated)
+
+    reference_roots, estimated_roots = get_roots(reference), get_roots(estimated)
+    reference_masks, estimated_masks = get_masks(reference), get_masks(estimated)
+
+    compared_bits = np.array([_COMPARED_BITS[level] for level in levels]).reshape(-1, *[1] * reference.ndim)
+    valid_masks = np.stack([_VALID_MASKS[level] for level in levels])
+
+    is_no_chord = reference == NO_CHORD_CODE
+    is_chord = reference > NO_CHORD_CODE
+
+    same_notes = ((reference_masks ^ estimated_masks) & compared_bits) == 0
+    same_chords = is_chord & (reference_roots == estimated_roots) & same_notes
+    matches = np.where(is_no_chord, estimated == NO_CHORD_CODE, same_chords)
+    valid = is_no_chord | (is_chord & valid_masks[:, reference_masks])
+
+    return matches & valid, valid
+
+
+def score(
+    reference: np.ndarray,
+    estimated: np.ndarray,
+    weights: np.ndarray | None = None,
+    levels: list[str] = LEVELS,
+) -> dict[str, float]:
+    """
+    レベルごとの、評価の対象のみでの(weightsで重み付けした)正解率。対象が無いレベルはNaN
+    """
+    matches, valid = compare(reference, estimated, levels)
+    if weights is None:
+        weights = np.ones(np.shape(reference))
+
+    totals = (valid * weights).reshape(len(levels), -1).sum(axis=1)
+    scores = np.divide(
+        (matches * weights).reshape(len(levels), -1).sum(axis=1),
+        totals,
+        out=np.full(len(levels), np.nan),
+        where=totals > 0,
+    )
+
+    return dict(zip(levels, scores.tolist()))
@@ -8,9 +8,12 @@ ex) python3 python/excel_data_replacer.py 'test/outputs/result.xlsx'
 import argparse
 import csv
 import glob
+import hashlib
 import itertools
+import json
 import os
 from dataclasses import dataclass
+from typing import Any
 
 import natsort
 from openpyxl import Workbook, load_workbook
@@ -21,18 +24,37 @@ START_COLUMN = 2
 START_ROW = 3
 
 
+@dataclass
+class _Block:
+    rows: list[list[str]]
+    digest: str
+
+
 @dataclass
 class ExcelDataReplacer:
+    """
+    CSVごとにブロックとして縦に並べて書き込む
+    ブロックの高さはCSVの最大行数 + 1(空行)、幅はCSVの最大列数から決める
+
+    書き込んだCSVのハッシュを <output_path>.hashes.json に保存し、次回は変更されたブロックのみを書き換える
+    CSVが減った場合は、前回書き込んだ後ろのブロックを空にする
+    配置が変わった場合は、前回書き込んだ範囲を全て空にしてから書き直す
+    openpyxlはセルの一部だけを読み書きできないため、変更がある場合はファイル全体を読み込んで保存する
+    ファイル全体を読み込まずに作り直すには write_only を使う
+    """
+
     paths: list[str]
     start_row: int
     start_column: int
 
     @staticmethod
-    def _read_csv(path: str) -> list[list[str]]:
-        with open(path) as f:
-            data = [row for row in csv.reader(f)]
+    def _read_csv(path: str) -> _Block:
+        with open(path, "rb") as f:
+            content = f.read()
+
+        rows = [row for row in csv.reader(content.decode().splitlines())]
 
-        return data
+        return _Block(rows, hashlib.sha256(content).hexdigest())
 
     @staticmethod
     def _get_workbook(output_path: str) -> Workbook:
@@ -43,38 +65,123 @@ class ExcelDataReplacer:
             wb = Workbook()
         return wb
 
-    def _write(self, ws: Worksheet, path: str, offset_row: int) -> None:
-        data_rows = self._read_csv(path)
-
-        # fmt: off
-        rows = ws.iter_rows(
-            min_row=offset_row + self.start_row,
-            max_row=offset_row + self.start_row + 5 * 13 + 1,
-            min_col=self.start_column,
-            max_col=self.start_column + 21,
-        )
-        # fmt: on
-        for row, data_row in zip(rows, data_rows):
-            for i in range(len(data_row)):
-                cell = row[i]
-                value = data_row[i]
-                cell.value = value
-
-    def write(self, output_path: str) -> None:
+    @staticmethod
+    def _get_hashes_path(output_path: str) -> str:
+        return output_path + ".hashes.json"
+
+    def _get_layout(self, blocks: list[_Block]) -> dict[str, int]:
+        return {
+            "start_row": self.start_row,
+            "start_column": self.start_column,
+            "height": max((len(block.rows) for block in blocks), default=0) + 1,
+            "width": max((len(row) for block in blocks for row in block.rows), default=0),
+        }
+
+    def _load_hashes(self, output_path: str) -> dict[str, Any] | None:
+        """
+        前回書き込んだ配置とハッシュ。保存されていない場合はNone
+        """
+        hashes_path = self._get_hashes_path(output_path)
+        if not os.path.exists(output_path) or not os.path.exists(hashes_path):
+            return None
+
+        with open(hashes_path) as f:
+            return json.load(f)
+
+    def _save_hashes(self, output_path: str, layout: dict[str, int], blocks: list[_Block]) -> None:
+        with open(self._get_hashes_path(output_path), "w") as f:
+            json.dump({"layout": layout, "digests": [block.digest for block in blocks]}, f)
+
+    def _write(self, ws: Worksheet, block: _Block, offset_row: int, layout: dict[str, int]) -> None:
+        """
+        ブロックの範囲を、区切りの空行も含めて全て書き換える。CSVより小さい部分は空にする
+        """
+        for i in range(layout["height"]):
+            data_row = block.rows[i] if i < len(block.rows) else []
+            for j in range(layout["width"]):
+                # ws.cellのvalueにNoneを渡しても空にならないため、値を直接代入する
+                ws.cell(row=offset_row + self.start_row + i, column=self.start_column + j).value = (
+                    data_row[j] if j < len(data_row) else None
+                )
+
+    def _clear(self, ws: Worksheet, start_row: int, end_row: int, start_column: int, width: int) -> None:
+        """
+        前回書き込んだ範囲のうち、今回書き込まない行を空にする
+        """
+        for row in range(start_row, end_row):
+            for column in range(start_column, start_column + width):
+                ws.cell(row=row, column=column).value = None
+
+    def _write_only(self, output_path: str, blocks: list[_Block], layout: dict[str, int]) -> None:
+        """
+        write-onlyモードで行ごとに追記する。新規のワークブックとなるため、データ部分以外は残らない
+        """
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet("Sheet1")
+
+        for _ in range(self.start_row - 1):
+            ws.append([])
+
+        padding = [None] * (self.start_column - 1)
+        for block in blocks:
+            for i in range(layout["height"]):
+                ws.append(padding + block.rows[i] if i < len(block.rows) else [])
+
+        wb.save(output_path)
+
+    def write(self, output_path: str, write_only: bool = False) -> None:
         if not output_path.endswith(".xlsx"):
             raise ValueError(f"Invalid output path: {output_path}")
 
+        blocks = [self._read_csv(path) for path in self.paths]
+        layout = self._get_layout(blocks)
+
+        if write_only or not os.path.exists(output_path):
+            self._write_only(output_path, blocks, layout)
+            self._save_hashes(output_path, layout, blocks)
+            print(f"create {output_path} done!")
+            return
+
+        saved = self._load_hashes(output_path)
+        saved_layout = saved["layout"] if saved is not None else layout
+        saved_digests = list(saved["digests"]) if saved is not None else []
+
+        # 前回と配置が異なる場合は全て書き直す
+        digests = saved_digests if saved_layout == layout else []
+        changed = [i for i, block in enumerate(blocks) if i >= len(digests) or digests[i] != block.digest]
+
+        # 前回書き込んだ範囲のうち、今回のブロックより後ろの部分
+        end_row = self.start_row + len(blocks) * layout["height"]
+        saved_end_row = saved_layout["start_row"] + len(saved_digests) * saved_layout["height"]
+
+        if not changed and saved_end_row <= end_row:
+            print(f"{output_path} is up to date")
+            return
+
         wb = self._get_workbook(output_path)
         ws: Worksheet = wb["Sheet1"]
 
-        for i in range(len(self.paths)):
-            path = self.paths[i]
-            # print(f"creating {path}...")
+        if saved_layout != layout:
+            self._clear(
+                ws,
+                saved_layout["start_row"],
+                saved_end_row,
+                saved_layout["start_column"],
+                saved_layout["width"],
+            )
+
+        for i in changed:
+            # print(f"creating {self.paths[i]}...")
+
+            self._write(ws, blocks[i], offset_row=i * layout["height"], layout=layout)
 
-            self._write(ws, path, offset_row=i * (5 * 13 + 2))
+        if saved_layout == layout and end_row < saved_end_row:
+            self._clear(ws, end_row, saved_end_row, saved_layout["start_column"], saved_layout["width"])
+            print(f"clear rows {end_row}-{saved_end_row - 1} of {output_path}")
 
         wb.save(output_path)
-        print(f"create {output_path} done!")
+        self._save_hashes(output_path, layout, blocks)
+        print(f"update {len(changed)} blocks of {output_path} done!")
 
 
 def _get_files(input_path: str) -> list[str]:
@@ -99,6 +206,11 @@ if __name__ == "__main__":
 
     parser.add_argument("input_path", nargs="+", help="input path. file or dir")
     parser.add_argument("-o", "--output_path", help="output path", default=DEFAULT_OUTPUT_PATH)
+    parser.add_argument(
+        "--write_only",
+        action="store_true",
+        help="create a new workbook in write-only mode. cells other than data are discarded",
+    )
 
     args = parser.parse_args()
 
@@ -110,4 +222,4 @@ if __name__ == "__main__":
         print("No csv file detected. Please check the path")
         exit(0)
 
-    ExcelDataReplacer(paths, start_column=START_COLUMN, start_row=START_ROW).write(args.output_path)
+    ExcelDataReplacer(paths, start_column=START_COLUMN, start_row=START_ROW).write(args.output_path, args.write_only)
@@ -0,0 +1,199 @@
+"""
+交差検証の結果ファイル名(推定器のsanitize()された文字列)をパースし、パラメータからファイルを引くためのインデックス
+
+ex) chunkSize_4096__chunkStride_0__sampleRate_22050__window_hanning/
+    mean_matching_cosine_similarity_harmonic_0.6-4_template_scaled__normal_distribution_comb_filter__stft_mags_ln_scaled__E2-D#6__minor_flat_five_priority.csv
+
+    ", "は"__"に置換されているため、"__"で区切った要素が推定器の各構成要素に対応する
+    推定器 __ クロマ計算 [__ 振幅計算] __ 音域 [__ コード選択]
+"""
+
+import glob
+import json
+import os
+import re
+import sys
+from dataclasses import asdict, dataclass, fields
+from typing import Any
+
+import natsort
+
+sys.path.append(".")
+
+from python.const import Scaling, WindowFunction  # noqa
+from python.path_util import get_file_name  # noqa
+
+_INDEX_FILE_NAME = ".experiment_index.json"
+
+_SEPARATOR = "__"
+_PITCH_RANGE_PATTERN = re.compile(r"^[A-G]#?\d+-[A-G]#?\d+$")
+_CHROMA_CALCULATOR_PATTERN = re.compile(
+    r"^(?P<chroma_calculator>.+?)_(?P<scaling>[a-z]+)_scaled(?:_override_by_(?P<override_chunk_size>\d+))?$"
+)
+_CONTEXT_PATTERN = re.compile(
+    r"^chunkSize_(?P<window_size>\d+)__chunkStride_(?P<chunk_stride>\d+)"
+    r"__sampleRate_(?P<sample_rate>\d+)__window_(?P<window_function>\w+)$"
+)
+
+
+@dataclass(frozen=True)
+class RunParameters:
+    directory: str
+    estimator: str
+    chroma_calculator: str
+    scaling: Scaling | None
+    pitch_range: str
+    selector: str
+    override_chunk_size: int | None = None
+    window_size: int | None = None
+    chunk_stride: int | None = None
+    sample_rate: int | None = None
+    window_function: WindowFunction | None = None
+
+    @classmethod
+    def parse(cls, path: str) -> "RunParameters":
+        """
+        ファイル名から推定器の構成を、親ディレクトリ名からSTFTの設定を読み取る
+        STFTの設定を含むディレクトリが無い場合、その値はNoneとなる
+        """
+        parts = get_file_name(path).split(_SEPARATOR)
+
+        range_index = next((i for i, part in enumerate(parts) if _PITCH_RANGE_PATTERN.match(part)), None)
+        if range_index is None or range_index < 2:
+            raise ValueError(f"Invalid run name: {path}")
+
+        chroma_calculator = _SEPARATOR.join(parts[1:range_index])
+        scaling = None
+        override_chunk_size = None
+
+        if match := _CHROMA_CALCULATOR_PATTERN.match(chroma_calculator):
+            chroma_calculator = match["chroma_calculator"]
+            scaling = Scaling(match["scaling"])
+            if match["override_chunk_size"] is not None:
+                override_chunk_size = int(match["override_chunk_size"])
+
+        return cls(
+            directory=os.path.dirname(path),
+            estimator=parts[0],
+            chroma_calculator=chroma_calculator,
+            scaling=scaling,
+            pitch_range=parts[range_index],
+            selector=_SEPARATOR.join(parts[range_index + 1 :]) or "first",
+            override_chunk_size=override_chunk_size,
+            **cls.__parse_context(path),
+        )
+
+    @staticmethod
+    def __parse_context(path: str) -> dict[str, Any]:
+        for directory_name in reversed(os.path.dirname(path).split("/")):
+            if match := _CONTEXT_PATTERN.match(directory_name):
+                return dict(
+                    window_size=int(match["window_size"]),
+                    chunk_stride=int(match["chunk_stride"]),
+                    sample_rate=int(match["sample_rate"]),
+                    window_function=WindowFunction(match["window_function"]),
+                )
+        return {}
+
+
+class ExperimentIndex:
+    """
+    ルートディレクトリ以下の結果CSVをパラメータごとに引けるようにしたインデックス
+    <root>/.experiment_index.json にキャッシュし、配下のディレクトリの更新時刻が変わった時のみ作り直す
+    """
+
+    def __init__(self, root: str, runs: dict[str, RunParameters]) -> None:
+        self.root = root
+        self.runs = runs
+
+        self._inverted: dict[str, dict[Any, set[str]]] = {field.name: {} for field in fields(RunParameters)}
+        for path, parameters in runs.items():
+            for name, value in asdict(parameters).items():
+                self._inverted[name].setdefault(value, set()).add(path)
+
+    def __getitem__(self, path: str) -> RunParameters:
+        return self.runs[path]
+
+    def __len__(self) -> int:
+        return len(self.runs)
+
+    @classmethod
+    def load(cls, root: str) -> "ExperimentIndex":
+        cache_path = os.path.join(root, _INDEX_FILE_NAME)
+
+        if os.path.exists(cache_path):
+            with open(cache_path) as f:
+                cache = json.load(f)
+
+            if cache["directories"] == cls.__get_directory_mtimes(cache["directories"]):
+                runs = {path: cls.__from_dict(value) for path, value in cache["runs"].items()}
+                return cls(root, runs)
+
+        return cls.build(root)
+
+    @classmethod
+    def build(cls, root: str) -> "ExperimentIndex":
+        paths = glob.glob(f"{root}/**/*.csv", recursive=True)
+
+        runs = {}
+        for path in natsort.natsorted(paths):
+            try:
+                runs[path] = RunParameters.parse(path)
+            except ValueError:
+                print(f"skip: {path}")
+
+        directories = []
+        for dir_path, dir_names, _ in os.walk(root):
+            # .storeなどの隠しディレクトリは結果ファイルを含まないため、監視対象から外す
+            dir_names[:] = [name for name in dir_names if not name.startswith(".")]
+            directories.append(dir_path)
+
+        if os.path.isdir(root):
+            cache_path = os.path.join(root, _INDEX_FILE_NAME)
+            # キャッシュファイルの作成でルートの更新時刻が変わるため、先に作成しておく
+            open(cache_path, "a").close()
+
+            with open(cache_path, "w") as f:
+                json.dump(
+                    {
+                        "directories": cls.__get_directory_mtimes(directories),
+                        "runs": {path: asdict(parameters) for path, parameters in runs.items()},
+                    },
+                    f,
+                    ensure_ascii=False,
+                )
+
+        return cls(root, runs)
+
+    def find(self, **parameters: Any) -> list[str]:
+        """
+        指定したパラメータを全て満たすファイルのパスを名前順で返す
+        ex) index.find(window_size=4096, scaling=Scaling.LN)
+        """
+        if not parameters:
+            return list(self.runs.keys())
+
+        matched = set.intersection(*(self._inverted[name].get(value, set()) for name, value in parameters.items()))
+        return natsort.natsorted(matched)
+
+    def find_one(self, **parameters: Any) -> str:
+        paths = self.find(**parameters)
+        if len(paths) != 1:
+            raise LookupError(f"{len(paths)} files matched: {parameters}")
+        return paths[0]
+
+    @staticmethod
+    def __get_directory_mtimes(directories: Any) -> dict[str, float | None]:
+        return {dir_path: os.path.getmtime(dir_path) if os.path.isdir(dir_path) else None for dir_path in directories}
+
+    @staticmethod
+    def __from_dict(value: dict[str, Any]) -> RunParameters:
+        scaling = value["scaling"]
+        window_function = value["window_function"]
+        return RunParameters(
+            **{
+                **value,
+                "scaling": Scaling(scaling) if scaling is not None else None,
+                "window_function": WindowFunction(window_function) if window_function is not None else None,
+            }
+        )
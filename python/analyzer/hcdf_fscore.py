@@ -1,22 +1,83 @@
 import argparse
+import collections
+import itertools
+import os
+import sys
 
 import pandas as pd
 
+sys.path.append(".")
+
+from python.path_util import get_sorted_csv_paths  # noqa
+
 GENRES = ["BN", "Funk", "Jazz", "Rock", "SS"]
+AVERAGE = "Average"
+
+__GENRE_PATTERN = f"({'|'.join(GENRES)})"
+
+
+def get_genres(names: pd.Series) -> pd.Categorical:
+    """
+    GuitarSetのファイル名(ex. 00_BN1-129-Eb_comp_mic)からジャンルを抽出する
+    """
+    return pd.Categorical(names.str.extract(__GENRE_PATTERN, expand=False), categories=GENRES)
+
+
+def __get_run_names(paths: list[str]) -> list[str]:
+    """
+    共通の親ディレクトリからの拡張子を除いた相対パス。同じディレクトリのファイルのみであればファイル名と同じ
+    異なるディレクトリの同じ名前のファイル(ex. runA/tolerance_0.25.csv, runB/tolerance_0.25.csv)を区別する
+    """
+    parent = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in paths])
+    names = [os.path.splitext(os.path.relpath(os.path.abspath(path), parent))[0] for path in paths]
+
+    duplicates = [name for name, count in collections.Counter(names).items() if count > 1]
+    if duplicates:
+        raise ValueError(f"Duplicate runs: {duplicates}")
+
+    return names
 
 
-def __drop_name_column(df: pd.DataFrame) -> pd.DataFrame:
+def __read_fscores(paths: list[str]) -> pd.DataFrame:
+    """
+    複数のF値のCSVを縦に結合し、__get_run_namesをrun列、nameから抽出したジャンルをgenre列として加える
+    """
+    df = pd.concat(
+        [pd.read_csv(path) for path in paths],
+        keys=__get_run_names(paths),
+        names=["run", None],
+    ).reset_index(level="run")
+
+    df["run"] = pd.Categorical(df["run"], categories=list(dict.fromkeys(df["run"])))
+    df["genre"] = get_genres(df["name"])
+
     return df.drop("name", axis=1)
 
 
-def __calculate_mean_by_genre(path: str) -> pd.DataFrame:
-    df = pd.read_csv(path)
+def __calculate_mean_by_genre(paths: list[str]) -> pd.DataFrame:
+    """
+    (run, genre) のマルチインデックスで、ジャンルごとと全体の平均を返す
+    ファイルが1つの場合はrunのインデックスを省く
+    """
+    df = __read_fscores(paths)
+
+    by_genre = df.groupby(["run", "genre"], observed=False).mean()
+    average = df.drop("genre", axis=1).groupby("run", observed=False).mean()
+    average.index = pd.MultiIndex.from_product([average.index, [AVERAGE]], names=["run", "genre"])
+
+    concat_df = pd.concat([by_genre, average])
+    concat_df = concat_df.reindex(
+        pd.MultiIndex.from_product([df["run"].cat.categories, GENRES + [AVERAGE]], names=["run", "genre"])
+    )
+
+    if len(paths) == 1:
+        concat_df = concat_df.droplevel(0).rename_axis(None)
 
-    objs = [__drop_name_column(df.query("name.str.contains(@genre)")).mean() for genre in GENRES]
-    concat_df = pd.concat(objs + [__drop_name_column(df).mean()], axis=1)
-    concat_df.columns = GENRES + ["Average"]
+    return concat_df.round(3)
 
-    return concat_df.T.round(3)
+
+def __get_paths(input_path: str) -> list[str]:
+    return [input_path] if input_path.endswith(".csv") else get_sorted_csv_paths(input_path)
 
 
 def main() -> None:
@@ -24,7 +85,8 @@ def main() -> None:
     parser.add_argument(
         "path",
         type=str,
-        help="Path to the CSV file",
+        nargs="+",
+        help="Path to the CSV files or directories",
     )
     parser.add_argument(
         "choice",
@@ -35,7 +97,9 @@ def main() -> None:
 
     args = parser.parse_args()
 
-    df = __calculate_mean_by_genre(args.path)
+    paths = list(itertools.chain.from_iterable(map(__get_paths, args.path)))
+
+    df = __calculate_mean_by_genre(paths)
 
     if args.choice == "csv":
         print(df.to_csv())
@@ -0,0 +1,283 @@
+"""
+コード変化検出(HCDF)の閾値を総当たりし、閾値ごとのF値をジャンル別に出力するスクリプト
+Dart側で閾値ごとに推定し直す代わりに、書き出したクロマを一度だけ読み込んで全ての閾値を一度に評価する
+CLIとして扱う想定
+
+ex) python3 python/analyzer/hcdf_sweep.py assets/csv/audio_mono-mic test/outputs/HCDF/chroma/audio_mono-mic \
+        power --start 0 --stop 50 --num 5000 -o test/outputs/HCDF/sweep_power.csv
+
+    - power  : PowerThresholdChordChangeDetector。クロマのL2ノルムが閾値未満のフレームを無音とみなす
+    - cosine : factoryのpreFrameCheckと同じ構成。--power_thresholdで無音を区切った上で、
+               PreFrameCheckChordChangeDetectorのコサイン類似度の閾値を変える
+
+クロマのCSVは Table.fromMatrix で書き出した (フレーム数 × 12) のヘッダなしの形式
+推定したコード区間の開始時刻を変化点とし、最初の区間の開始時刻はget_change_timesと同様に除く
+閾値ごとに1対1の対応付けを行うと閾値の数だけ計算が必要になるため、
+許容誤差内に正解がある推定の割合を適合率、許容誤差内に推定がある正解の割合を再現率とする
+そのため、hcdf_tolerance.pyのF値とは僅かに異なる場合がある
+"""
+
+import argparse
+import sys
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(".")
+
+from python.analyzer.hcdf_fscore import AVERAGE, get_genres  # noqa
+from python.analyzer.hcdf_tolerance import read_change_times  # noqa
+from python.path_util import get_file_name, get_paired_csv_paths  # noqa
+
+DEFAULT_DELTA_TIME = 2048 / 22050
+DEFAULT_TOLERANCE = 0.25
+
+DETECTORS = ["power", "cosine"]
+COLUMNS = ["f-score", "precision", "recall"]
+
+
+@dataclass
+class StartRanges:
+    """
+    フレームごとに、そのフレームが区間の開始となる閾値tの範囲 lows < t <= highs
+    検出器の逐次処理を閾値について解くと、どちらの検出器も1つの半開区間になる
+    """
+
+    lows: np.ndarray
+    highs: np.ndarray
+
+
+def read_chroma(path: str) -> np.ndarray:
+    return pd.read_csv(path, header=None).to_numpy(dtype=float)
+
+
+def _exclusive_cummax(values: np.ndarray) -> np.ndarray:
+    return np.concatenate([[-np.inf], np.maximum.accumulate(values)[:-1]])
+
+
+def get_power_ranges(chroma: np.ndarray) -> StartRanges:
+    """
+    PowerThresholdChordChangeDetector
+
+    フレームiが区間の開始となるのは power[i - 1] < t <= power[i] のとき
+    それより前に区間があるのは、それより前のフレームのパワーの最大値 >= t のとき
+    """
+    powers = np.linalg.norm(chroma, axis=1)
+
+    return StartRanges(
+        lows=np.concatenate([[-np.inf], powers[:-1]]),
+        highs=np.minimum(powers, _exclusive_cummax(powers)),
+    )
+
+
+def get_cosine_ranges(chroma: np.ndarray, power_threshold: float) -> StartRanges:
+    """
+    PowerThresholdChordChangeDetector(onPower: PreFrameCheckChordChangeDetector.cosine)
+
+    無音で区切られた各区間の中で、フレームkが区間の開始となるのは
+    kが無音の直後なら score[k + 1] >= t、そうでなければ score[k] < t <= score[k + 1] のとき
+    scoreはフレームとその前のフレームのコサイン類似度。Dartと同様にNaNは閾値未満とみなさない
+    """
+    norms = np.linalg.norm(chroma, axis=1)
+    on_power = norms >= power_threshold
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        scores = (chroma[1:] * chroma[:-1]).sum(axis=1) / (norms[1:] * norms[:-1])
+    scores = np.concatenate([[np.inf], np.nan_to_num(scores, nan=np.inf)])
+
+    # next_scores[k] はフレームkとk + 1の組の類似度。組が無音をまたぐ場合はどの閾値でも開始とならない
+    is_pair = on_power & np.concatenate([on_power[1:], [False]])
+    next_scores = np.where(is_pair, np.concatenate([scores[1:], [-np.inf]]), -np.inf)
+
+    is_run_start = on_power & ~np.concatenate([[False], on_power[:-1]])
+
+    return StartRanges(
+        lows=np.where(is_run_start, -np.inf, scores),
+        highs=np.minimum(next_scores, _exclusive_cummax(next_scores)),
+    )
+
+
+def _count_ranges(groups: np.ndarray, ranges: StartRanges, group_count: int, thresholds: np.ndarray) -> np.ndarray:
+    """
+    (グループ数 × 閾値数) の、lows < t <= highs を満たす範囲の数
+    範囲の両端を順位に置き換えてグループごとにずらし、1本のソート済み配列へのsearchsortedで全て数える
+    """
+    values = np.unique(np.concatenate([ranges.lows, ranges.highs]))
+    width = len(values) + 1
+
+    offsets = np.arange(group_count) * width
+    queries = offsets[:, None] + np.searchsorted(values, thresholds)[None, :]
+
+    def count_less(ends: np.ndarray) -> np.ndarray:
+        keys = np.sort(groups * width + np.searchsorted(values, ends))
+        return np.searchsorted(keys, queries) - np.searchsorted(keys, offsets)[:, None]
+
+    return count_less(ranges.lows) - count_less(ranges.highs)
+
+
+def _union(groups: np.ndarray, ranges: StartRanges) -> tuple[np.ndarray, StartRanges]:
+    """
+    グループごとに範囲の和集合をとり、重ならない範囲の列にする
+    """
+    if len(groups) == 0:
+        return groups, ranges
+
+    values = np.unique(np.concatenate([ranges.lows, ranges.highs]))
+    width = len(values) + 1
+
+    lows = groups * width + np.searchsorted(values, ranges.lows)
+    highs = groups * width + np.searchsorted(values, ranges.highs)
+
+    order = np.argsort(lows, kind="stable")
+    lows, highs = lows[order], highs[order]
+
+    is_new = np.concatenate([[True], lows[1:] > np.maximum.accumulate(highs)[:-1]])
+    starts = np.flatnonzero(is_new)
+
+    return groups[order][starts], StartRanges(
+        lows=values[lows[starts] % width],
+        highs=values[np.maximum.reduceat(highs, starts) % width],
+    )
+
+
+def _nonempty(groups: np.ndarray, ranges: StartRanges) -> tuple[np.ndarray, StartRanges]:
+    keep = ranges.lows < ranges.highs
+    return groups[keep], StartRanges(ranges.lows[keep], ranges.highs[keep])
+
+
+def sweep(
+    references: list[np.ndarray],
+    ranges: list[StartRanges],
+    thresholds: np.ndarray,
+    delta_time: float = DEFAULT_DELTA_TIME,
+    tolerance: float = DEFAULT_TOLERANCE,
+) -> np.ndarray:
+    """
+    (曲 × 閾値 × COLUMNS) の配列を返す
+    """
+    tracks = len(references)
+    frame_counts = [len(r.lows) for r in ranges]
+
+    frame_tracks = np.repeat(np.arange(tracks), frame_counts)
+    frame_times = np.concatenate([np.arange(count) * delta_time for count in frame_counts])
+    frame_ranges = StartRanges(
+        np.concatenate([r.lows for r in ranges]),
+        np.concatenate([r.highs for r in ranges]),
+    )
+
+    # 曲ごとに時刻をずらして1本の列につなげ、許容誤差内のフレームや正解をsearchsortedで求める
+    spacing = max(max(frame_counts, default=0) * delta_time, max((r.max() for r in references if len(r)), default=0))
+    spacing += 2 * tolerance + 1
+
+    reference_times = np.concatenate([times + i * spacing for i, times in enumerate(references)])
+    reference_tracks = np.repeat(np.arange(tracks), [len(times) for times in references])
+    shifted_frame_times = frame_times + frame_tracks * spacing
+
+    left = np.searchsorted(reference_times, shifted_frame_times - tolerance, side="left")
+    right = np.searchsorted(reference_times, shifted_frame_times + tolerance, side="right")
+    is_hit = right > left
+
+    # 正解ごとに許容誤差内のフレームを列挙し、その範囲の和集合に閾値が含まれれば正解が検出されている
+    first = np.searchsorted(shifted_frame_times, reference_times - tolerance, side="left")
+    last = np.searchsorted(shifted_frame_times, reference_times + tolerance, side="right")
+    window_sizes = last - first
+    window_references = np.repeat(np.arange(len(reference_times)), window_sizes)
+    window_frames = np.repeat(first - np.cumsum(window_sizes) + window_sizes, window_sizes) + np.arange(
+        window_sizes.sum()
+    )
+
+    covered_references, covered_ranges = _union(
+        *_nonempty(
+            window_references,
+            StartRanges(frame_ranges.lows[window_frames], frame_ranges.highs[window_frames]),
+        )
+    )
+
+    estimates = _count_ranges(*_nonempty(frame_tracks, frame_ranges), tracks, thresholds)
+    hits = _count_ranges(
+        *_nonempty(frame_tracks[is_hit], StartRanges(frame_ranges.lows[is_hit], frame_ranges.highs[is_hit])),
+        tracks,
+        thresholds,
+    )
+    found = _count_ranges(reference_tracks[covered_references], covered_ranges, tracks, thresholds)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        precision = np.nan_to_num(hits / estimates)
+        recall = np.nan_to_num(found / np.array([len(times) for times in references])[:, None])
+        fscore = np.nan_to_num(2 * precision * recall / (precision + recall))
+
+    return np.stack([fscore, precision, recall], axis=-1)
+
+
+def sweep_directories(
+    reference_dir_path: str,
+    chroma_dir_path: str,
+    thresholds: np.ndarray,
+    detector: str = "power",
+    power_threshold: float = 0.0,
+    delta_time: float = DEFAULT_DELTA_TIME,
+    tolerance: float = DEFAULT_TOLERANCE,
+    column: str = "f-score",
+) -> pd.DataFrame:
+    """
+    閾値をインデックス、ジャンルと全体の平均を列とした表を返す
+    """
+    pairs = get_paired_csv_paths(reference_dir_path, chroma_dir_path)
+
+    if detector == "power":
+        ranges = [get_power_ranges(read_chroma(chroma_path)) for _, chroma_path in pairs]
+    elif detector == "cosine":
+        ranges = [get_cosine_ranges(read_chroma(chroma_path), power_threshold) for _, chroma_path in pairs]
+    else:
+        raise NotImplementedError(f"Unknown detector: {detector}")
+
+    references = [read_change_times(reference_path) for reference_path, _ in pairs]
+    scores = sweep(references, ranges, thresholds, delta_time, tolerance)[..., COLUMNS.index(column)]
+
+    df = pd.DataFrame(scores, columns=pd.Index(thresholds, name="threshold"))
+    genres = get_genres(pd.Series([get_file_name(path) for path, _ in pairs]))
+
+    by_genre = df.groupby(genres, observed=False).mean().T
+    by_genre[AVERAGE] = df.mean()
+
+    return by_genre
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Sweep HCDF thresholds and output F-score curves by genre")
+    parser.add_argument("reference_path", type=str, help="Path to the reference annotation directory")
+    parser.add_argument("chroma_path", type=str, help="Path to the exported chroma directory")
+    parser.add_argument("detector", type=str, choices=DETECTORS, help="Chord change detector to sweep")
+    parser.add_argument("--start", type=float, default=0.0, help="First threshold")
+    parser.add_argument("--stop", type=float, default=1.0, help="Last threshold")
+    parser.add_argument("--num", type=int, default=1000, help="Number of thresholds")
+    parser.add_argument("--power_threshold", type=float, default=0.0, help="Power threshold for cosine detector")
+    parser.add_argument("--delta_time", type=float, default=DEFAULT_DELTA_TIME, help="Seconds per chroma frame")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Tolerance [s]")
+    parser.add_argument("--column", type=str, choices=COLUMNS, default="f-score", help="Score to output")
+    parser.add_argument("-o", "--output_path", type=str, help="Output CSV path")
+
+    args = parser.parse_args()
+
+    df = sweep_directories(
+        args.reference_path,
+        args.chroma_path,
+        np.linspace(args.start, args.stop, args.num),
+        detector=args.detector,
+        power_threshold=args.power_threshold,
+        delta_time=args.delta_time,
+        tolerance=args.tolerance,
+        column=args.column,
+    )
+
+    if args.output_path:
+        df.to_csv(args.output_path)
+
+    best = pd.DataFrame({"threshold": df.idxmax(), args.column: df.max()})
+    best.index.name = "genre"
+    print(best.round(3).to_csv())
+
+
+if __name__ == "__main__":
+    main()
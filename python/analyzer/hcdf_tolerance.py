@@ -0,0 +1,161 @@
+"""
+正解のアノテーションCSVと推定したコードの変化時刻から、許容誤差付きでHCDFのF値を計算するスクリプト
+許容誤差ごとに name,f-score,... の形式でCSVを出力するため、hcdf_fscore.pyでジャンルごとに集計できる
+CLIとして扱う想定
+
+ex) python3 python/analyzer/hcdf_tolerance.py assets/csv/audio_mono-mic test/outputs/HCDF/predicts \
+        --tolerances 0.1 0.25 0.5 -o test/outputs/HCDF/tolerances
+
+推定側のCSVは label,start,end 形式のアノテーションか、time列のみの変化時刻のどちらでもよい
+"""
+
+import argparse
+import os
+import sys
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(".")
+
+from python.analyzer.interval_score import Intervals  # noqa
+from python.path_util import get_file_name, get_paired_csv_paths  # noqa
+
+DEFAULT_TOLERANCES = [0.1, 0.25, 0.5, 1.0]
+
+COLUMNS = ["f-score", "precision", "recall", "truth positive", "false positive", "false negative"]
+
+
+def get_change_times(intervals: Intervals) -> np.ndarray:
+    """
+    連続する同じラベルの区間を1つとみなし(ChordProgression.simplify相当)、ラベルが変わる区間の開始時刻を返す
+    """
+    changed = intervals.labels[1:] != intervals.labels[:-1]
+    return intervals.starts[1:][changed]
+
+
+def read_change_times(path: str) -> np.ndarray:
+    df = pd.read_csv(path, keep_default_na=False)
+
+    if list(df.columns) == ["time"]:
+        return np.sort(df["time"].to_numpy(dtype=float))
+
+    return get_change_times(Intervals.from_dataframe(df))
+
+
+@dataclass
+class _Matches:
+    track_indices: np.ndarray
+    distances: np.ndarray
+
+
+def _match(references: list[np.ndarray], estimates: list[np.ndarray], max_tolerance: float) -> _Matches:
+    """
+    全曲の時刻を曲ごとにずらして1本の列につなげ、max_tolerance以内の(正解, 推定)の組をsearchsortedで列挙する
+    組を距離の近い順に見て、正解と推定のどちらもまだ使われていない組のみを採用する(貪欲法)
+    ある許容誤差での貪欲法は、それ以下の距離の組だけを同じ順に見たものと同じなので、
+    採用した組の距離を許容誤差と比べるだけで複数の許容誤差を一度に評価できる
+    """
+    latest = max((times.max() for times in [*references, *estimates] if len(times)), default=0.0)
+    spacing = latest + 2 * max_tolerance + 1
+
+    reference = np.concatenate([times + i * spacing for i, times in enumerate(references)])
+    estimated = np.concatenate([times + i * spacing for i, times in enumerate(estimates)])
+    reference_tracks = np.repeat(np.arange(len(references)), [len(times) for times in references])
+
+    if len(reference) == 0 or len(estimated) == 0:
+        return _Matches(np.empty(0, dtype=int), np.empty(0))
+
+    # 推定ごとに、max_tolerance以内の正解の範囲 [lows, highs)
+    lows = np.searchsorted(reference, estimated - max_tolerance, side="left")
+    highs = np.searchsorted(reference, estimated + max_tolerance, side="right")
+    counts = highs - lows
+
+    estimated_indices = np.repeat(np.arange(len(estimated)), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    reference_indices = np.repeat(lows, counts) + offsets
+
+    distances = np.abs(estimated[estimated_indices] - reference[reference_indices])
+    order = np.lexsort((reference_indices, estimated_indices, distances))
+
+    used_references = np.zeros(len(reference), dtype=bool)
+    used_estimates = np.zeros(len(estimated), dtype=bool)
+    winners = []
+    for pair in order.tolist():
+        reference_index, estimated_index = reference_indices[pair], estimated_indices[pair]
+        if used_references[reference_index] or used_estimates[estimated_index]:
+            continue
+
+        used_references[reference_index] = True
+        used_estimates[estimated_index] = True
+        winners.append(pair)
+
+    return _Matches(reference_tracks[reference_indices[winners]], distances[winners])
+
+
+def calculate_fscores(
+    references: list[np.ndarray],
+    estimates: list[np.ndarray],
+    tolerances: list[float],
+) -> np.ndarray:
+    """
+    (許容誤差 × 曲 × COLUMNS) の配列を返す。truth positiveなどは変化点の個数
+    """
+    tolerance_array = np.asarray(tolerances, dtype=float)
+    matches = _match(references, estimates, float(tolerance_array.max()))
+
+    tp = np.zeros((len(tolerances), len(references)))
+    hits = matches.distances[None, :] <= tolerance_array[:, None]
+    np.add.at(tp, (slice(None), matches.track_indices), hits)
+
+    fp = np.array([len(times) for times in estimates])[None, :] - tp
+    fn = np.array([len(times) for times in references])[None, :] - tp
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        precision = np.nan_to_num(tp / (tp + fp))
+        recall = np.nan_to_num(tp / (tp + fn))
+        fscore = np.nan_to_num(2 * precision * recall / (precision + recall))
+
+    return np.stack([fscore, precision, recall, tp, fp, fn], axis=-1)
+
+
+def calculate_fscores_from_directories(
+    reference_dir_path: str,
+    estimated_dir_path: str,
+    tolerances: list[float],
+) -> dict[float, pd.DataFrame]:
+    pairs = get_paired_csv_paths(reference_dir_path, estimated_dir_path)
+
+    references = [read_change_times(reference_path) for reference_path, _ in pairs]
+    estimates = [read_change_times(estimated_path) for _, estimated_path in pairs]
+
+    scores = calculate_fscores(references, estimates, tolerances)
+    names = pd.Index([get_file_name(reference_path) for reference_path, _ in pairs], name="name")
+
+    return {tolerance: pd.DataFrame(scores[i], index=names, columns=COLUMNS) for i, tolerance in enumerate(tolerances)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Calculate HCDF F-scores with tolerance windows")
+    parser.add_argument("reference_path", type=str, help="Path to the reference annotation directory")
+    parser.add_argument("estimated_path", type=str, help="Path to the estimated annotation directory")
+    parser.add_argument("--tolerances", type=float, nargs="+", default=DEFAULT_TOLERANCES, help="Tolerances [s]")
+    parser.add_argument("-o", "--output_path", type=str, help="Output directory path")
+
+    args = parser.parse_args()
+
+    fscores = calculate_fscores_from_directories(args.reference_path, args.estimated_path, args.tolerances)
+
+    if args.output_path:
+        os.makedirs(args.output_path, exist_ok=True)
+        for tolerance, df in fscores.items():
+            df.to_csv(os.path.join(args.output_path, f"tolerance_{tolerance}.csv"))
+
+    summary = pd.DataFrame({tolerance: df.mean() for tolerance, df in fscores.items()}).T
+    summary.index.name = "tolerance"
+    print(summary.round(3).to_csv())
+
+
+if __name__ == "__main__":
+    main()
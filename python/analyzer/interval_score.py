@@ -0,0 +1,216 @@
+"""
+label,start,end 形式の区間アノテーション同士を比較し、時間で重み付けした評価値を計算するスクリプト
+CLIとして扱う想定
+
+ex) python3 python/analyzer/interval_score.py assets/csv/audio_mono-mic test/outputs/predicts/audio_mono-mic
+
+    - accuracy           : 正解区間の長さで重み付けした正解率 (Weighted Chord Symbol Recall)
+    - over_segmentation  : 1 - 正解区間から見た推定区間の方向付きハミング距離
+    - under_segmentation : 1 - 推定区間から見た正解区間の方向付きハミング距離
+    - segmentation       : 上記2つの小さい方
+    --levels を指定すると、chord_levels の比較レベル(root, majmin, sevenths, tetrads)ごとの accuracy も加える
+"""
+
+import argparse
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(".")
+
+from python import chord_vocabulary  # noqa
+from python.analyzer import chord_levels  # noqa
+from python.path_util import get_file_name, get_paired_csv_paths  # noqa
+
+NO_CHORD = chord_vocabulary.NO_CHORD
+
+COLUMNS = ["accuracy", "over_segmentation", "under_segmentation", "segmentation"]
+
+
+@dataclass
+class Intervals:
+    labels: np.ndarray
+    starts: np.ndarray
+    ends: np.ndarray
+
+    @classmethod
+    def read_csv(cls, path: str) -> "Intervals":
+        return cls.from_dataframe(pd.read_csv(path, keep_default_na=False))
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame) -> "Intervals":
+        if len(df.columns) != 3:
+            raise ValueError("The CSV file must contain 3 columns: label, start, end")
+
+        return cls(
+            df["label"].to_numpy(dtype=object),
+            df["start"].to_numpy(dtype=float),
+            df["end"].to_numpy(dtype=float),
+        )
+
+    def fill(self, start: float, end: float) -> "Intervals":
+        """
+        [start, end] に切り詰め、区間の無い部分をNO_CHORDの区間で埋めた連続した区間を返す
+        """
+        starts = np.clip(self.starts, start, end)
+        ends = np.clip(self.ends, start, end)
+        keep = ends > starts
+        labels, starts, ends = self.labels[keep], starts[keep], ends[keep]
+
+        gap_starts = np.concatenate([[start], ends])
+        gap_ends = np.concatenate([starts, [end]])
+        gaps = gap_ends > gap_starts
+
+        order = np.argsort(np.concatenate([starts, gap_starts[gaps]]), kind="stable")
+
+        return Intervals(
+            np.concatenate([labels, np.full(gaps.sum(), NO_CHORD, dtype=object)])[order],
+            np.concatenate([starts, gap_starts[gaps]])[order],
+            np.concatenate([ends, gap_ends[gaps]])[order],
+        )
+
+
+@dataclass
+class _MergedSegments:
+    durations: np.ndarray
+    reference_indices: np.ndarray
+    estimated_indices: np.ndarray
+
+
+def _merge(reference: Intervals, estimated: Intervals) -> _MergedSegments:
+    """
+    正解と推定の区間の開始時刻をスイープし、どちらの区間も変わらない最小の区間に分割する
+    両者は既にソート済みなので、安定ソートは2つの連続した列のマージとなり線形時間で済む
+    """
+    times = np.concatenate([reference.starts, estimated.starts, [reference.ends[-1]]])
+    is_reference = np.concatenate(
+        [np.ones(len(reference.starts), dtype=int), np.zeros(len(estimated.starts) + 1, dtype=int)]
+    )
+    is_estimated = np.concatenate(
+        [np.zeros(len(reference.starts), dtype=int), np.ones(len(estimated.starts), dtype=int), [0]]
+    )
+
+    order = np.argsort(times, kind="stable")
+    times = times[order]
+
+    # 各境界で、その時点までに始まった区間の数 - 1 が現在の区間のインデックス
+    reference_indices = np.maximum(np.cumsum(is_reference[order]) - 1, 0)[:-1]
+    estimated_indices = np.maximum(np.cumsum(is_estimated[order]) - 1, 0)[:-1]
+
+    return _MergedSegments(np.diff(times), reference_indices, estimated_indices)
+
+
+def _directional_hamming(durations: np.ndarray, indices: np.ndarray, segment_durations: np.ndarray) -> float:
+    """
+    indicesの区間ごとに、もう一方の区間との最大の重なりを除いた長さの合計を全体の長さで割ったもの
+    """
+    max_overlaps = np.zeros(len(segment_durations))
+    np.maximum.at(max_overlaps, indices, durations)
+
+    return float((segment_durations - max_overlaps).sum() / segment_durations.sum())
+
+
+def score(reference: Intervals, estimated: Intervals, levels: Sequence[str] = ()) -> dict[str, float]:
+    """
+    levelsを指定すると、chord_levels の比較レベルごとの時間で重み付けした正解率も加える
+    正解の区間が無い(ヘッダのみのCSVなど)場合は評価できないので、全てNaNとする
+    """
+    if len(reference.starts) == 0 or reference.ends.max() <= reference.starts.min():
+        return {column: np.nan for column in [*COLUMNS, *levels]}
+
+    start, end = reference.starts.min(), reference.ends.max()
+    reference = reference.fill(start, end)
+    estimated = estimated.fill(start, end)
+
+    merged = _merge(reference, estimated)
+
+    # ラベルは重複を除いて1度ずつパースし、整数コードで比較する
+    reference_labels = chord_vocabulary.encode(reference.labels)[merged.reference_indices]
+    estimated_labels = chord_vocabulary.encode(estimated.labels)[merged.estimated_indices]
+
+    annotated = reference_labels != chord_vocabulary.NO_CHORD_CODE
+    matched = annotated & (reference_labels == estimated_labels)
+
+    over_segmentation = 1 - _directional_hamming(
+        merged.durations, merged.reference_indices, reference.ends - reference.starts
+    )
+    under_segmentation = 1 - _directional_hamming(
+        merged.durations, merged.estimated_indices, estimated.ends - estimated.starts
+    )
+
+    return dict(
+        accuracy=float(merged.durations[matched].sum() / max(merged.durations[annotated].sum(), 1e-12)),
+        over_segmentation=over_segmentation,
+        under_segmentation=under_segmentation,
+        segmentation=min(over_segmentation, under_segmentation),
+        **(chord_levels.score(reference_labels, estimated_labels, merged.durations, list(levels)) if levels else {}),
+    )
+
+
+def score_files(paths: tuple[str, str], levels: Sequence[str] = ()) -> dict[str, float]:
+    reference_path, estimated_path = paths
+    return score(Intervals.read_csv(reference_path), Intervals.read_csv(estimated_path), levels)
+
+
+def score_directories(
+    reference_dir_path: str,
+    estimated_dir_path: str,
+    workers: int | None = None,
+    levels: Sequence[str] = (),
+) -> pd.DataFrame:
+    """
+    同じファイル名のCSV同士をプロセスプールで並列に評価し、1行1ファイルの表と平均の行を返す
+    """
+    pairs = get_paired_csv_paths(reference_dir_path, estimated_dir_path)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        scores = list(
+            executor.map(partial(score_files, levels=levels), pairs, chunksize=max(len(pairs) // 64, 1))
+        )
+
+    df = pd.DataFrame(scores, index=[get_file_name(path) for path, _ in pairs], columns=[*COLUMNS, *levels])
+    df.loc["Average"] = df.mean()
+
+    return df.round(3)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare interval annotation CSVs weighted by duration")
+    parser.add_argument("reference_path", type=str, help="Path to the reference CSV file or directory")
+    parser.add_argument("estimated_path", type=str, help="Path to the estimated CSV file or directory")
+    parser.add_argument("-j", "--workers", type=int, help="number of processes. default is cpu count")
+    parser.add_argument("-o", "--output_path", type=str, help="Output CSV path")
+    parser.add_argument(
+        "--levels",
+        type=str,
+        nargs="*",
+        choices=chord_levels.LEVELS,
+        help="Also score at these MIREX-style comparison levels. Without values, all levels",
+    )
+
+    args = parser.parse_args()
+
+    # --levels のみの場合は空のリスト、指定しない場合はNoneになる
+    levels = chord_levels.LEVELS if args.levels == [] else args.levels or []
+
+    if args.reference_path.endswith(".csv"):
+        df = pd.DataFrame(
+            [score_files((args.reference_path, args.estimated_path), levels)],
+            columns=[*COLUMNS, *levels],
+        ).round(3)
+    else:
+        df = score_directories(args.reference_path, args.estimated_path, args.workers, levels)
+
+    if args.output_path:
+        df.to_csv(args.output_path)
+    else:
+        print(df.to_csv())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""
+プリンタや論文用のプロットで共通して使う、結果CSVの読み込みと採点
+"""
+
+import sys
+from argparse import ArgumentParser
+from typing import Sequence
+
+import natsort
+import numpy as np
+
+sys.path.append(".")
+
+from python.analyzer.result_store import (  # noqa
+    DEFAULT_STORE_PATH,
+    get_scores_with_average_from_store,
+)
+
+
+def add_workers_argument(parser: ArgumentParser) -> None:
+    parser.add_argument("-j", "--workers", type=int, help="number of processes. default is cpu count")
+
+
+def load_scores_with_average(
+    paths: Sequence[str],
+    workers: int | None = None,
+    store_path: str = DEFAULT_STORE_PATH,
+) -> dict[str, np.ndarray]:
+    """
+    CSVのパースをworkers個のプロセスに分散し、パスから (音源数 + 1) の正解率への辞書を返す
+    辞書の順番は入力の順番によらずnatsort順となる
+    """
+    paths = natsort.natsorted(set(paths))
+    scores = get_scores_with_average_from_store(paths, store_path, workers)
+
+    return dict(zip(paths, scores))
@@ -0,0 +1,255 @@
+"""
+交差検証の結果CSVを整数コード化し、追記専用の列指向ストアに変換するスクリプト
+読み込み時はnp.memmapで必要な列のみを参照するため、CSVを毎回パースせずに済む
+CLIとして扱う想定
+
+ex) python3 python/analyzer/result_store.py test/outputs/cross_validations/NCSP_paper/methods
+"""
+
+import argparse
+import itertools
+import json
+import os
+import sys
+from dataclasses import asdict, dataclass, field
+from typing import Literal, Sequence
+
+import natsort
+import numpy as np
+
+sys.path.append(".")
+
+from python import chord_vocabulary  # noqa
+from python.analyzer.analyze import (  # noqa
+    PAD_LABEL,
+    get_batch_scores_with_average,
+    read_result_csvs,
+)
+from python.path_util import get_sorted_csv_paths  # noqa
+
+DEFAULT_STORE_PATH = "test/outputs/cross_validations/.store"
+
+PAD_CODE = chord_vocabulary.PAD_CODE
+
+_CODE_DTYPE = np.dtype("<i2")
+_INDEX_FILE_NAME = "index.json"
+
+Column = Literal["names", "labels"]
+COLUMNS: tuple[Column, ...] = ("names", "labels")
+
+
+@dataclass
+class _Run:
+    name_offset: int
+    label_offset: int
+    rows: int
+    chords: int
+    header: str
+    mtime: float
+
+    @property
+    def size(self) -> int:
+        return self.rows * self.chords
+
+
+@dataclass
+class ResultStore:
+    """
+    ディレクトリ構成
+        index.json  : ラベル・行名の語彙と、ランごとのオフセットと形状
+        names.bin   : 行名のコード (int16, ランごとにrows個)
+        labels.bin  : コードラベルのコード (int16, ランごとにrows×chords個)
+
+    キーはCSVのパス。CSVが更新された場合は末尾に追記し、インデックスのみを差し替える
+    """
+
+    path: str = DEFAULT_STORE_PATH
+    vocabulary: list[str] = field(default_factory=list)
+    name_vocabulary: list[str] = field(default_factory=list)
+    runs: dict[str, _Run] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        index_path = os.path.join(self.path, _INDEX_FILE_NAME)
+        if not os.path.exists(index_path):
+            return
+
+        with open(index_path) as f:
+            index = json.load(f)
+
+        self.vocabulary = index["vocabulary"]
+        self.name_vocabulary = index["name_vocabulary"]
+        self.runs = {key: _Run(**run) for key, run in index["runs"].items()}
+
+    def __contains__(self, key: str) -> bool:
+        run = self.runs.get(key)
+        return run is not None and os.path.exists(key) and run.mtime == os.path.getmtime(key)
+
+    def keys(self) -> list[str]:
+        return list(self.runs.keys())
+
+    def ingest(self, paths: Sequence[str], workers: int | None = None) -> list[str]:
+        """
+        未登録もしくは更新されたCSVのみを追記する。追記したパスを返す
+        CSVのパースはworkers個のプロセスで並列に行い、語彙への登録と追記はnatsort順に逐次行う
+        """
+        paths = natsort.natsorted(path for path in set(paths) if path not in self)
+        if not paths:
+            return paths
+
+        os.makedirs(self.path, exist_ok=True)
+
+        for path, df in zip(paths, read_result_csvs(paths, workers)):
+            with open(path) as f:
+                header = f.readline().strip()
+
+            array = df.to_numpy(dtype=object)
+            rows, chords = array.shape[0], array.shape[1] - 1
+
+            names = self._encode(array[:, 0], self.name_vocabulary)
+            labels = self._encode(array[:, 1:], self.vocabulary)
+
+            self.runs[path] = _Run(
+                name_offset=self._append("names", names),
+                label_offset=self._append("labels", labels),
+                rows=rows,
+                chords=chords,
+                header=header,
+                mtime=os.path.getmtime(path),
+            )
+
+        self._save_index()
+        return paths
+
+    def load(self, keys: Sequence[str], columns: Sequence[Column] = COLUMNS) -> dict[Column, np.ndarray]:
+        """
+        指定したランの列を (ラン数 × 行数 [× コード数]) の配列で返す。形状が異なる場合はPAD_CODEで埋める
+        columnsに含まれない列のファイルは開かない
+        """
+        runs = [self.runs[key] for key in keys]
+        rows = max((run.rows for run in runs), default=0)
+        chords = max((run.chords for run in runs), default=0)
+
+        loaded: dict[Column, np.ndarray] = {}
+
+        if "names" in columns:
+            names = np.full((len(runs), rows), PAD_CODE, dtype=_CODE_DTYPE)
+            mapped = self._memmap("names")
+            for i, run in enumerate(runs):
+                start = run.name_offset
+                names[i, : run.rows] = mapped[start : start + run.rows]
+            loaded["names"] = names
+
+        if "labels" in columns:
+            labels = np.full((len(runs), rows, chords), PAD_CODE, dtype=_CODE_DTYPE)
+            mapped = self._memmap("labels")
+            for i, run in enumerate(runs):
+                start = run.label_offset
+                labels[i, : run.rows, : run.chords] = mapped[start : start + run.size].reshape(run.rows, run.chords)
+            loaded["labels"] = labels
+
+        return loaded
+
+    def decode_names(self, codes: np.ndarray) -> np.ndarray:
+        return self._decode(codes, self.name_vocabulary)
+
+    def decode_labels(self, codes: np.ndarray) -> np.ndarray:
+        return self._decode(codes, self.vocabulary)
+
+    def to_chord_codes(self, codes: np.ndarray) -> np.ndarray:
+        """
+        ストアのラベルのコード(語彙の添字)を、このプロセスの chord_vocabulary の整数コードにする
+        ストアの語彙はラベルと1対1なので、他の採点と同じくラベルが文字列として等しい場合のみ一致する
+        """
+        table = np.append(chord_vocabulary.encode(self.vocabulary), PAD_CODE).astype(chord_vocabulary.CODE_DTYPE)
+        return table[codes]
+
+    def _column_path(self, column: Column) -> str:
+        return os.path.join(self.path, f"{column}.bin")
+
+    def _memmap(self, column: Column) -> np.ndarray:
+        path = self._column_path(column)
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return np.empty(0, dtype=_CODE_DTYPE)
+        return np.memmap(path, dtype=_CODE_DTYPE, mode="r")
+
+    def _append(self, column: Column, codes: np.ndarray) -> int:
+        """
+        列ファイルの末尾に追記し、追記前の要素数を返す
+        """
+        with open(self._column_path(column), "ab") as f:
+            offset = f.tell() // _CODE_DTYPE.itemsize
+            codes.astype(_CODE_DTYPE).tofile(f)
+        return offset
+
+    def _save_index(self) -> None:
+        index = {
+            "vocabulary": self.vocabulary,
+            "name_vocabulary": self.name_vocabulary,
+            "runs": {key: asdict(run) for key, run in self.runs.items()},
+        }
+        tmp_path = os.path.join(self.path, _INDEX_FILE_NAME + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(index, f, ensure_ascii=False)
+        os.replace(tmp_path, os.path.join(self.path, _INDEX_FILE_NAME))
+
+    @staticmethod
+    def _encode(values: np.ndarray, vocabulary: list[str]) -> np.ndarray:
+        """
+        語彙に無い値は末尾に追加する。PAD_LABELはPAD_CODEとする
+        """
+        uniques, inverse = np.unique(values.astype(str), return_inverse=True)
+
+        table = {label: code for code, label in enumerate(vocabulary)}
+        for label in uniques:
+            if label != PAD_LABEL and label not in table:
+                table[label] = len(vocabulary)
+                vocabulary.append(label)
+
+        codes = np.array([table.get(label, PAD_CODE) for label in uniques], dtype=_CODE_DTYPE)
+        return codes[inverse].reshape(values.shape)
+
+    @staticmethod
+    def _decode(codes: np.ndarray, vocabulary: list[str]) -> np.ndarray:
+        table = np.array([*vocabulary, PAD_LABEL], dtype=object)
+        return table[codes]
+
+
+def get_scores_with_average_from_store(
+    paths: Sequence[str],
+    store_path: str = DEFAULT_STORE_PATH,
+    workers: int | None = None,
+) -> np.ndarray:
+    """
+    get_scores_with_average_from_pathsのストア版
+    未登録のCSVのみを取り込み、以降はmemmapから読んだコードを chord_vocabulary の整数コードにして採点する
+    """
+    store = ResultStore(store_path)
+    store.ingest(paths, workers)
+
+    loaded = store.load(paths)
+    names = store.decode_names(loaded["names"])
+
+    return get_batch_scores_with_average(names, store.to_chord_codes(loaded["labels"]), pad=PAD_CODE)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ingest cross validation csv into columnar store")
+
+    parser.add_argument("input_path", nargs="+", help="input path. file or dir")
+    parser.add_argument("-o", "--output_path", help="store directory path", default=DEFAULT_STORE_PATH)
+    parser.add_argument("-j", "--workers", type=int, help="number of processes. default is cpu count")
+
+    args = parser.parse_args()
+
+    paths = list(
+        itertools.chain.from_iterable(
+            [path] if path.endswith(".csv") else get_sorted_csv_paths(path) for path in args.input_path
+        )
+    )
+
+    ingested = ResultStore(args.output_path).ingest(paths, args.workers)
+
+    for path in ingested:
+        print("\t- " + path)
+
+    print(f"ingest {len(ingested)} files into {args.output_path} done!")
@@ -0,0 +1,227 @@
+"""
+コードラベルを (根音, 構成音のビットマスク) の整数コードに変換する語彙
+ラベルの文法は lib/domains/chord.dart の ChordBase.parse に合わせ、1つのラベルは1度だけパースして表に登録する
+配列の変換は重複を除いたラベルだけをパースするので、比較や集計はすべて小さな整数の配列で行える
+
+コードの構成
+    bit0-3  : 根音 (C=0, ..., B=11)
+    bit4-15 : 根音からの半音数ごとの構成音の有無 (bit4は根音なので、コードであれば必ず立つ)
+              mir_evalと同じく、9, 11, 13のテンションは含めない
+    bit16-  : 同じ根音と構成音を持つラベルのうち、何番目に登録された表記か
+    NO_CHORD_CODE (0) は N、PAD_CODE (-1) は空文字列
+    文法に合わないラベルは -2 から順に負のコードを割り当てる
+
+表記(C#とDb、C/EとCなど)もコードに含むので、コードが等しいことはラベルが文字列として等しいことと同じ
+表記の違いを無視して比較する場合は、明示的に to_pitch_classes を通す
+"""
+
+import re
+
+import numpy as np
+
+CODE_DTYPE = np.dtype(np.int32)
+
+NO_CHORD = "N"
+PAD_LABEL = ""
+
+NO_CHORD_CODE = 0
+PAD_CODE = -1
+
+_PITCH_CLASS_BITS = 16
+_PITCH_CLASS_MASK = (1 << _PITCH_CLASS_BITS) - 1
+
+_NATURALS = {"C": 0, "D": 2, "E": 4, "F": 5, "G": 7, "A": 9, "B": 11}
+_ACCIDENTALS = {"": 0, "#": 1, "♯": 1, "b": -1, "♭": -1}
+
+# ChordTypeの構成音。sus2, sus4は3度を置き換える
+_TYPES = {
+    "": (0, 4, 7),
+    "m": (0, 3, 7),
+    "-": (0, 3, 7),
+    "dim": (0, 3, 6),
+    "o": (0, 3, 6),
+    "dim7": (0, 3, 6, 9),
+    "o7": (0, 3, 6, 9),
+    "aug": (0, 4, 8),
+    "+": (0, 4, 8),
+    "m7b5": (0, 3, 6, 10),
+    "m7(♭5)": (0, 3, 6, 10),
+    "ø": (0, 3, 6, 10),
+    "sus2": (0, 2, 7),
+    "sus4": (0, 5, 7),
+}
+
+# ChordTensions.parseと同じく、9, 11, 13は7度を含む
+# mir_evalのビットマップと同じく、オクターブを超えるテンション(9, 11, 13)は構成音に含めない
+# テンションの有無はChordVocabularyが表記として区別する
+_TENSIONS = {
+    "": (),
+    "6": (9,),
+    "7": (10,),
+    "M7": (11,),
+    "9": (10,),
+    "11": (10,),
+    "13": (10,),
+    "M9": (11,),
+    "M11": (11,),
+    "M13": (11,),
+}
+
+_ADDITIONS = {"": (), "add9": (), "add11": (), "add13": ()}
+
+
+def _alternatives(labels: list[str]) -> str:
+    # 長いものから試さないと、m7b5がmと7b5のように分かれてしまう
+    return "|".join(re.escape(label) for label in sorted(labels, key=len, reverse=True) if label)
+
+
+_PATTERN = re.compile(
+    r"^(?P<root>[A-G])(?P<accidental>[#♯b♭]?)"
+    rf"(?P<type>{_alternatives([label for label in _TYPES if not label.startswith('sus')])})?"
+    rf"(?P<tensions>{_alternatives(list(_TENSIONS))})?"
+    r"(?P<sus>sus2|sus4)?"
+    rf"(?P<addition>{_alternatives(list(_ADDITIONS))})?"
+    r"(?P<omit5>\(omit5\))?"
+    r"(?:/.+)?$"
+)
+
+
+def to_mask(intervals: tuple[int, ...] | list[int]) -> int:
+    """
+    根音からの半音数の列を12bitのビットマスクにする
+    """
+    mask = 0
+    for interval in intervals:
+        mask |= 1 << (interval % 12)
+    return mask
+
+
+def to_code(root: int, mask: int, spelling: int = 0) -> int:
+    return (spelling << _PITCH_CLASS_BITS) | (mask << 4) | root
+
+
+def parse(label: str) -> tuple[int, int] | None:
+    """
+    ラベルを (根音, ビットマスク) にする。N は (0, 0)、文法に合わない場合はNone
+    転回形の /ベース音 は構成音に含めない。表記の違いはChordVocabularyがコードの上位bitで区別する
+    """
+    if label == NO_CHORD:
+        return 0, 0
+
+    match = _PATTERN.match(label)
+    if match is None:
+        return None
+
+    root = (_NATURALS[match["root"]] + _ACCIDENTALS[match["accidental"]]) % 12
+
+    # ChordBase.parseと同じく、sus以外の種類が指定されていればそちらを優先する
+    intervals = set(_TYPES[match["type"] or match["sus"] or ""])
+    intervals |= set(_TENSIONS[match["tensions"] or ""])
+    intervals |= set(_ADDITIONS[match["addition"] or ""])
+    if match["omit5"]:
+        intervals.discard(7)
+
+    return root, to_mask(sorted(intervals))
+
+
+class ChordVocabulary:
+    """
+    ラベルとコードの1対1の対応表
+    同じ根音と構成音を持つ異なる表記には、登録された順に異なる上位bitを割り当てる
+    """
+
+    def __init__(self, labels: list[str] | None = None) -> None:
+        """
+        labelsを順に登録する。同じ順に登録すれば、どのプロセスでも同じコードになる
+        """
+        self._codes: dict[str, int] = {PAD_LABEL: PAD_CODE, NO_CHORD: NO_CHORD_CODE}
+        self._labels: dict[int, str] = {PAD_CODE: PAD_LABEL, NO_CHORD_CODE: NO_CHORD}
+        self._spellings: dict[int, int] = {}
+        self._next_unknown_code = PAD_CODE - 1
+
+        for label in labels or []:
+            self.intern(label)
+
+    def __len__(self) -> int:
+        return len(self._labels)
+
+    def intern(self, label: str) -> int:
+        code = self._codes.get(label)
+        if code is not None:
+            return code
+
+        parsed = parse(label)
+        if parsed is None:
+            code = self._next_unknown_code
+            self._next_unknown_code -= 1
+        else:
+            pitch_class = to_code(*parsed)
+            spelling = self._spellings.get(pitch_class, 0)
+            self._spellings[pitch_class] = spelling + 1
+            code = to_code(*parsed, spelling)
+
+        self._codes[label] = code
+        self._labels[code] = label
+
+        return code
+
+    def label(self, code: int) -> str:
+        return self._labels[code]
+
+    def encode(self, labels: np.ndarray | list[str]) -> np.ndarray:
+        """
+        ラベルの配列を同じ形のコードの配列にする。パースするのは重複を除いたラベルだけ
+        """
+        labels = np.asarray(labels, dtype=object)
+        uniques, inverse = np.unique(labels.astype(str), return_inverse=True)
+        codes = np.array([self.intern(str(label)) for label in uniques], dtype=CODE_DTYPE)
+
+        return codes[inverse].reshape(labels.shape)
+
+    def decode(self, codes: np.ndarray | list[int]) -> np.ndarray:
+        """
+        コードの配列を同じ形のラベルの配列(object)にする
+        """
+        codes = np.asarray(codes, dtype=CODE_DTYPE)
+        uniques, inverse = np.unique(codes, return_inverse=True)
+        labels = np.array([self.label(int(code)) for code in uniques], dtype=object)
+
+        return labels[inverse].reshape(codes.shape)
+
+
+VOCABULARY = ChordVocabulary()
+"""
+プロセス内で共有する語彙。表記のbitと文法に合わないラベルのコードは登録順で決まるので、
+コードはプロセスをまたいで受け渡さず、同じプロセスでencodeしたもの同士を比較する
+"""
+
+
+def encode(labels: np.ndarray | list[str]) -> np.ndarray:
+    return VOCABULARY.encode(labels)
+
+
+def decode(codes: np.ndarray | list[int]) -> np.ndarray:
+    return VOCABULARY.decode(codes)
+
+
+def to_pitch_classes(codes: np.ndarray) -> np.ndarray:
+    """
+    表記のbitを落とし、根音と構成音が同じコード(C#とDb、C/EとCなど)を等しくする
+    Nや文法に合わないラベルのコードはそのまま
+    """
+    codes = np.asarray(codes)
+    return np.where(codes > NO_CHORD_CODE, codes & _PITCH_CLASS_MASK, codes)
+
+
+def get_roots(codes: np.ndarray) -> np.ndarray:
+    """
+    根音 (0-11)。Nや文法に合わないラベルは-1
+    """
+    return np.where(codes > NO_CHORD_CODE, codes & 0xF, -1)
+
+
+def get_masks(codes: np.ndarray) -> np.ndarray:
+    """
+    構成音のビットマスク。Nや文法に合わないラベルは0
+    """
+    return np.where(codes > NO_CHORD_CODE, (codes >> 4) & 0xFFF, 0)
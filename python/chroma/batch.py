@@ -0,0 +1,118 @@
+"""
+音声ファイルからクロマを計算し、Table.fromMatrix と同じヘッダなしのCSVとして書き出すスクリプト
+コーパス全体をオフラインで作り直すため、ファイルごとにプロセスプールで並列に計算する
+出力より新しくない音声ファイルは計算しない
+CLIとして扱う想定
+
+ex) python3 python/chroma/batch.py assets/evals/3371780/audio_mono-mic -o test/outputs/HCDF/chroma \
+        normal_distribution_comb_filter__stft_mags --chunk_size 4096 --chunk_stride 2048 --scaling ln -j 8
+
+出力は <output>/<音源名>/<ファイル名>.csv となり、hcdf_sweep.py のクロマとしてそのまま使える
+"""
+
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import librosa
+import numpy as np
+
+sys.path.append(".")
+
+from python.chroma import comb_filter, reassignment  # noqa
+from python.chroma.context import ChromaContext  # noqa
+from python.chroma.stft import STFTContext  # noqa
+from python.const import ChromaCalculator, Scaling, WindowFunction  # noqa
+from python.path_util import get_file_name, get_sorted_audio_paths, get_source_name  # noqa
+
+CALCULATORS = {
+    ChromaCalculator.COMB_FILTER: comb_filter.calculate_chroma,
+    ChromaCalculator.REASSIGN_COMB_FILTER: reassignment.calculate_comb_filter_chroma,
+    ChromaCalculator.ET_SCALE: reassignment.calculate_et_scale_chroma,
+    ChromaCalculator.NON_REASSIGN_ET_SCALE: reassignment.calculate_non_reassign_et_scale_chroma,
+}
+
+
+@dataclass(frozen=True)
+class _Job:
+    audio_path: str
+    output_path: str
+    chroma_calculator: ChromaCalculator
+    stft_context: STFTContext
+    scaling: Scaling
+    chroma_context: ChromaContext
+
+
+def calculate_chroma_from_path(
+    path: str,
+    chroma_calculator: ChromaCalculator,
+    stft_context: STFTContext,
+    scaling: Scaling = Scaling.NONE,
+    chroma_context: ChromaContext = ChromaContext.GUITAR,
+) -> np.ndarray:
+    signal, _ = librosa.load(path, sr=stft_context.sample_rate, mono=True)
+    return CALCULATORS[chroma_calculator](signal, stft_context, scaling, chroma_context)
+
+
+def _run(job: _Job) -> str:
+    chroma = calculate_chroma_from_path(
+        job.audio_path, job.chroma_calculator, job.stft_context, job.scaling, job.chroma_context
+    )
+
+    os.makedirs(os.path.dirname(job.output_path), exist_ok=True)
+    np.savetxt(job.output_path, chroma, delimiter=",", fmt="%.8g")
+
+    return job.output_path
+
+
+def _is_up_to_date(job: _Job) -> bool:
+    return os.path.exists(job.output_path) and os.path.getmtime(job.output_path) >= os.path.getmtime(job.audio_path)
+
+
+def _get_audio_paths(input_path: str) -> list[str]:
+    return [input_path] if input_path.endswith(".wav") else get_sorted_audio_paths(input_path)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Calculate chroma from audio files in parallel")
+    parser.add_argument("input_path", type=str, nargs="+", help="Path to the wav files or directories")
+    parser.add_argument("chroma_calculator", type=ChromaCalculator, choices=list(CALCULATORS))
+    parser.add_argument("-o", "--output_path", type=str, required=True, help="Output directory path")
+    parser.add_argument("--chunk_size", type=int, default=8192)
+    parser.add_argument("--chunk_stride", type=int, default=0)
+    parser.add_argument("--sample_rate", type=int, default=22050)
+    parser.add_argument("--window", type=WindowFunction, choices=list(WindowFunction), default=WindowFunction.HANNING)
+    parser.add_argument("--scaling", type=Scaling, choices=list(Scaling), default=Scaling.NONE)
+    parser.add_argument("--lowest", type=str, default=ChromaContext.GUITAR.lowest, help="Lowest pitch. ex) E2")
+    parser.add_argument("--per_octave", type=int, default=ChromaContext.GUITAR.per_octave)
+    parser.add_argument("--force", action="store_true", help="Recalculate up-to-date outputs")
+    parser.add_argument("-j", "--workers", type=int, help="number of processes. default is cpu count")
+
+    args = parser.parse_args()
+
+    stft_context = STFTContext(args.chunk_size, args.chunk_stride, args.sample_rate, args.window)
+    chroma_context = ChromaContext(args.lowest, args.per_octave)
+
+    jobs = [
+        _Job(
+            audio_path=path,
+            output_path=os.path.join(args.output_path, get_source_name(path), f"{get_file_name(path)}.csv"),
+            chroma_calculator=args.chroma_calculator,
+            stft_context=stft_context,
+            scaling=args.scaling,
+            chroma_context=chroma_context,
+        )
+        for input_path in args.input_path
+        for path in _get_audio_paths(input_path)
+    ]
+    jobs = [job for job in jobs if args.force or not _is_up_to_date(job)]
+
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        for output_path in executor.map(_run, jobs):
+            print(output_path)
+
+
+if __name__ == "__main__":
+    main()
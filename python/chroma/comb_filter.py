@@ -0,0 +1,93 @@
+"""
+CombFilterChromaCalculatorに対応するクロマの計算
+
+各音の周波数を平均、周波数 × hz_std_dev_coefficient を標準偏差とした正規分布を ±3σ の範囲で振幅に掛けて足し合わせる
+(plot/paper/comb_filter.py の図のカーネル)
+この重みは (サンプリング周波数, 窓幅, 音域) で決まるため、(ビン数 × 音の数) の疎行列として一度だけ作ってキャッシュし、
+STFT全体との1回の行列積で全フレームのパワーを求める
+"""
+
+import sys
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+from scipy import sparse
+
+sys.path.append(".")
+
+from python.chroma.context import ChromaContext  # noqa
+from python.chroma.stft import STFTContext, calculate_magnitudes  # noqa
+from python.const import Scaling  # noqa
+
+
+@dataclass(frozen=True)
+class CombFilterContext:
+    hz_std_dev_coefficient: float = 1 / 72
+    kernel_radius_std_dev_multiplier: float = 3
+
+
+def _round(values: np.ndarray) -> np.ndarray:
+    """
+    Dartのround()と同じく0.5は0から遠い方へ丸める
+    """
+    return (np.sign(values) * np.floor(np.abs(values) + 0.5)).astype(int)
+
+
+@lru_cache
+def get_comb_filter_kernel(
+    sample_rate: int,
+    chunk_size: int,
+    chroma_context: ChromaContext = ChromaContext.GUITAR,
+    context: CombFilterContext = CombFilterContext(),
+) -> sparse.csc_array:
+    """
+    (ビン数 × 音の数) の疎行列。ビンの周波数は index * sample_rate / chunk_size
+    再割り当て法で周波数分解能を上げた振幅に使う場合は、chunk_sizeに上書きした窓幅を渡す
+    """
+    bins = chunk_size // 2 + 1
+    means = chroma_context.to_hz_list()
+    std_devs = means * context.hz_std_dev_coefficient
+    radiuses = context.kernel_radius_std_dev_multiplier * std_devs
+
+    starts = np.clip(_round((means - radiuses) * chunk_size / sample_rate), 0, bins)
+    ends = np.clip(_round((means + radiuses) * chunk_size / sample_rate), 0, bins)
+    sizes = ends - starts
+
+    pitch_indices = np.repeat(np.arange(len(means)), sizes)
+    bin_indices = np.repeat(starts - np.cumsum(sizes) + sizes, sizes) + np.arange(sizes.sum())
+
+    frequencies = bin_indices * sample_rate / chunk_size
+    mean, std_dev = means[pitch_indices], std_devs[pitch_indices]
+    weights = np.exp(-0.5 * ((frequencies - mean) / std_dev) ** 2) / (std_dev * np.sqrt(2 * np.pi))
+
+    return sparse.csc_array((weights, (bin_indices, pitch_indices)), shape=(bins, len(means)))
+
+
+def calculate_powers(
+    magnitudes: np.ndarray,
+    sample_rate: int,
+    chunk_size: int,
+    chroma_context: ChromaContext = ChromaContext.GUITAR,
+    context: CombFilterContext = CombFilterContext(),
+) -> np.ndarray:
+    """
+    (フレーム数 × ビン数) の振幅から (フレーム数 × 音の数) のパワーを求める
+    """
+    kernel = get_comb_filter_kernel(sample_rate, chunk_size, chroma_context, context)
+    return np.asarray((kernel.T @ magnitudes.T).T)
+
+
+def calculate_chroma(
+    signal: np.ndarray,
+    stft_context: STFTContext,
+    scaling: Scaling = Scaling.NONE,
+    chroma_context: ChromaContext = ChromaContext.GUITAR,
+    context: CombFilterContext = CombFilterContext(),
+) -> np.ndarray:
+    """
+    (フレーム数 × 12) のクロマ。Dartの normal distribution comb filter, stft mags に対応する
+    """
+    magnitudes = calculate_magnitudes(signal, stft_context, scaling)
+    powers = calculate_powers(magnitudes, stft_context.sample_rate, stft_context.chunk_size, chroma_context, context)
+    return chroma_context.fold(powers)
@@ -0,0 +1,84 @@
+"""
+Dart側のChromaContextと平均律の周波数に対応する
+
+ex) ChromaContext.GUITAR は E2 から4オクターブ分、つまり E2-D#6 の48音を扱う
+"""
+
+import re
+from dataclasses import dataclass
+from typing import ClassVar
+
+import numpy as np
+
+NOTES = ["C", "C#", "D", "D#", "E", "F", "F#", "G", "G#", "A", "A#", "B"]
+
+_PITCH_PATTERN = re.compile(r"^(?P<note>[A-G]#?)(?P<height>-?\d+)$")
+
+HZ_OF_A4 = 440.0
+MIDI_OF_A4 = 69
+
+
+def pitch_to_midi(pitch: str) -> int:
+    """
+    ex) "E2" -> 40, "D#6" -> 87
+    """
+    match = _PITCH_PATTERN.match(pitch)
+    if match is None:
+        raise ValueError(f"Invalid pitch: {pitch}")
+    return (int(match["height"]) + 1) * 12 + NOTES.index(match["note"])
+
+
+def midi_to_pitch(midi: int) -> str:
+    return f"{NOTES[midi % 12]}{midi // 12 - 1}"
+
+
+def midi_to_hz(midi: np.ndarray | int) -> np.ndarray:
+    return HZ_OF_A4 * 2 ** ((np.asarray(midi, dtype=float) - MIDI_OF_A4) / 12)
+
+
+@dataclass(frozen=True)
+class ChromaContext:
+    lowest: str = "E2"
+    per_octave: int = 4
+
+    GUITAR: ClassVar["ChromaContext"]
+    KONOKI: ClassVar["ChromaContext"]
+
+    def __str__(self) -> str:
+        """
+        結果ファイル名の音域(sanitize()後)と同じ形式
+        """
+        return f"{self.lowest}-{self.highest}"
+
+    @property
+    def lowest_midi(self) -> int:
+        return pitch_to_midi(self.lowest)
+
+    @property
+    def highest(self) -> str:
+        return midi_to_pitch(self.lowest_midi + 12 * self.per_octave - 1)
+
+    @property
+    def pitches(self) -> int:
+        return 12 * self.per_octave
+
+    def to_hz_list(self) -> np.ndarray:
+        return midi_to_hz(self.lowest_midi + np.arange(self.pitches))
+
+    def to_equal_temperament_bin(self) -> np.ndarray:
+        """
+        各音の周波数と隣の音の周波数の中点を境界とした (音の数 + 1) 個のビンの端
+        """
+        hz_list = midi_to_hz(self.lowest_midi - 1 + np.arange(self.pitches + 2))
+        return (hz_list[:-1] + hz_list[1:]) / 2
+
+    def fold(self, powers: np.ndarray) -> np.ndarray:
+        """
+        (… × 音の数) を (… × 12) のクロマに折りたたみ、Cが先頭になるように回転する
+        """
+        folded = powers.reshape(*powers.shape[:-1], self.per_octave, 12).sum(axis=-2)
+        return np.roll(folded, self.lowest_midi % 12, axis=-1)
+
+
+ChromaContext.GUITAR = ChromaContext("E2", 4)
+ChromaContext.KONOKI = ChromaContext("E2", 6)
@@ -0,0 +1,162 @@
+"""
+ReassignmentCalculatorと、その結果を使うクロマの計算 (et-scale sparse, sparse mags のコムフィルタ)
+
+窓関数とその微分(時刻の再割り当てでは時刻で重み付けした窓)のSTFTの比から、各ビンの周波数と時刻を再割り当てする
+信号全体のSTFTを一度に計算し、再割り当て後の点をnp.bincountで重み付きヒストグラムにする
+"""
+
+import sys
+from dataclasses import dataclass
+
+import numpy as np
+
+sys.path.append(".")
+
+from python.chroma import comb_filter  # noqa
+from python.chroma.context import ChromaContext  # noqa
+from python.chroma.stft import STFTContext, get_derivative_window, get_window, scale, stft  # noqa
+from python.const import Scaling  # noqa
+
+DEFAULT_OVERRIDE_CHUNK_SIZE = 8192
+
+
+@dataclass
+class ReassignedPoints:
+    """
+    Dart側の (List<Point> points, Magnitudes magnitudes) に対応する
+    magnitudesは (フレーム数 × ビン数) のスケーリング後の振幅
+    """
+
+    times: np.ndarray
+    frequencies: np.ndarray
+    weights: np.ndarray
+    magnitudes: np.ndarray
+
+
+def reassign(
+    signal: np.ndarray,
+    context: STFTContext,
+    scaling: Scaling = Scaling.NONE,
+    is_reassign_time: bool = False,
+    is_reassign_frequency: bool = True,
+    a_min: float = 1e-6,
+) -> ReassignedPoints:
+    """
+    振幅がa_min以上のビンを再割り当てした点を返す。STFTが0のビンは再割り当てしない
+    """
+    window = get_window(context.window_function, context.chunk_size)
+
+    spectrum = stft(signal, context, window)
+    magnitudes = scale(np.abs(spectrum), scaling)
+
+    frame_indices, bin_indices = np.nonzero(magnitudes >= a_min)
+    values = spectrum[frame_indices, bin_indices]
+    is_nonzero = values != 0
+
+    times = frame_indices * context.delta_time
+    frequencies = bin_indices * context.delta_frequency
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        if is_reassign_time:
+            window_t = window * (np.arange(context.chunk_size) - context.chunk_size / 2)
+            ratios = stft(signal, context, window_t)[frame_indices, bin_indices] / values
+            times = np.where(is_nonzero, times + ratios.real / context.sample_rate, times)
+
+        if is_reassign_frequency:
+            window_d = get_derivative_window(context.window_function, context.chunk_size)
+            ratios = stft(signal, context, window_d)[frame_indices, bin_indices] / values
+            frequencies = np.where(
+                is_nonzero, frequencies - ratios.imag * (0.5 * context.sample_rate / np.pi), frequencies
+            )
+
+    return ReassignedPoints(times, frequencies, magnitudes[frame_indices, bin_indices], magnitudes)
+
+
+def histogram2d(points: ReassignedPoints, bin_x: np.ndarray, bin_y: np.ndarray) -> np.ndarray:
+    """
+    WeightedHistogram2dに対応する ((len(bin_x) - 1) × (len(bin_y) - 1)) の重み付きヒストグラム
+    各ビンは左端を含み右端を含まない。範囲外とNaNの点は無視する
+    """
+    xs = np.searchsorted(bin_x, points.times, side="right") - 1
+    ys = np.searchsorted(bin_y, points.frequencies, side="right") - 1
+
+    width, height = len(bin_x) - 1, len(bin_y) - 1
+    valid = (0 <= xs) & (xs < width) & (0 <= ys) & (ys < height)
+
+    counts = np.bincount(xs[valid] * height + ys[valid], weights=points.weights[valid], minlength=width * height)
+    return counts.reshape(width, height)
+
+
+def _get_time_bin(points: ReassignedPoints, context: STFTContext) -> np.ndarray:
+    return np.arange(len(points.magnitudes) + 1) * context.delta_time
+
+
+def calculate_et_scale_chroma(
+    signal: np.ndarray,
+    stft_context: STFTContext,
+    scaling: Scaling = Scaling.NONE,
+    chroma_context: ChromaContext = ChromaContext.GUITAR,
+    is_reassign_frequency: bool = True,
+) -> np.ndarray:
+    """
+    ReassignmentETScaleChromaCalculatorに対応する (フレーム数 × 12) のクロマ
+    """
+    points = reassign(signal, stft_context, scaling, is_reassign_frequency=is_reassign_frequency)
+    powers = histogram2d(points, _get_time_bin(points, stft_context), chroma_context.to_equal_temperament_bin())
+    return chroma_context.fold(powers)
+
+
+def calculate_non_reassign_et_scale_chroma(
+    signal: np.ndarray,
+    stft_context: STFTContext,
+    scaling: Scaling = Scaling.NONE,
+    chroma_context: ChromaContext = ChromaContext.GUITAR,
+) -> np.ndarray:
+    return calculate_et_scale_chroma(signal, stft_context, scaling, chroma_context, is_reassign_frequency=False)
+
+
+def get_override_chunk_size(stft_context: STFTContext, override_chunk_size: int | None) -> int:
+    """
+    MagnitudesFactory.reassignment(useGreaterChunkSize: true) と同じく、窓幅より小さい値は使わない
+    """
+    if override_chunk_size is None or override_chunk_size < stft_context.chunk_size:
+        return stft_context.chunk_size
+    return override_chunk_size
+
+
+def calculate_reassigned_magnitudes(
+    signal: np.ndarray,
+    stft_context: STFTContext,
+    scaling: Scaling = Scaling.NONE,
+    override_chunk_size: int | None = DEFAULT_OVERRIDE_CHUNK_SIZE,
+) -> np.ndarray:
+    """
+    ReassignmentMagnitudesCalculatorに対応する (フレーム数 × (override_chunk_size / 2 + 1)) の振幅
+    再割り当てした周波数を override_chunk_size の窓幅相当の細かいビンに集める
+    """
+    chunk_size = get_override_chunk_size(stft_context, override_chunk_size)
+
+    points = reassign(signal, stft_context, scaling)
+    bin_y = np.arange(chunk_size // 2 + 2) * stft_context.sample_rate / chunk_size
+
+    return histogram2d(points, _get_time_bin(points, stft_context), bin_y)
+
+
+def calculate_comb_filter_chroma(
+    signal: np.ndarray,
+    stft_context: STFTContext,
+    scaling: Scaling = Scaling.NONE,
+    chroma_context: ChromaContext = ChromaContext.GUITAR,
+    override_chunk_size: int | None = DEFAULT_OVERRIDE_CHUNK_SIZE,
+) -> np.ndarray:
+    """
+    normal distribution comb filter, sparse mags に対応する (フレーム数 × 12) のクロマ
+    """
+    magnitudes = calculate_reassigned_magnitudes(signal, stft_context, scaling, override_chunk_size)
+    powers = comb_filter.calculate_powers(
+        magnitudes,
+        stft_context.sample_rate,
+        get_override_chunk_size(stft_context, override_chunk_size),
+        chroma_context,
+    )
+    return chroma_context.fold(powers)
@@ -0,0 +1,141 @@
+"""
+Dart側(fftea)のSTFTと同じフレーム分割・窓関数で、信号全体の短時間フーリエ変換を一度に計算する
+"""
+
+import sys
+from dataclasses import dataclass
+
+import numpy as np
+
+sys.path.append(".")
+
+from python.const import Scaling, WindowFunction  # noqa
+
+
+@dataclass(frozen=True)
+class STFTContext:
+    """
+    EstimatorFactoryContextに対応する。chunk_strideが0の場合はchunk_sizeとして扱う
+    """
+
+    chunk_size: int = 8192
+    chunk_stride: int = 0
+    sample_rate: int = 22050
+    window_function: WindowFunction = WindowFunction.HANNING
+
+    @property
+    def stride(self) -> int:
+        return self.chunk_stride or self.chunk_size
+
+    @property
+    def delta_time(self) -> float:
+        return self.stride / self.sample_rate
+
+    @property
+    def delta_frequency(self) -> float:
+        return self.sample_rate / self.chunk_size
+
+
+def _cosine_sum_window(size: int, *amplitudes: float) -> np.ndarray:
+    """
+    a0 - a1 cos(2πi / (N - 1)) + a2 cos(4πi / (N - 1)) - ... の対称窓
+    """
+    phases = 2 * np.pi * np.arange(size) / (size - 1)
+    return sum((-1) ** k * a * np.cos(k * phases) for k, a in enumerate(amplitudes))
+
+
+def get_window(window_function: WindowFunction, size: int) -> np.ndarray:
+    match window_function:
+        case WindowFunction.HANNING:
+            return _cosine_sum_window(size, 0.5, 0.5)
+        case WindowFunction.HAMMING:
+            return _cosine_sum_window(size, 0.54, 0.46)
+        case WindowFunction.BLACKMAN:
+            return _cosine_sum_window(size, 0.42, 0.5, 0.08)
+        case WindowFunction.BLACKMAN_HARRIS:
+            return _cosine_sum_window(size, 0.35875, 0.48829, 0.14128, 0.01168)
+        case WindowFunction.BARTLETT:
+            return np.bartlett(size)
+        case _:
+            raise NotImplementedError(f"Unknown window function: {window_function}")
+
+
+def _derivative_sine_window(size: int, amplitude: float, scale_coefficient: float = 2) -> np.ndarray:
+    scale = scale_coefficient * np.pi / (size - 1)
+    return amplitude * scale * np.sin(scale * np.arange(size))
+
+
+def get_derivative_window(window_function: WindowFunction, size: int) -> np.ndarray:
+    """
+    再割り当て法で使う窓関数の微分。解析的な式がないものは中心差分(WindowExtension.gradient)で近似する
+    """
+    match window_function:
+        case WindowFunction.HANNING:
+            return _derivative_sine_window(size, 0.5)
+        case WindowFunction.HAMMING:
+            return _derivative_sine_window(size, 0.46)
+        case WindowFunction.BLACKMAN:
+            return _derivative_sine_window(size, 0.5) - _derivative_sine_window(size, 0.08, 4)
+        case WindowFunction.BLACKMAN_HARRIS:
+            return (
+                _derivative_sine_window(size, 0.48829)
+                - _derivative_sine_window(size, 0.14128, 4)
+                + _derivative_sine_window(size, 0.01168, 6)
+            )
+        case _:
+            return np.gradient(get_window(window_function, size))
+
+
+def split_frames(signal: np.ndarray, chunk_size: int, chunk_stride: int, flush: bool = True) -> np.ndarray:
+    """
+    (フレーム数 × chunk_size) のビューを返す
+    STFT.streamと同様に窓に収まる位置まで chunk_stride ずつずらし、
+    flushする場合は残りのサンプルを0で埋めたフレームを1つ加える
+    """
+    stride = chunk_stride or chunk_size
+    count = max((len(signal) - chunk_size) // stride + 1, 0)
+
+    if flush and len(signal) > count * stride:
+        padded = np.zeros(count * stride + chunk_size, dtype=signal.dtype)
+        padded[: len(signal)] = signal
+        signal, count = padded, count + 1
+
+    frames = np.lib.stride_tricks.sliding_window_view(signal, chunk_size)
+    return frames[: count * stride : stride]
+
+
+def stft(signal: np.ndarray, context: STFTContext, window: np.ndarray | None = None, flush: bool = True) -> np.ndarray:
+    """
+    (フレーム数 × (chunk_size / 2 + 1)) の複素スペクトル。共役な後半は捨てる(discardConjugates)
+    windowを指定しない場合はcontextの窓関数を使う
+    """
+    if window is None:
+        window = get_window(context.window_function, context.chunk_size)
+
+    frames = split_frames(np.asarray(signal, dtype=float), context.chunk_size, context.chunk_stride, flush)
+    return np.fft.rfft(frames * window, axis=1)
+
+
+def scale(magnitudes: np.ndarray, scaling: Scaling) -> np.ndarray:
+    """
+    MagnitudeScalarに対応する
+    """
+    match scaling:
+        case Scaling.NONE:
+            return magnitudes
+        case Scaling.LN:
+            return np.log1p(magnitudes)
+        case _:
+            raise NotImplementedError(f"Unknown scaling: {scaling}")
+
+
+def calculate_magnitudes(
+    signal: np.ndarray,
+    context: STFTContext,
+    scaling: Scaling = Scaling.NONE,
+    flush: bool = True,
+) -> np.ndarray:
+    """
+    MagnitudesCalculatorに対応する (フレーム数 × ビン数) の振幅
+    """
+    return scale(np.abs(stft(signal, context, flush=flush)), scaling)
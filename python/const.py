@@ -14,6 +14,20 @@ class Scaling(StrEnum):
     LN = "ln"
 
 
+class Estimator(StrEnum):
+    SEARCH_TREE = "search_tree_0.55_threshold_4_notes"
+    MATCHING = "mean_matching_cosine_similarity_none_template_scaled"
+    MATCHING_4 = "mean_matching_cosine_similarity_harmonic_0.6-4_template_scaled"
+    MATCHING_6 = "mean_matching_cosine_similarity_harmonic_0.6-6_template_scaled"
+
+
+class ChromaCalculator(StrEnum):
+    COMB_FILTER = "normal_distribution_comb_filter__stft_mags"
+    REASSIGN_COMB_FILTER = "normal_distribution_comb_filter__sparse_mags"
+    ET_SCALE = "et-scale_sparse"
+    NON_REASSIGN_ET_SCALE = "et-scale_sparse_non_reassign_frequency"
+
+
 WINDOW_SIZES = [
     1024,
     2048,
@@ -1,5 +1,8 @@
+from abc import ABC, abstractmethod
 from dataclasses import dataclass
+from functools import lru_cache
 
+import numpy as np
 from pydub import AudioSegment
 
 from path_gettable import (
@@ -15,28 +18,121 @@ from python.create_audio.annotation import create_time_annotation_csv_from_durat
 from type import Chord
 
 DEFAULT_INPUT_DIR_PATH = "assets/evals/guitar_dataset"
+DEFAULT_CACHE_SIZE = 128
+
+
+@lru_cache(maxsize=DEFAULT_CACHE_SIZE)
+def _load_preprocessed(path: str, preprocessor: ChordAudioSegmentPreprocess) -> AudioSegment:
+    """
+    デコードと無音除去は同じ音源に対して何度も行わないよう、(パス, 前処理)ごとにキャッシュする
+    AudioSegmentは不変なので、キャッシュしたものをそのまま共有してよい
+    """
+    return preprocessor(AudioSegment.from_file(path))
+
+
+def _to_frames(sound: AudioSegment) -> np.ndarray:
+    """
+    (フレーム数, チャンネル数)の、[-1, 1)に正規化したfloat32の配列
+    """
+    samples = np.frombuffer(sound.raw_data, dtype=np.dtype(sound.array_type))
+    return (samples / np.float32(1 << (8 * sound.sample_width - 1))).astype(np.float32).reshape(-1, sound.channels)
+
+
+class ChordAudioFramesGettable(ABC):
+    @abstractmethod
+    def get_frames(self, chord: Chord) -> tuple[np.ndarray, int]:
+        """
+        (フレーム数, チャンネル数)の、[-1, 1)に正規化したfloat32の配列とサンプリング周波数
+        """
+        pass
 
 
 @dataclass
-class ChordAudioSegmentCreator:
+class ChordAudioSegmentCreator(ChordAudioFramesGettable):
     path_getter: ChordAudioSourcePathGettable
     preprocessor: ChordAudioSegmentPreprocess
 
     def __call__(self, chord: Chord) -> AudioSegment:
-        base = AudioSegment.from_file(self.path_getter(chord))
-        return self.preprocessor(base)
+        return _load_preprocessed(self.path_getter(chord), self.preprocessor)
+
+    def get_frames(self, chord: Chord) -> tuple[np.ndarray, int]:
+        sound = self(chord)
+        return _to_frames(sound), sound.frame_rate
 
 
 @dataclass
 class ChordProgressionAudioCreator:
-    chord_creator: ChordAudioSegmentCreator
+    chord_creator: ChordAudioFramesGettable
+    crossfade: int = 0
+    """
+    次のコードに重ねる前のコードの余韻の長さ[ms]。前のコードは余韻でフェードアウトし、次のコードは同じ長さでフェードインする
+    次のコードの開始時刻は変わらないので、アノテーションはそのまま使える
+    """
+    sample_width: int = 2
+    """
+    出力の1サンプルあたりのバイト数。符号付き整数で書き出すので、2か4のみ対応する
+    (8bitのWAVは符号なし、24bitは対応するdtypeが無いため)
+    """
+
+    def __post_init__(self) -> None:
+        if self.sample_width not in (2, 4):
+            raise ValueError(f"unsupported sample width: {self.sample_width}")
 
     def __call__(self, chords: list[Chord], durations: list[int]) -> AudioSegment:
         """
         durations are list of milliseconds
+        全体の長さの配列を1度だけ確保し、各コードをその位置に書き込む
         """
         assert len(chords) == len(durations)
-        return sum([self.chord_creator(chord)[:duration] for chord, duration in zip(chords, durations)])
+        assert self.crossfade >= 0
+
+        if not chords:
+            return AudioSegment.empty()
+
+        frames, frame_rates = zip(*[self.chord_creator.get_frames(chord) for chord in chords])
+        frame_rate = frame_rates[0]
+        channels = frames[0].shape[1]
+        assert all(rate == frame_rate for rate in frame_rates), "all chord samples must have the same frame rate"
+        assert all(frame.shape[1] == channels for frame in frames), "all chord samples must have the same channels"
+
+        def ms_to_frames(ms: int) -> int:
+            return int(ms * frame_rate / 1000)
+
+        # 音源がdurationより短い場合は、sound[:duration]と同じく音源の長さで詰める
+        lengths = [min(len(frame), ms_to_frames(duration)) for frame, duration in zip(frames, durations)]
+        starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+
+        # 最後のコード以外は、音源が残っている分だけ余韻を次のコードに重ねる。次のコードは余韻と同じ長さでフェードインする
+        fade_length = ms_to_frames(self.crossfade)
+        tails = [
+            min(fade_length, len(frame) - length, next_length)
+            for frame, length, next_length in zip(frames, lengths, [*lengths[1:], 0])
+        ]
+        heads = [0, *tails[:-1]]
+
+        buffer = np.zeros((sum(lengths), channels), dtype=np.float32)
+
+        for frame, start, length, head, tail in zip(frames, starts, lengths, heads, tails):
+            if not head and not tail:
+                buffer[start : start + length] += frame[:length]
+                continue
+
+            chunk = np.array(frame[: length + tail])
+            if head:
+                chunk[:head] *= np.linspace(0, 1, head, endpoint=False, dtype=np.float32)[:, np.newaxis]
+            if tail:
+                chunk[length:] *= np.linspace(1, 0, tail, endpoint=False, dtype=np.float32)[:, np.newaxis]
+            buffer[start : start + length + tail] += chunk
+
+        scale = 1 << (8 * self.sample_width - 1)
+        samples = np.clip(np.round(buffer * scale), -scale, scale - 1).astype(f"<i{self.sample_width}")
+
+        return AudioSegment(
+            data=samples.tobytes(),
+            sample_width=self.sample_width,
+            frame_rate=frame_rate,
+            channels=channels,
+        )
 
     def save(self, chords: list[Chord], durations: list[int], audio_path: str, annotation_path: str) -> None:
         assert audio_path.endswith(".wav") and annotation_path.endswith(".csv")
@@ -62,6 +158,9 @@ if __name__ == "__main__":
 
     # sound = chord_creator(Chord("B", "minor"))
 
+    # sample_bank.pyでbuildしておけば、WAVをデコードせずにメモリマップから読み込める
+    # chord_creator = ChordSampleBank(source_name="EG_1")
+
     progression_creator = ChordProgressionAudioCreator(chord_creator=chord_creator)
 
     progression_creator.save(
@@ -1,12 +1,15 @@
+import argparse
 import os
 
+import corpus_job
 from annotation import (
     create_time_annotation_csv_from_slices,
     get_chord_labels_from_conv,
     map_milliseconds_to_seconds,
 )
+from corpus_job import DEFAULT_MANIFEST_DIR_PATH, CorpusJob
 from pydub import AudioSegment
-from pydub.silence import detect_nonsilent
+from silence import detect_nonsilent
 
 from python.path_util import (
     DIR_PATHS,
@@ -15,27 +18,52 @@ from python.path_util import (
     get_source_name,
 )
 
+MIN_SILENCE_LEN = 100
+SILENCE_THRESH = -40
+
+
+def _create_annotation(job: CorpusJob) -> None:
+    sound = AudioSegment.from_file(job.input_path)
+    ranges = detect_nonsilent(
+        sound,
+        min_silence_len=job.params["min_silence_len"],
+        silence_thresh=job.params["silence_thresh"],
+    )
+
+    create_time_annotation_csv_from_slices(
+        job.params["labels"],
+        map_milliseconds_to_seconds(ranges),
+        output_path=job.output_paths[0],
+    )
+
+
+def _get_jobs(dir_paths: list[str]) -> list[CorpusJob]:
+    return [
+        CorpusJob(
+            input_path=path,
+            output_paths=[os.path.join("assets", "csv", get_source_name(path), f"{get_file_name(path)}.csv")],
+            params={
+                "labels": get_chord_labels_from_conv(index),
+                "min_silence_len": MIN_SILENCE_LEN,
+                "silence_thresh": SILENCE_THRESH,
+            },
+        )
+        for dir_path in dir_paths
+        for index, path in enumerate(get_sorted_audio_paths(dir_path))
+    ]
+
+
 if __name__ == "__main__":
     # migration conv to prop
-    for dir_path in DIR_PATHS:
-        for index, path in enumerate(get_sorted_audio_paths(dir_path)):
-            sound = AudioSegment.from_file(path)
-            ranges = detect_nonsilent(sound, min_silence_len=100, silence_thresh=-40)
-
-            sound_source_name = get_source_name(path)
-            file_name = get_file_name(path)
-
-            output_dir_path = os.path.join(
-                "assets",
-                "csv",
-                sound_source_name,
-            )
-            os.makedirs(output_dir_path, exist_ok=True)
-
-            create_time_annotation_csv_from_slices(
-                get_chord_labels_from_conv(index),
-                map_milliseconds_to_seconds(ranges),
-                output_path=os.path.join(output_dir_path, f"{file_name}.csv"),
-            )
-
-            print("done: " + path)
+    parser = argparse.ArgumentParser(description="Create annotations of the conv sources from nonsilent ranges")
+    corpus_job.add_arguments(parser)
+
+    args = parser.parse_args()
+
+    corpus_job.run(
+        _get_jobs(args.dir_paths or DIR_PATHS),
+        _create_annotation,
+        manifest_path=os.path.join(DEFAULT_MANIFEST_DIR_PATH, "conv_annotation.json"),
+        workers=args.workers,
+        force=args.force,
+    )
@@ -0,0 +1,128 @@
+"""
+コーパスを作るスクリプトで共通して使う、ファイルごとの処理をプロセスプールで並列に実行する仕組み
+処理した入力のハッシュ、パラメータ、出力をマニフェストに記録し、どれも変わっていないファイルは処理しない
+マニフェストは1ファイル終わるごとに書き出すので、途中で止めても終わった分はやり直さない
+"""
+
+import argparse
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Any, Callable
+
+DEFAULT_MANIFEST_DIR_PATH = "assets/.manifests"
+
+
+@dataclass
+class CorpusJob:
+    input_path: str
+    output_paths: list[str]
+    params: dict[str, Any]
+    """
+    処理結果に影響するもの。JSONに変換できる値にする
+    """
+
+
+def _get_hash(path: str) -> str:
+    sha1 = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            sha1.update(block)
+    return sha1.hexdigest()
+
+
+def _get_entry(job: CorpusJob, digest: str) -> dict[str, Any]:
+    stat = os.stat(job.input_path)
+    return {
+        "hash": digest,
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "params": job.params,
+        "outputs": job.output_paths,
+    }
+
+
+def _is_up_to_date(job: CorpusJob, entry: dict[str, Any] | None) -> bool:
+    if entry is None:
+        return False
+
+    if entry["params"] != job.params or entry["outputs"] != job.output_paths:
+        return False
+
+    if not all(os.path.exists(path) for path in job.output_paths):
+        return False
+
+    # 更新時刻とサイズが同じなら中身も同じとみなし、ハッシュの計算を省く
+    stat = os.stat(job.input_path)
+    if entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+        return True
+
+    return entry["hash"] == _get_hash(job.input_path)
+
+
+def _load_manifest(path: str) -> dict[str, dict[str, Any]]:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _save_manifest(manifest: dict[str, dict[str, Any]], path: str) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    os.replace(temp_path, path)
+
+
+def _run(process: Callable[[CorpusJob], None], job: CorpusJob) -> dict[str, Any]:
+    # 処理中に入力が書き換えられても次回やり直すよう、処理の前にハッシュを取る
+    digest = _get_hash(job.input_path)
+    for output_path in job.output_paths:
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    process(job)
+    return _get_entry(job, digest)
+
+
+def run(
+    jobs: list[CorpusJob],
+    process: Callable[[CorpusJob], None],
+    manifest_path: str,
+    workers: int | None = None,
+    force: bool = False,
+) -> None:
+    """
+    processはプロセス間で受け渡すので、モジュールの最上位で定義した関数にする
+    失敗したファイルがあっても他のファイルの処理と記録は続け、最後にまとめて例外を送出する
+    """
+    manifest = _load_manifest(manifest_path)
+    pending = [job for job in jobs if force or not _is_up_to_date(job, manifest.get(job.input_path))]
+
+    print(f"{len(jobs) - len(pending)} up to date, {len(pending)} to process")
+
+    failed: list[str] = []
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(_run, process, job): job for job in pending}
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                manifest[job.input_path] = future.result()
+            except Exception as e:
+                failed.append(job.input_path)
+                print(f"failed: {job.input_path}: {e!r}")
+                continue
+
+            _save_manifest(manifest, manifest_path)
+            print("done: " + job.input_path)
+
+    if failed:
+        raise RuntimeError(f"{len(failed)} of {len(pending)} files failed: {failed}")
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("dir_paths", type=str, nargs="*", help="Directories of the wav files. default is DIR_PATHS")
+    parser.add_argument("--force", action="store_true", help="Process files recorded as up to date")
+    parser.add_argument("-j", "--workers", type=int, help="number of processes. default is cpu count")
@@ -1,11 +1,28 @@
+"""
+GuitarSetのJAMSファイルからコードのアノテーションCSVを作るスクリプト
+JAMSは1ファイルにつき1度だけ読み、全ての語彙のCSVをまとめて書き出す。ファイルごとにプロセスプールで並列に処理する
+orjsonがあればJSONの読み込みに使う
+
+ex) python3 python/create_audio/guitar_set_annotation.py -j 8
+"""
+
+import argparse
 import json
 import os
 from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from typing import Any, Literal
 
 from annotation import create_time_annotation_csv_from_slices
 
+try:
+    import orjson
+
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
 from python.path_util import get_file_name, get_sorted_audio_paths, get_source_name
 
 _FileType = Literal["comp", "solo"]
@@ -120,10 +137,29 @@ class ComplexGuitarSetAnnotator(GuitarSetAnnotator):
         raise NotImplementedError()
 
 
+def read_chord_annotations(annotation_path: str) -> dict[int, list[_ObjectLike]]:
+    """
+    JAMSファイルの、namespaceがchordの全てのアノテーションを添字ごとに返す
+    属性でアクセスできるようにするのはコードの観測だけにして、他の大量のオブジェクトは普通のdictのままにする
+    """
+    with open(annotation_path, "rb") as f:
+        obj = _loads(f.read())
+
+    return {
+        index: [_ObjectLike(observation) for observation in annotation["data"]]
+        for index, annotation in enumerate(obj["annotations"])
+        if annotation["namespace"] == "chord"
+    }
+
+
 @dataclass
 class GuitarSetAnnotationCreator:
     chord_annotation_index: int
     annotator: GuitarSetAnnotator
+    suffix: str = ""
+    """
+    出力先のディレクトリ名につける。複数の語彙を同時に書き出すときに区別する
+    """
 
     @staticmethod
     def get_annotation_path_from_audio_path(output_path: str, file_type: _FileType) -> str:
@@ -139,39 +175,61 @@ class GuitarSetAnnotationCreator:
             f"{file_name}.jams",
         )
 
+    def get_output_path(self, audio_path: str) -> str:
+        source_name = get_source_name(audio_path) + self.suffix
+        file_name = get_file_name(audio_path)
+
+        return os.path.join("assets", "csv", source_name, f"{file_name}.csv")
+
     def create(self, audio_path: str) -> None:
         assert "comp" in audio_path
 
         annotation_path = self.get_annotation_path_from_audio_path(audio_path, "comp")
+        self.write(audio_path, read_chord_annotations(annotation_path))
 
-        source_name = get_source_name(audio_path)
-        file_name = get_file_name(audio_path)
-        output_dir_path = os.path.join(
-            "assets",
-            "csv",
-            source_name,
-        )
-        os.makedirs(output_dir_path, exist_ok=True)
-        output_path = os.path.join(output_dir_path, f"{file_name}.csv")
+    def write(self, audio_path: str, chord_annotations: dict[int, list[_ObjectLike]]) -> None:
+        output_path = self.get_output_path(audio_path)
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+
+        data = chord_annotations[self.chord_annotation_index]
+        # print(data)  # コードのリスト
+
+        labels = list(map(self.annotator.get_chord_label, data))
+        slices = list(map(self.annotator.get_slice, data))
 
-        with open(annotation_path) as f:
-            obj = json.load(f, object_hook=_ObjectLike)
+        create_time_annotation_csv_from_slices(labels, slices, output_path)
 
-            data = obj.annotations[self.chord_annotation_index].data
-            # print(data)  # コードのリスト
 
-            labels = list(map(self.annotator.get_chord_label, data))
-            slices = list(map(self.annotator.get_slice, data))
+CREATORS = [
+    GuitarSetAnnotationCreator(_CHORD_ANNOTATION_SIMPLE_INDEX, SimpleGuitarSetAnnotator(), suffix="_simple"),
+    GuitarSetAnnotationCreator(_CHORD_ANNOTATION_COMPLEX_INDEX, LooseComplexGuitarSetAnnotator()),
+]
 
-            create_time_annotation_csv_from_slices(labels, slices, output_path)
+
+def create_all(audio_path: str, creators: list[GuitarSetAnnotationCreator] = CREATORS) -> str:
+    """
+    JAMSファイルを1度だけ読み、全ての語彙のCSVを書き出す
+    """
+    assert "comp" in audio_path
+
+    annotation_path = GuitarSetAnnotationCreator.get_annotation_path_from_audio_path(audio_path, "comp")
+    chord_annotations = read_chord_annotations(annotation_path)
+
+    for creator in creators:
+        creator.write(audio_path, chord_annotations)
+
+    return audio_path
 
 
 if __name__ == "__main__":
-    audio_mono_mic_dir_path = "assets/evals/3371780/audio_mono-mic"
+    parser = argparse.ArgumentParser(description="Create chord annotation csv of GuitarSet comp files")
+    parser.add_argument("--dir_path", type=str, default="assets/evals/3371780/audio_mono-mic")
+    parser.add_argument("-j", "--workers", type=int, help="number of processes. default is cpu count")
+
+    args = parser.parse_args()
 
-    for path in get_sorted_audio_paths(audio_mono_mic_dir_path):
-        if "comp" not in path:
-            continue
+    paths = [path for path in get_sorted_audio_paths(args.dir_path) if "comp" in path]
 
-        # GuitarSetAnnotationCreator(_CHORD_ANNOTATION_SIMPLE_INDEX, SimpleGuitarSetAnnotator()).create(path)
-        GuitarSetAnnotationCreator(_CHORD_ANNOTATION_COMPLEX_INDEX, LooseComplexGuitarSetAnnotator()).create(path)
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        for path in executor.map(create_all, paths, chunksize=8):
+            print("done: " + path)
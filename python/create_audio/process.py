@@ -1,7 +1,8 @@
 from abc import ABC, abstractmethod
+from dataclasses import dataclass
 
 from pydub import AudioSegment
-from pydub.silence import split_on_silence
+from silence import split_on_silence
 
 
 class ChordAudioSegmentPreprocess(ABC):
@@ -10,6 +11,8 @@ class ChordAudioSegmentPreprocess(ABC):
         pass
 
 
+# 前処理済みの音源をキャッシュするときのキーになるので、同じ設定のものは等しくハッシュ可能にしておく
+@dataclass(frozen=True)
 class TanakaMLabChordAudioSegmentPreprocessor(ChordAudioSegmentPreprocess):
     def __call__(self, sound: AudioSegment) -> AudioSegment:
         sound = sound.set_channels(1)
@@ -21,6 +24,7 @@ class TanakaMLabChordAudioSegmentPreprocessor(ChordAudioSegmentPreprocess):
         return sum(chunks)
 
 
+@dataclass(frozen=True)
 class TanakaMLabLastOneChordAudioSegmentPreprocessor(ChordAudioSegmentPreprocess):
     def __call__(self, sound: AudioSegment) -> AudioSegment:
         sound = sound.set_channels(1)
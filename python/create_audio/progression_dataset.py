@@ -0,0 +1,198 @@
+"""
+JSONの仕様からコード進行の音源とアノテーションCSVの組を大量に合成するスクリプト
+各進行は通し番号とシードだけから決まるので、並列数や分割(--shard)を変えても同じデータセットになる
+書き出し済みの組は飛ばすので、途中で止めても同じコマンドで再開できる
+
+ex) python3 python/create_audio/progression_dataset.py spec.json --shard 0/4 -j 8
+
+仕様の例
+{
+    "source_name": "EG_1",
+    "bank": true,
+    "crossfade": 30,
+    "progressions": [
+        {"name": "Am-F-G-CM7", "chords": ["Am", "F", "G", "CM7"], "durations": [1000, 1600, 1000, 2600]}
+    ],
+    "random": {
+        "count": 10000,
+        "seed": 0,
+        "length": {"min": 4, "max": 8},
+        "durations": {"type": "uniform", "min": 500, "max": 2500},
+        "roots": ["C", "D", "E", "F", "G", "A", "B"],
+        "types": ["major", "minor", "seventh"]
+    }
+}
+durations は {"type": "choice", "values": [1000, 2000], "weights": [0.7, 0.3]} も指定できる
+"""
+
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+
+sys.path.append(".")
+
+from chord_progression_creator import (  # noqa
+    DEFAULT_INPUT_DIR_PATH,
+    ChordAudioFramesGettable,
+    ChordAudioSegmentCreator,
+    ChordProgressionAudioCreator,
+)
+from path_gettable import TanakaMLabChordAudioSourcePathGetter  # noqa
+from process import TanakaMLabChordAudioSegmentPreprocessor  # noqa
+from sample_bank import DEFAULT_BANK_DIR_PATH, ChordSampleBank  # noqa
+from type import CHORD_TYPES, ROOTS, Chord  # noqa
+
+from python.create_audio.annotation import create_time_annotation_csv_from_durations  # noqa
+
+_progression_creator: ChordProgressionAudioCreator | None = None
+
+
+@dataclass(frozen=True)
+class _Job:
+    name: str
+    chords: tuple[str, ...]
+    durations: tuple[int, ...]
+    audio_path: str
+    annotation_path: str
+
+    def is_done(self) -> bool:
+        return os.path.exists(self.audio_path) and os.path.exists(self.annotation_path)
+
+
+def _sample_durations(spec: dict[str, Any], rng: np.random.Generator, size: int) -> list[int]:
+    match spec["type"]:
+        case "uniform":
+            return rng.integers(spec["min"], spec["max"], size=size, endpoint=True).tolist()
+        case "choice":
+            weights = spec.get("weights")
+            if weights is not None:
+                weights = np.asarray(weights, dtype=float) / np.sum(weights)
+            return rng.choice(spec["values"], size=size, p=weights).tolist()
+        case name:
+            raise NotImplementedError(name)
+
+
+def _sample_progression(spec: dict[str, Any], index: int) -> tuple[list[str], list[int]]:
+    """
+    index番目の進行。(seed, index)から乱数を作るので、他の進行を作ったかどうかに依存しない
+    """
+    rng = np.random.default_rng([spec.get("seed", 0), index])
+
+    length = int(rng.integers(spec["length"]["min"], spec["length"]["max"], endpoint=True))
+    roots = rng.choice(spec.get("roots", ROOTS), size=length)
+    types = rng.choice(spec.get("types", CHORD_TYPES), size=length)
+
+    chords = [str(Chord(root, chord_type)) for root, chord_type in zip(roots, types)]  # type: ignore
+    return chords, _sample_durations(spec["durations"], rng, length)
+
+
+def _get_jobs(spec: dict[str, Any], audio_dir_path: str, annotation_dir_path: str) -> list[_Job]:
+    progressions = [
+        (progression.get("name", f"progression_{i:06d}"), progression["chords"], progression["durations"])
+        for i, progression in enumerate(spec.get("progressions", []))
+    ]
+
+    if "random" in spec:
+        progressions += [
+            (f"random_{i:06d}", *_sample_progression(spec["random"], i)) for i in range(spec["random"]["count"])
+        ]
+
+    return [
+        _Job(
+            name=name,
+            chords=tuple(chords),
+            durations=tuple(durations),
+            audio_path=os.path.join(audio_dir_path, f"{name}.wav"),
+            annotation_path=os.path.join(annotation_dir_path, f"{name}.csv"),
+        )
+        for name, chords, durations in progressions
+    ]
+
+
+def _get_chord_creator(spec: dict[str, Any]) -> ChordAudioFramesGettable:
+    if spec.get("bank", False):
+        return ChordSampleBank(
+            source_name=spec["source_name"],
+            bank_dir_path=spec.get("bank_dir", DEFAULT_BANK_DIR_PATH),
+        )
+
+    return ChordAudioSegmentCreator(
+        path_getter=TanakaMLabChordAudioSourcePathGetter(
+            dir_path=spec.get("dir", DEFAULT_INPUT_DIR_PATH),
+            source_name=spec["source_name"],
+        ),
+        preprocessor=TanakaMLabChordAudioSegmentPreprocessor(),
+    )
+
+
+def _init_worker(spec: dict[str, Any]) -> None:
+    """
+    音源の読み込み(とキャッシュ)はワーカーごとに1度だけ行う
+    """
+    global _progression_creator
+    _progression_creator = ChordProgressionAudioCreator(
+        chord_creator=_get_chord_creator(spec),
+        crossfade=spec.get("crossfade", 0),
+    )
+
+
+def _run(job: _Job) -> str:
+    assert _progression_creator is not None
+
+    chords = [Chord.parse(label) for label in job.chords]
+    sound = _progression_creator(chords, list(job.durations))
+
+    # 書きかけのファイルを再開時に完成したものとみなさないよう、一時ファイルから置き換える
+    # 音源を最後に置くので、音源があればアノテーションもある
+    annotation_temp_path = f"{job.annotation_path}.{os.getpid()}.tmp"
+    create_time_annotation_csv_from_durations(list(job.chords), list(job.durations), annotation_temp_path)
+    os.replace(annotation_temp_path, job.annotation_path)
+
+    audio_temp_path = f"{job.audio_path}.{os.getpid()}.tmp"
+    sound.export(audio_temp_path, format="wav")
+    os.replace(audio_temp_path, job.audio_path)
+
+    return job.audio_path
+
+
+def _parse_shard(shard: str) -> tuple[int, int]:
+    index, count = map(int, shard.split("/"))
+    assert 0 <= index < count, f"invalid shard: {shard}"
+    return index, count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Synthesize chord progression audio and annotations in parallel")
+    parser.add_argument("spec_path", type=str, help="Path to the dataset spec json")
+    parser.add_argument("--audio_output", type=str, help="Output directory of wav", default="assets/evals/synthetic")
+    parser.add_argument("--annotation_output", type=str, help="Output directory of csv", default="assets/csv/synthetic")
+    parser.add_argument("--shard", type=str, help="Generate only the k-th of n shards. ex) 0/4", default="0/1")
+    parser.add_argument("--force", action="store_true", help="Regenerate existing outputs")
+    parser.add_argument("-j", "--workers", type=int, help="number of processes. default is cpu count")
+
+    args = parser.parse_args()
+
+    with open(args.spec_path) as f:
+        spec = json.load(f)
+
+    shard_index, shard_count = _parse_shard(args.shard)
+
+    jobs = _get_jobs(spec, args.audio_output, args.annotation_output)[shard_index::shard_count]
+    jobs = [job for job in jobs if args.force or not job.is_done()]
+
+    os.makedirs(args.audio_output, exist_ok=True)
+    os.makedirs(args.annotation_output, exist_ok=True)
+
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker, initargs=(spec,)) as executor:
+        for audio_path in executor.map(_run, jobs, chunksize=16):
+            print("done: " + audio_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,17 @@
+import argparse
 import os
 
+import corpus_job
 from annotation import (
     create_time_annotation_csv_from_slices,
     get_chord_labels_from_conv,
     map_milliseconds_to_seconds,
 )
+from corpus_job import DEFAULT_MANIFEST_DIR_PATH, CorpusJob
 from pydub import AudioSegment
 
 # from pydub.playback import play
-from pydub.silence import detect_nonsilent
+from silence import detect_nonsilent, remove_silence_from_wav
 
 from python.path_util import (
     DIR_PATHS,
@@ -17,12 +20,26 @@ from python.path_util import (
     get_source_name,
 )
 
+MIN_SILENCE_LEN = 100
+SILENCE_THRESH = -40
 
-def __create_nonsilent_audio(file_path: str) -> tuple[AudioSegment, list[tuple[int, int]]]:
+
+def __create_nonsilent_audio(
+    file_path: str,
+    min_silence_len: int = MIN_SILENCE_LEN,
+    silence_thresh: float = SILENCE_THRESH,
+) -> tuple[AudioSegment, list[tuple[int, int]]]:
     sound = AudioSegment.from_file(file_path)
-    slices = detect_nonsilent(sound, min_silence_len=100, silence_thresh=-40)
+    slices = detect_nonsilent(sound, min_silence_len=min_silence_len, silence_thresh=silence_thresh)
     nonsilent_sound = sum([sound[slice[0] : slice[1]] for slice in slices])
 
+    return nonsilent_sound, __remap_slices(slices)
+
+
+def __remap_slices(slices: list[list[int]]) -> list[tuple[int, int]]:
+    """
+    元の音声での無音でない区間を、無音を削除した音声での区間に直す
+    """
     nonsilent_slices = []
     seek = 0
     for slice in slices:
@@ -30,41 +47,77 @@ def __create_nonsilent_audio(file_path: str) -> tuple[AudioSegment, list[tuple[i
         seek = nonsilent_duration[1] + 1
         nonsilent_slices.append(nonsilent_duration)
 
-    return nonsilent_sound, nonsilent_slices
+    return nonsilent_slices
 
 
-if __name__ == "__main__":
-    """
-    無音部分を削除した音声を作成する
-    """
-    for dir_path in DIR_PATHS:
-        for index, path in enumerate(get_sorted_audio_paths(dir_path)):
-            sound, slices = __create_nonsilent_audio(path)
+def _remove_silence(job: CorpusJob) -> None:
+    audio_output_path, annotation_output_path = job.output_paths
+
+    if job.params["streaming"]:
+        # WAVを少しずつ読みながら書き出すので、長い録音でもメモリは一定
+        slices = __remap_slices(
+            remove_silence_from_wav(
+                job.input_path,
+                audio_output_path,
+                min_silence_len=job.params["min_silence_len"],
+                silence_thresh=job.params["silence_thresh"],
+            )
+        )
+    else:
+        sound, slices = __create_nonsilent_audio(
+            job.input_path,
+            min_silence_len=job.params["min_silence_len"],
+            silence_thresh=job.params["silence_thresh"],
+        )
+        sound.export(audio_output_path, format="wav")
+
+    create_time_annotation_csv_from_slices(
+        job.params["labels"],
+        map_milliseconds_to_seconds(slices),
+        output_path=annotation_output_path,
+    )
+
 
+def _get_jobs(dir_paths: list[str], streaming: bool = False) -> list[CorpusJob]:
+    jobs = []
+    for dir_path in dir_paths:
+        for index, path in enumerate(get_sorted_audio_paths(dir_path)):
             sound_source_name = get_source_name(path) + "_nonsilent"
             file_name = get_file_name(path)
 
-            output_dir_path = os.path.join(
-                "assets",
-                "evals",
-                sound_source_name,
+            jobs.append(
+                CorpusJob(
+                    input_path=path,
+                    output_paths=[
+                        os.path.join("assets", "evals", sound_source_name, f"{file_name}.wav"),
+                        os.path.join("assets", "csv", sound_source_name, f"{file_name}.csv"),
+                    ],
+                    params={
+                        "labels": get_chord_labels_from_conv(index),
+                        "min_silence_len": MIN_SILENCE_LEN,
+                        "silence_thresh": SILENCE_THRESH,
+                        "streaming": streaming,
+                    },
+                )
             )
-            os.makedirs(output_dir_path, exist_ok=True)
 
-            sound.export(os.path.join(output_dir_path, f"{file_name}.wav"), format="wav")
+    return jobs
 
-            # annotation
-            annotation_output_dir_path = os.path.join(
-                "assets",
-                "csv",
-                sound_source_name,
-            )
-            os.makedirs(annotation_output_dir_path, exist_ok=True)
 
-            create_time_annotation_csv_from_slices(
-                get_chord_labels_from_conv(index),
-                map_milliseconds_to_seconds(slices),
-                output_path=os.path.join(annotation_output_dir_path, f"{file_name}.csv"),
-            )
+if __name__ == "__main__":
+    """
+    無音部分を削除した音声を作成する
+    """
+    parser = argparse.ArgumentParser(description="Create audio without silence and its annotation")
+    corpus_job.add_arguments(parser)
+    parser.add_argument("--streaming", action="store_true", help="Process wav files block by block in constant memory")
+
+    args = parser.parse_args()
 
-            print("done: " + path)
+    corpus_job.run(
+        _get_jobs(args.dir_paths or DIR_PATHS, streaming=args.streaming),
+        _remove_silence,
+        manifest_path=os.path.join(DEFAULT_MANIFEST_DIR_PATH, "remove_silence.json"),
+        workers=args.workers,
+        force=args.force,
+    )
@@ -0,0 +1,129 @@
+"""
+TanakaMLabのコード音源を前処理して1つのfloat32の配列にまとめ、メモリマップで読み込むサンプルバンク
+一度buildしておけば、合成のたびにWAVをデコードしたり無音を除去したりせず、配列のスライスをコピーなしで取り出せる
+
+ex) python3 python/create_audio/sample_bank.py EG_1 EG_2
+"""
+
+import argparse
+import json
+import os
+from dataclasses import dataclass, field
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+from chord_progression_creator import (
+    DEFAULT_INPUT_DIR_PATH,
+    ChordAudioFramesGettable,
+    ChordAudioSegmentCreator,
+)
+from path_gettable import TanakaMLabChordAudioSourcePathGetter
+from process import ChordAudioSegmentPreprocess, TanakaMLabChordAudioSegmentPreprocessor
+from type import CHORD_TYPES, ROOTS, Chord
+
+DEFAULT_BANK_DIR_PATH = "assets/evals/guitar_dataset/.bank"
+
+SAMPLES_FILE_NAME = "samples.npy"
+INDEX_FILE_NAME = "index.json"
+
+
+def build(
+    source_name: str,
+    dir_path: str = DEFAULT_INPUT_DIR_PATH,
+    bank_dir_path: str = DEFAULT_BANK_DIR_PATH,
+    preprocessor: ChordAudioSegmentPreprocess = TanakaMLabChordAudioSegmentPreprocessor(),
+) -> str:
+    """
+    音源の全てのコードを前処理し、bank_dir_path/source_name に配列と索引を書き出す。書き出したディレクトリを返す
+    存在しないWAVは飛ばす
+    """
+    path_getter = TanakaMLabChordAudioSourcePathGetter(dir_path=dir_path, source_name=source_name)
+    creator = ChordAudioSegmentCreator(path_getter=path_getter, preprocessor=preprocessor)
+
+    chords = [
+        Chord(root, chord_type)  # type: ignore
+        for chord_type in CHORD_TYPES
+        for root in ROOTS
+        if os.path.exists(path_getter(Chord(root, chord_type)))  # type: ignore
+    ]
+    assert chords, f"no samples found for {source_name}"
+
+    frames, frame_rates = zip(*[creator.get_frames(chord) for chord in chords])
+    assert len(set(frame_rates)) == 1, "all chord samples must have the same frame rate"
+    assert len({frame.shape[1] for frame in frames}) == 1, "all chord samples must have the same channels"
+
+    output_dir_path = os.path.join(bank_dir_path, source_name)
+    os.makedirs(output_dir_path, exist_ok=True)
+
+    lengths = [len(frame) for frame in frames]
+    offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]]).tolist()
+
+    samples = open_memmap(
+        os.path.join(output_dir_path, SAMPLES_FILE_NAME),
+        mode="w+",
+        dtype=np.float32,
+        shape=(sum(lengths), frames[0].shape[1]),
+    )
+    for frame, offset, length in zip(frames, offsets, lengths):
+        samples[offset : offset + length] = frame
+    samples.flush()
+    del samples
+
+    index = {
+        "frame_rate": frame_rates[0],
+        "chords": [
+            {"root": chord.root, "type": chord.type, "offset": offset, "length": length}
+            for chord, offset, length in zip(chords, offsets, lengths)
+        ],
+    }
+    with open(os.path.join(output_dir_path, INDEX_FILE_NAME), "w") as f:
+        json.dump(index, f, indent=2)
+
+    return output_dir_path
+
+
+@dataclass
+class ChordSampleBank(ChordAudioFramesGettable):
+    """
+    buildで書き出したサンプルバンク。ChordAudioSegmentCreatorの代わりにChordProgressionAudioCreatorに渡せる
+    """
+
+    source_name: str
+    bank_dir_path: str = DEFAULT_BANK_DIR_PATH
+    _samples: np.ndarray = field(init=False, repr=False)
+    _frame_rate: int = field(init=False, repr=False)
+    _index: dict[tuple[str, str], tuple[int, int]] = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        dir_path = os.path.join(self.bank_dir_path, self.source_name)
+
+        self._samples = np.load(os.path.join(dir_path, SAMPLES_FILE_NAME), mmap_mode="r")
+
+        with open(os.path.join(dir_path, INDEX_FILE_NAME)) as f:
+            index = json.load(f)
+
+        self._frame_rate = index["frame_rate"]
+        self._index = {
+            (chord["root"], chord["type"]): (chord["offset"], chord["length"]) for chord in index["chords"]
+        }
+
+    def get_frames(self, chord: Chord) -> tuple[np.ndarray, int]:
+        """
+        メモリマップのスライスなので、コピーもファイルのデコードもしない
+        """
+        offset, length = self._index[(chord.root, chord.type)]
+        return self._samples[offset : offset + length], self._frame_rate
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build memory-mapped chord sample banks")
+    parser.add_argument("source_names", type=str, nargs="+", help="Source names under the input directory")
+    parser.add_argument("--input", type=str, help="Input directory", default=DEFAULT_INPUT_DIR_PATH)
+    parser.add_argument("--output", type=str, help="Bank directory", default=DEFAULT_BANK_DIR_PATH)
+
+    args = parser.parse_args()
+
+    for source_name in args.source_names:
+        path = build(source_name, dir_path=args.input, bank_dir_path=args.output)
+        print("done: " + path)
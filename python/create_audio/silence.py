@@ -0,0 +1,443 @@
+"""
+pydub.silence の detect_silence, detect_nonsilent, split_on_silence と同じ結果を返す、NumPyで書き直した無音検出
+pydubは1msずらすごとに窓のRMSを計算し直すが、ここでは2乗の累積和から全ての窓のRMSを一度に求める
+引数と戻り値はpydubと同じなので、importを置き換えるだけで使える
+"""
+
+import itertools
+import wave
+
+import numpy as np
+from pydub import AudioSegment
+
+
+def _get_squares(samples: np.ndarray) -> np.ndarray:
+    """
+    (フレーム数, チャンネル数)の整数の配列の、フレームごとの全チャンネルの2乗和
+    16bitまでは整数のまま正確に足すが、32bitは2乗がint64に収まらないので、audioopと同じく浮動小数点数で足す
+    """
+    dtype = np.int64 if samples.dtype.itemsize <= 2 else np.float64
+    return (samples.astype(dtype) ** 2).sum(axis=1)
+
+
+def _to_square_cumsum(sound: AudioSegment) -> np.ndarray:
+    """
+    フレームごとの全チャンネルの2乗和の累積和。先頭に0を置くので、[a, b)フレームの2乗和は cumsum[b] - cumsum[a]
+    """
+    samples = np.frombuffer(sound.raw_data, dtype=np.dtype(sound.array_type)).reshape(-1, sound.channels)
+    squares = _get_squares(samples)
+    return np.concatenate([np.zeros(1, dtype=squares.dtype), np.cumsum(squares)])
+
+
+def _get_window_rms(
+    square_cumsum: np.ndarray,
+    channels: int,
+    frame_rate: int,
+    starts: np.ndarray,
+    window_length: int,
+    base: int = 0,
+) -> np.ndarray:
+    """
+    startsの各時刻[ms]から window_length[ms] の窓のRMS。pydubのスライスと同じくフレームの位置は切り捨てで求め、
+    audioop.rmsと同じく整数に切り捨てる。square_cumsumの先頭がbase番目のフレームにあたる
+    """
+    frames_per_ms = frame_rate / 1000.0
+    start_frames = (starts * frames_per_ms).astype(np.int64) - base
+    end_frames = ((starts + window_length) * frames_per_ms).astype(np.int64) - base
+
+    # 音源の末尾を越えた分は、pydubが無音で埋めるのと同じく0として数える
+    last_frame = len(square_cumsum) - 1
+    sums = square_cumsum[np.minimum(end_frames, last_frame)] - square_cumsum[np.minimum(start_frames, last_frame)]
+    counts = (end_frames - start_frames) * channels
+
+    means = np.divide(sums, counts, out=np.zeros(len(sums)), where=counts > 0)
+    return np.floor(np.sqrt(means))
+
+
+def detect_silence_from_square_cumsum(
+    square_cumsum: np.ndarray,
+    channels: int,
+    frame_rate: int,
+    max_possible_amplitude: float,
+    min_silence_len: int = 1000,
+    silence_thresh: float = -16,
+    seek_step: int = 1,
+) -> list[list[int]]:
+    """
+    detect_silence の本体。AudioSegmentを作らずにフレームの2乗の累積和から無音区間[ms]を求める
+    """
+    frame_count = len(square_cumsum) - 1
+    seg_len = round(1000 * frame_count / frame_rate)
+
+    if seg_len < min_silence_len:
+        return []
+
+    threshold = 10 ** (silence_thresh / 20) * max_possible_amplitude
+
+    last_slice_start = seg_len - min_silence_len
+    starts = np.arange(0, last_slice_start + 1, seek_step)
+    if last_slice_start % seek_step:
+        starts = np.append(starts, last_slice_start)
+
+    rms = _get_window_rms(square_cumsum, channels, frame_rate, starts, min_silence_len)
+    silence_starts = starts[rms <= threshold]
+
+    if len(silence_starts) == 0:
+        return []
+
+    # 連続した無音の窓をまとめる。pydubと同じく、次の窓との間がmin_silence_lenを越えたときだけ区切る
+    steps = np.diff(silence_starts)
+    breaks = np.flatnonzero((steps != seek_step) & (steps > min_silence_len))
+
+    range_starts = silence_starts[np.concatenate([[0], breaks + 1])]
+    range_ends = silence_starts[np.concatenate([breaks, [len(silence_starts) - 1]])] + min_silence_len
+
+    return [[int(start), int(end)] for start, end in zip(range_starts, range_ends)]
+
+
+def invert_silent_ranges(silent_ranges: list[list[int]], seg_len: int) -> list[list[int]]:
+    """
+    無音区間から、pydubの detect_nonsilent と同じ規則で無音でない区間を求める
+    """
+    if not silent_ranges:
+        return [[0, seg_len]]
+
+    if silent_ranges[0][0] == 0 and silent_ranges[0][1] == seg_len:
+        return []
+
+    nonsilent_ranges = []
+    prev_end = 0
+    for start, end in silent_ranges:
+        nonsilent_ranges.append([prev_end, start])
+        prev_end = end
+
+    if silent_ranges[-1][1] != seg_len:
+        nonsilent_ranges.append([prev_end, seg_len])
+
+    if nonsilent_ranges[0] == [0, 0]:
+        nonsilent_ranges.pop(0)
+
+    return nonsilent_ranges
+
+
+def detect_silence(
+    audio_segment: AudioSegment,
+    min_silence_len: int = 1000,
+    silence_thresh: float = -16,
+    seek_step: int = 1,
+) -> list[list[int]]:
+    return detect_silence_from_square_cumsum(
+        _to_square_cumsum(audio_segment),
+        audio_segment.channels,
+        audio_segment.frame_rate,
+        audio_segment.max_possible_amplitude,
+        min_silence_len,
+        silence_thresh,
+        seek_step,
+    )
+
+
+def detect_nonsilent(
+    audio_segment: AudioSegment,
+    min_silence_len: int = 1000,
+    silence_thresh: float = -16,
+    seek_step: int = 1,
+) -> list[list[int]]:
+    silent_ranges = detect_silence(audio_segment, min_silence_len, silence_thresh, seek_step)
+    return invert_silent_ranges(silent_ranges, len(audio_segment))
+
+
+def split_on_silence(
+    audio_segment: AudioSegment,
+    min_silence_len: int = 1000,
+    silence_thresh: float = -16,
+    keep_silence: int | bool = 100,
+    seek_step: int = 1,
+) -> list[AudioSegment]:
+    if isinstance(keep_silence, bool):
+        keep_silence = len(audio_segment) if keep_silence else 0
+
+    output_ranges = [
+        [start - keep_silence, end + keep_silence]
+        for start, end in detect_nonsilent(audio_segment, min_silence_len, silence_thresh, seek_step)
+    ]
+
+    # 残した無音が重なる場合は、その中点で分ける
+    for range_i, range_ii in itertools.pairwise(output_ranges):
+        last_end = range_i[1]
+        next_start = range_ii[0]
+        if next_start < last_end:
+            range_i[1] = (last_end + next_start) // 2
+            range_ii[0] = range_i[1]
+
+    return [audio_segment[max(start, 0) : min(end, len(audio_segment))] for start, end in output_ranges]
+
+
+def _get_frame(ms: float, frame_rate: int) -> int:
+    """
+    pydubのスライスと同じく、時刻[ms]のフレームの位置を切り捨てで求める
+    """
+    return int(ms * (frame_rate / 1000.0))
+
+
+class StreamingSilenceRemover:
+    """
+    ブロックごとに渡したフレームから、無音でない部分のフレームを順に返す
+    返したフレームを全てつなげたものは、detect_nonsilent の区間を順につなげたものと同じになる
+    ある時刻が無音かどうかはその時刻から始まる窓までを調べれば決まるので、保持するのはmin_silence_lenとブロック程度のフレームだけ
+    """
+
+    def __init__(
+        self,
+        frame_count: int,
+        frame_rate: int,
+        channels: int,
+        max_possible_amplitude: float,
+        min_silence_len: int = 1000,
+        silence_thresh: float = -16,
+        seek_step: int = 1,
+    ) -> None:
+        self.frame_count = frame_count
+        self.frame_rate = frame_rate
+        self.channels = channels
+        self.min_silence_len = min_silence_len
+        self.seek_step = seek_step
+        self.threshold = 10 ** (silence_thresh / 20) * max_possible_amplitude
+
+        self.seg_len = round(1000 * frame_count / frame_rate)
+        self.last_slice_start = self.seg_len - min_silence_len
+
+        self.silent_ranges: list[list[int]] = []
+        """
+        detect_silence の戻り値と同じもの。finishの後に全て揃う
+        """
+
+        # 保持しているフレームと、その2乗和の累積和。先頭はbase番目のフレーム
+        self._base = 0
+        self._buffer = np.zeros((0, channels), dtype=np.int64)
+        self._square_cumsum = np.zeros(1, dtype=np.int64)
+
+        # まだ調べていない最初の窓の開始時刻[ms]と、ここより前の時刻は返し終わったという位置[ms]
+        self._next_start = 0 if self.last_slice_start >= 0 else self.seg_len + 1
+        self._emitted = 0
+        # silent_rangesのうち、まだ返していない時刻にかかるかもしれない最初のもの
+        self._range_index = 0
+        # 最後に無音だった窓の開始時刻。seek_stepずつ続いた無音の窓は、間が空いていてもpydubでは同じ区間になる
+        self._last_silence_start = -self.seek_step - 1
+
+    @property
+    def nonsilent_ranges(self) -> list[list[int]]:
+        """
+        detect_nonsilent の戻り値と同じもの。finishの後に全て揃う
+        """
+        return invert_silent_ranges(self.silent_ranges, self.seg_len)
+
+    def _get_available_frame(self) -> int:
+        return self._base + len(self._buffer)
+
+    def _get_starts(self, is_end: bool) -> np.ndarray:
+        """
+        まだ調べていない窓の開始時刻のうち、窓の終わりまでフレームが揃っているもの
+        """
+        stop = self.last_slice_start
+        if not is_end:
+            available_ms = self._get_available_frame() * 1000 // self.frame_rate
+            stop = min(stop, available_ms - self.min_silence_len)
+
+        if self._next_start > stop:
+            return np.zeros(0, dtype=np.int64)
+
+        starts = np.arange(self._next_start, stop + 1, self.seek_step)
+        if stop == self.last_slice_start and (self.last_slice_start - self._next_start) % self.seek_step:
+            starts = np.append(starts, self.last_slice_start)
+
+        if not is_end:
+            end_frames = ((starts + self.min_silence_len) * (self.frame_rate / 1000.0)).astype(np.int64)
+            starts = starts[end_frames <= self._get_available_frame()]
+
+        return starts
+
+    def _add_silence(self, start: int) -> None:
+        """
+        pydubと同じく、前の無音区間の終わりまでに始まる無音の窓は同じ区間にまとめる
+        """
+        end = start + self.min_silence_len
+        continuous = start == self._last_silence_start + self.seek_step
+
+        if self.silent_ranges and (continuous or start <= self.silent_ranges[-1][1]):
+            self.silent_ranges[-1][1] = end
+        else:
+            self.silent_ranges.append([start, end])
+
+        self._last_silence_start = start
+
+    def _get_frames(self, start: int, end: int) -> np.ndarray:
+        """
+        [start, end)[ms]のフレーム。音源の末尾を越えた分はpydubと同じく無音で埋める
+        """
+        start_frame = _get_frame(start, self.frame_rate) - self._base
+        end_frame = _get_frame(end, self.frame_rate) - self._base
+        frames = self._buffer[start_frame:end_frame]
+
+        missing = end_frame - start_frame - len(frames)
+        if missing > 0:
+            frames = np.concatenate([frames, np.zeros((missing, self.channels), dtype=frames.dtype)])
+
+        return frames
+
+    def _pop_nonsilent_frames(self, decided: int) -> np.ndarray:
+        """
+        まだ返していない時刻からdecided[ms]までのうち、無音区間に含まれない部分のフレーム
+        """
+        chunks = []
+        position = self._emitted
+
+        for start, end in self.silent_ranges[self._range_index :]:
+            if start >= decided:
+                break
+            if position < start:
+                chunks.append(self._get_frames(position, start))
+            position = max(position, end)
+
+        if position < decided:
+            chunks.append(self._get_frames(position, decided))
+
+        # 最後の無音区間は後の窓で延びるかもしれないので残しておく
+        self._emitted = max(self._emitted, decided)
+        ranges = self.silent_ranges
+        while self._range_index < len(ranges) - 1 and ranges[self._range_index][1] <= self._emitted:
+            self._range_index += 1
+
+        if not chunks:
+            return np.zeros((0, self.channels), dtype=self._buffer.dtype)
+        return np.concatenate(chunks)
+
+    def _drop_frames(self) -> None:
+        """
+        次の窓にも、まだ返していない時刻にも使わないフレームを捨てる
+        """
+        keep = _get_frame(min(self._next_start, self._emitted), self.frame_rate)
+        drop = min(keep - self._base, len(self._buffer))
+        if drop > 0:
+            self._buffer = self._buffer[drop:]
+            self._square_cumsum = self._square_cumsum[drop:] - self._square_cumsum[drop]
+            self._base += drop
+
+    def _process(self, is_end: bool) -> np.ndarray:
+        starts = self._get_starts(is_end)
+
+        if len(starts):
+            rms = _get_window_rms(
+                self._square_cumsum,
+                self.channels,
+                self.frame_rate,
+                starts,
+                self.min_silence_len,
+                base=self._base,
+            )
+            for start in starts[rms <= self.threshold]:
+                self._add_silence(int(start))
+
+            last = int(starts[-1])
+            if last >= self.last_slice_start:
+                self._next_start = self.seg_len + 1
+            else:
+                self._next_start = min(last + self.seek_step, self.last_slice_start)
+
+        # まだ調べていない窓は_next_start以降の時刻しか覆わないので、それより前は無音かどうか決まっている
+        # ただし直前の窓が無音だった場合、次の窓も無音なら間も無音区間になるので、直前の無音区間の終わりまでしか決まらない
+        decided = min(self._next_start, self.seg_len)
+        if self._last_silence_start + self.seek_step == self._next_start:
+            decided = min(decided, self.silent_ranges[-1][1])
+        if not is_end:
+            available_ms = self._get_available_frame() * 1000 // self.frame_rate
+            while available_ms > 0 and _get_frame(available_ms, self.frame_rate) > self._get_available_frame():
+                available_ms -= 1
+            decided = min(decided, available_ms)
+
+        frames = self._pop_nonsilent_frames(decided)
+        self._drop_frames()
+
+        return frames
+
+    def feed(self, samples: np.ndarray) -> np.ndarray:
+        """
+        samplesは(フレーム数, チャンネル数)の整数の配列。返すのも同じ形の、無音でない部分のフレーム
+        """
+        squares = _get_squares(samples)
+        samples = samples.astype(np.int64)
+
+        self._buffer = np.concatenate([self._buffer, samples])
+        self._square_cumsum = np.concatenate([self._square_cumsum, self._square_cumsum[-1] + np.cumsum(squares)])
+
+        return self._process(is_end=False)
+
+    def finish(self) -> np.ndarray:
+        """
+        全てのフレームを渡した後に呼び、残りの無音でない部分のフレームを返す
+        """
+        return self._process(is_end=True)
+
+
+DEFAULT_BLOCK_SIZE = 1 << 16
+
+
+def _decode_frames(data: bytes, sample_width: int, channels: int) -> np.ndarray:
+    """
+    WAVのフレームを(フレーム数, チャンネル数)の整数の配列にする。24bitはpydubと同じく32bitに広げる
+    """
+    match sample_width:
+        case 2 | 4:
+            samples = np.frombuffer(data, dtype=f"<i{sample_width}")
+        case 3:
+            samples = np.frombuffer(data, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+            samples = (samples[:, 0] << 8 | samples[:, 1] << 16 | samples[:, 2] << 24).astype(np.int32)
+        case _:
+            raise ValueError(f"unsupported sample width: {sample_width}")
+
+    return samples.reshape(-1, channels)
+
+
+def _encode_frames(frames: np.ndarray, sample_width: int) -> bytes:
+    if sample_width == 3:
+        samples = (frames.reshape(-1) >> 8).astype("<i4").view(np.uint8).reshape(-1, 4)
+        return samples[:, :3].tobytes()
+
+    return frames.astype(f"<i{sample_width}").tobytes()
+
+
+def remove_silence_from_wav(
+    input_path: str,
+    output_path: str,
+    min_silence_len: int = 1000,
+    silence_thresh: float = -16,
+    seek_step: int = 1,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+) -> list[list[int]]:
+    """
+    WAVをblock_sizeフレームずつ読み、無音でない部分だけをそのまま別のWAVに書き出す。ファイルの長さによらずメモリは一定
+    書き出す音声は detect_nonsilent の区間をつなげたものと同じで、その区間を返す
+    """
+    with wave.open(input_path, "rb") as reader, wave.open(output_path, "wb") as writer:
+        channels = reader.getnchannels()
+        sample_width = reader.getsampwidth()
+
+        writer.setnchannels(channels)
+        writer.setsampwidth(sample_width)
+        writer.setframerate(reader.getframerate())
+
+        remover = StreamingSilenceRemover(
+            frame_count=reader.getnframes(),
+            frame_rate=reader.getframerate(),
+            channels=channels,
+            max_possible_amplitude=1 << (8 * (4 if sample_width == 3 else sample_width) - 1),
+            min_silence_len=min_silence_len,
+            silence_thresh=silence_thresh,
+            seek_step=seek_step,
+        )
+
+        while data := reader.readframes(block_size):
+            writer.writeframes(_encode_frames(remover.feed(_decode_frames(data, sample_width, channels)), sample_width))
+        writer.writeframes(_encode_frames(remover.finish(), sample_width))
+
+    return remover.nonsilent_ranges
@@ -1,7 +1,7 @@
 from path_gettable import TanakaMLabChordAudioSourcePathGetter
 from pydub import AudioSegment
 from pydub.playback import play
-from pydub.silence import split_on_silence
+from silence import split_on_silence
 from type import Chord
 
 from python.create_audio.chord_progression_creator import DEFAULT_INPUT_DIR_PATH
@@ -1,12 +1,27 @@
 from dataclasses import dataclass
 from typing import Literal
 
+ROOTS = ["C", "C#", "D", "D#", "E", "F", "F#", "G", "G#", "A", "A#", "B"]
+CHORD_TYPES = ["major", "major_seventh", "minor", "minor_seventh", "seventh"]
+
 
 @dataclass
 class Chord:
     root: Literal["C", "C#", "D", "D#", "E", "F", "F#", "G", "G#", "A", "A#", "B"]
     type: str
 
+    @classmethod
+    def parse(cls, label: str) -> "Chord":
+        """
+        str(chord)の逆。ex) Am -> Chord("A", "minor")
+        """
+        root = label[:2] if label[1:2] == "#" else label[:1]
+        for chord_type in CHORD_TYPES:
+            chord = cls(root, chord_type)  # type: ignore
+            if str(chord) == label:
+                return chord
+        raise ValueError(f"unknown chord label: {label}")
+
     def __str__(self) -> str:
         return self.root + self.__get_type_name()
 
@@ -39,3 +39,15 @@ def get_sorted_csv_paths(dir_path: str) -> list[str]:
     """
     paths = glob.glob(f"{dir_path}/*.csv")
     return natsort.natsorted(paths)
+
+
+def get_paired_csv_paths(reference_dir_path: str, estimated_dir_path: str) -> list[tuple[str, str]]:
+    """
+    正解のディレクトリのcsvと、推定のディレクトリにある同じ名前のcsvの組を名前の順で返す関数
+    推定側に存在しないものは除く
+    """
+    pairs = [
+        (path, os.path.join(estimated_dir_path, os.path.basename(path)))
+        for path in get_sorted_csv_paths(reference_dir_path)
+    ]
+    return [pair for pair in pairs if os.path.exists(pair[1])]
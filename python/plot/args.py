@@ -1,11 +1,16 @@
-from argparse import Namespace
+"""
+各プロットのスクリプトで共通のオプションの処理
+matplotlibの読み込みは重いため、実際に描画する関数の中で行う
+"""
 
-import matplotlib.pyplot as plt
+from argparse import Namespace
 
 # import ncsp_rcParams  # noqa
 
 
 def set_x_limit(args: Namespace) -> None:
+    import matplotlib.pyplot as plt
+
     if args.x_min is not None and args.x_max is not None:
         plt.xlim(args.x_min, args.x_max)
     elif args.x_min is not None:
@@ -15,6 +20,8 @@ def set_x_limit(args: Namespace) -> None:
 
 
 def set_y_limit(args: Namespace) -> None:
+    import matplotlib.pyplot as plt
+
     if args.y_min is not None and args.y_max is not None:
         plt.ylim(args.y_min, args.y_max)
     elif args.y_min is not None:
@@ -24,16 +31,22 @@ def set_y_limit(args: Namespace) -> None:
 
 
 def set_x_label(args: Namespace) -> None:
+    import matplotlib.pyplot as plt
+
     if args.x_label is not None:
         plt.xlabel(args.x_label)
 
 
 def set_y_label(args: Namespace) -> None:
+    import matplotlib.pyplot as plt
+
     if args.y_label is not None:
         plt.ylabel(args.x_label)
 
 
 def output(args: Namespace, as_suptitle: bool = False) -> None:
+    import matplotlib.pyplot as plt
+
     title = args.title
     if title:
         if as_suptitle:
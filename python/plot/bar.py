@@ -2,8 +2,6 @@ import argparse
 import sys
 from enum import StrEnum
 
-import matplotlib.pyplot as plt
-import ncsp_rcParams  # noqa
 from args import output, set_y_limit
 
 sys.path.append(".")
@@ -18,26 +16,30 @@ class XLabelType(StrEnum):
     NONE = "none"
 
 
-def __get_x_labels(x_label_type: XLabelType) -> list[str]:
+def __get_x_labels(x_label_type: XLabelType, length: int) -> list[str]:
     match x_label_type:
         case XLabelType.NORMAL | XLabelType.NONE:
-            return list(map(str, range(len(args.values))))
+            return list(map(str, range(length)))
         case XLabelType.PCP:
             return CHROMAS
         case XLabelType.PITCH:
             offset = 4  # E2 offset
-            return [f"{CHROMAS[i % 12]}{i // 12 + 2}" for i in range(offset, len(args.values) + offset)]
+            return [f"{CHROMAS[i % 12]}{i // 12 + 2}" for i in range(offset, length + offset)]
 
     raise NotImplementedError("unexpected x label type")
 
 
 def __set_figure_size(x_label_type: XLabelType) -> None:
+    import matplotlib.pyplot as plt
+
     if x_label_type == XLabelType.PITCH:
         plt.figure(figsize=(16, 6))
         plt.subplots_adjust(left=0.05, right=0.95)
 
 
 def __set_params(x_label_type: XLabelType) -> None:
+    import matplotlib.pyplot as plt
+
     if x_label_type == XLabelType.NONE:
         plt.tick_params(labelbottom=False, bottom=False)
     elif x_label_type == XLabelType.PCP:
@@ -45,8 +47,7 @@ def __set_params(x_label_type: XLabelType) -> None:
         plt.ylabel("Power")
 
 
-if __name__ == "__main__":
-    parser = argparse.ArgumentParser()
+def add_arguments(parser: argparse.ArgumentParser) -> None:
     parser.add_argument("values", type=float, nargs="+", help="List of values")
     parser.add_argument("--title", type=str, help="Title for the plot")
     parser.add_argument("--output", type=str, help="Output file path")
@@ -59,17 +60,29 @@ if __name__ == "__main__":
         default=XLabelType.NORMAL,
         help="Specify the label type",
     )
-    args = parser.parse_args()
+
+
+def plot(args: argparse.Namespace) -> None:
+    import matplotlib.pyplot as plt
+    import ncsp_rcParams
+
+    plt.rcParams.update(ncsp_rcParams.RC_PARAMS)
 
     x_label_type = args.x_label_type
 
     __set_figure_size(x_label_type)
 
-    # plt.bar(__get_x_labels(x_label_type), args.values, color="tab:red")
-    plt.bar(__get_x_labels(x_label_type), args.values)
+    # plt.bar(__get_x_labels(x_label_type, len(args.values)), args.values, color="tab:red")
+    plt.bar(__get_x_labels(x_label_type, len(args.values)), args.values)
 
     __set_params(x_label_type)
 
     set_y_limit(args)
 
     output(args)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    add_arguments(parser)
+    plot(parser.parse_args())
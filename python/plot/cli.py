@@ -0,0 +1,126 @@
+"""
+python/plot 以下のスクリプトを1つのプロセスから呼び出すためのエントリポイント
+matplotlibやlibrosaの読み込みは各サブコマンドの描画時まで遅延するため、引数の解析だけなら軽量に動く
+batchサブコマンドでジョブファイルを渡すと、1つのプロセスで複数の図を続けて描画できる
+
+ex) python3 python/plot/cli.py spec test/outputs/spec.csv 22050 4096 2048 --output spec.pdf
+    python3 python/plot/cli.py batch jobs.txt
+
+ジョブファイルは1行に1つ、サブコマンド以降の引数をシェルと同じ書式で書く。空行と#から始まる行は無視する
+
+    spec test/outputs/spec.csv 22050 4096 2048 --output "spec G.pdf"
+    hcdf correct.csv predict.csv --output hcdf.pdf
+"""
+
+import argparse
+import importlib
+import os
+import shlex
+import sys
+import traceback
+from typing import Iterable
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# サブコマンド名とモジュール名。各モジュールは add_arguments(parser) と plot(args) を持つ
+COMMANDS = ["bar", "hcdf", "hist2d", "line", "scatter", "spec"]
+
+
+def __add_command(subparsers: argparse._SubParsersAction, name: str) -> None:
+    module = importlib.import_module(name)
+
+    parser = subparsers.add_parser(name, help=f"python/plot/{name}.py")
+    module.add_arguments(parser)
+    parser.set_defaults(run=module.plot)
+
+
+def __add_batch_command(subparsers: argparse._SubParsersAction) -> None:
+    parser = subparsers.add_parser("batch", help="Render every job in the job file in this process")
+    parser.add_argument("job_file", type=str, help="Path to the job file. '-' reads from stdin")
+    parser.add_argument("--fail_fast", action="store_true", help="Stop at the first failed job")
+    parser.set_defaults(run=None)
+
+
+def create_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Render figures with the scripts in python/plot")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    for name in COMMANDS:
+        __add_command(subparsers, name)
+    __add_batch_command(subparsers)
+
+    return parser
+
+
+def run(args: argparse.Namespace) -> None:
+    """
+    1つの図を描画する。rcParamsや開いている図は次の図に持ち越さない
+    """
+    import matplotlib.pyplot as plt
+
+    try:
+        with plt.rc_context():
+            args.run(args)
+    finally:
+        plt.close("all")
+
+
+def read_jobs(lines: Iterable[str]) -> list[tuple[int, list[str]]]:
+    jobs = []
+    for line_number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if line and not line.startswith("#"):
+            jobs.append((line_number, shlex.split(line)))
+    return jobs
+
+
+def run_batch(
+    parser: argparse.ArgumentParser,
+    jobs: list[tuple[int, list[str]]],
+    fail_fast: bool = False,
+) -> int:
+    """
+    ジョブを順に描画し、失敗したジョブの数を返す
+    失敗したジョブは行番号とともにstderrに出力し、fail_fastでなければ次のジョブに進む
+    """
+    failures = 0
+
+    for line_number, argv in jobs:
+        try:
+            args = parser.parse_args(argv)
+            if args.run is None:
+                raise ValueError("batch can not be nested")
+            run(args)
+        except (Exception, SystemExit):
+            failures += 1
+            print(f"line {line_number}: {shlex.join(argv)}", file=sys.stderr)
+            traceback.print_exc()
+            if fail_fast:
+                break
+
+    return failures
+
+
+def main() -> None:
+    parser = create_parser()
+    args = parser.parse_args()
+
+    if args.command != "batch":
+        run(args)
+        return
+
+    if args.job_file == "-":
+        jobs = read_jobs(sys.stdin)
+    else:
+        with open(args.job_file) as f:
+            jobs = read_jobs(f)
+
+    failures = run_batch(parser, jobs, args.fail_fast)
+    print(f"{len(jobs) - failures}/{len(jobs)} jobs succeeded")
+
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,52 @@
+"""
+正解と推定のコード進行を帯で比較する図を描画するスクリプト
+correct_pathとpredict_pathにディレクトリを渡すと、同じ名前のCSVの組をプロセスプールで並列に描画する
+
+ex) python3 python/plot/hcdf.py assets/csv/audio_mono-mic test/outputs/HCDF/predicts \
+        --chromas_path test/outputs/HCDF/chroma/audio_mono-mic --sample_rate 22050 --win_length 4096 --hop_length 2048 \
+        --output test/outputs/plots/HCDF -j 8
+
+ディレクトリの場合、--outputは出力先のディレクトリとなり、入力より新しい図は描画し直さない
+"""
+
+from __future__ import annotations
+
 import argparse
 import hashlib
-
-import librosa
-import matplotlib.pyplot as plt
-import pandas as pd
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+import numpy as np
 from args import output
-from matplotlib.axes import Axes
-from matplotlib.collections import BrokenBarHCollection
-from matplotlib.colors import Colormap
+
+sys.path.append(".")
+
+from python.path_util import get_file_name, get_paired_csv_paths  # noqa
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from matplotlib.axes import Axes
+    from matplotlib.collections import BrokenBarHCollection
+    from matplotlib.colors import Colormap
+    from matplotlib.figure import Figure
 
 __BAR_HEIGHT = 3
 __FIG_SIZE = (16, 8)
 __FIG_HALF_SIZE = (16, 4)
 __BAR_INTERVAL = __BAR_HEIGHT + 2
 
+# 並列に描画する際、ワーカーごとに図を使い回す。キーはクロマグラムを含むかどうか
+__figures: dict[bool, Figure] = {}
+
 
+@lru_cache(maxsize=None)
 def __str_to_color(string: str, cmap: Colormap | None = None) -> tuple[float, float, float, float]:
+    import matplotlib.pyplot as plt
+
     hashed = hashlib.sha256(string.encode()).hexdigest()
     cm = cmap or plt.get_cmap("coolwarm")
 
@@ -24,102 +55,234 @@ def __str_to_color(string: str, cmap: Colormap | None = None) -> tuple[float, fl
     return cm(level)
 
 
+def __get_colors(labels: np.ndarray) -> np.ndarray:
+    """
+    ラベルの語彙ごとに一度だけ色を求め、(区間数 × RGBA) の配列に展開する
+    """
+    vocabulary, indices = np.unique(labels.astype(str), return_inverse=True)
+    table = np.array([__str_to_color(label) for label in vocabulary]).reshape(-1, 4)
+    return table[indices]
+
+
 def __plt_chromagram(chromas_path: str, sample_rate: int, win_length: int, hop_length: int, ax: Axes) -> None:
-    data = pd.read_csv(chromas_path, header=None)
+    import librosa.display
+    from matrix_cache import load_matrix
+
+    data = load_matrix(chromas_path)
 
     librosa.display.specshow(
-        data.to_numpy().T,
+        data.T,
         x_axis="time",
         y_axis="chroma",
         sr=sample_rate,
         win_length=win_length,
-        hop_length=hop_length if args.hop_length != 0 else args.win_length,
+        hop_length=hop_length if hop_length != 0 else win_length,
         cmap="magma",
         ax=ax,
     )
 
 
-def __plt_bar(df: pd.DataFrame, y_range: tuple[int, int], ax: Axes | None = None) -> BrokenBarHCollection:
+def __plt_bar(df: pd.DataFrame, y_range: tuple[int, int], ax: Axes) -> BrokenBarHCollection:
+    from segment_labels import SegmentLabels
+
     if len(df.columns) != 3:
         raise ValueError("The CSV file must contain 3 columns: label, start, end")
 
     label_data = df["label"].to_numpy()
-    start_data = df["start"].to_numpy()
-    end_data = df["end"].to_numpy()
-
-    x_ranges = [(start, end - start) for start, end in zip(start_data, end_data)]
-
-    ax = ax or plt.gca()
+    start_data = df["start"].to_numpy(dtype=float)
+    end_data = df["end"].to_numpy(dtype=float)
 
     collection = ax.broken_barh(
-        x_ranges,
+        np.column_stack([start_data, end_data - start_data]),
         y_range,
-        facecolor=[__str_to_color(label) for label in label_data],
+        facecolor=__get_colors(label_data),
     )
 
-    for i, (start, width) in enumerate(x_ranges):
-        x = start + width / 2
-        y = y_range[0] + y_range[1] / 2
-        plt.text(x, y, label_data[i], ha="center", va="center")
+    # 区間ごとにTextを作らず、表示範囲に収まるラベルだけを描画時に選ぶ
+    ax.add_artist(SegmentLabels(start_data, end_data, label_data, y=y_range[0] + y_range[1] / 2))
 
     return collection
 
 
-def __plt_bars(correct_df: pd.DataFrame, predict_df: pd.DataFrame, ax: Axes | None = None) -> None:
+def __plt_bars(correct_df: pd.DataFrame, predict_df: pd.DataFrame, ax: Axes) -> None:
     __plt_bar(correct_df, (__BAR_INTERVAL, __BAR_HEIGHT), ax=ax)
     __plt_bar(predict_df, (0, __BAR_HEIGHT), ax=ax)
 
-    plt.yticks(
+    ax.set_yticks(
         [0 + __BAR_HEIGHT / 2, __BAR_INTERVAL + __BAR_HEIGHT / 2],
         labels=["predict", "correct"],
     )
 
 
-parser = argparse.ArgumentParser()
-parser.add_argument("correct_path", type=str, help="Path to the CSV file")
-parser.add_argument("predict_path", type=str, help="Path to the CSV file")
-parser.add_argument("--chromas_path", type=str, help="Path to the input data file (CSV format)")
-parser.add_argument("--sample_rate", type=int, help="Sample rate for the data")
-parser.add_argument("--win_length", type=int, help="Window size for stft")
-parser.add_argument("--hop_length", type=int, help="Stride length for stft")
-parser.add_argument("--title", type=str, help="Title for the plot")
-parser.add_argument("--output", type=str, help="Output file path")
-args = parser.parse_args()
+@dataclass(frozen=True)
+class _Job:
+    correct_path: str
+    predict_path: str
+    chromas_path: str | None
+    sample_rate: int | None
+    win_length: int | None
+    hop_length: int | None
+    title: str | None = None
+    output: str | None = None
 
+    @property
+    def inputs(self) -> list[str]:
+        return [path for path in [self.correct_path, self.predict_path, self.chromas_path] if path]
 
-correct_df = pd.read_csv(args.correct_path)
-predict_df = pd.read_csv(args.predict_path)
+    def is_up_to_date(self) -> bool:
+        if self.output is None or not os.path.exists(self.output):
+            return False
+        return os.path.getmtime(self.output) >= max(os.path.getmtime(path) for path in self.inputs)
 
-as_suptitle = False
 
-if args.chromas_path:
-    if args.sample_rate is None or args.win_length is None or args.hop_length is None:
-        raise ValueError("If set chromas path, you need sample rate, win length and hop length")
+def __draw(fig: Figure, job: _Job) -> bool:
+    """
+    figに正解と推定の帯(とクロマグラム)を描画する。タイトルをsuptitleとすべきかを返す
+    """
+    import pandas as pd
 
-    plt.figure(figsize=__FIG_SIZE)
+    correct_df = pd.read_csv(job.correct_path)
+    predict_df = pd.read_csv(job.predict_path)
 
-    ax_top = plt.subplot(2, 1, 1)
-    ax_bottom = plt.subplot(2, 1, 2)
+    if job.chromas_path:
+        if job.sample_rate is None or job.win_length is None or job.hop_length is None:
+            raise ValueError("If set chromas path, you need sample rate, win length and hop length")
 
-    __plt_chromagram(
-        args.chromas_path,
-        args.sample_rate,
-        args.win_length,
-        args.hop_length,
-        ax=ax_top,
-    )
+        ax_top = fig.add_subplot(2, 1, 1)
+        ax_bottom = fig.add_subplot(2, 1, 2)
+
+        __plt_chromagram(job.chromas_path, job.sample_rate, job.win_length, job.hop_length, ax=ax_top)
+        __plt_bars(correct_df, predict_df, ax_bottom)
+
+        ax_bottom.sharex(ax_top)
+
+        as_suptitle = True
+    else:
+        __plt_bars(correct_df, predict_df, fig.add_subplot())
+
+        as_suptitle = False
+
+    fig.subplots_adjust(left=0.05, right=0.95)
+
+    return as_suptitle
+
+
+def __get_figure(has_chromagram: bool) -> Figure:
+    """
+    ワーカーのプロセスで使い回す図を返す。pyplotを介さないため、図を閉じ忘れても溜まらない
+    """
+    from matplotlib.figure import Figure
+
+    if has_chromagram not in __figures:
+        __figures[has_chromagram] = Figure(figsize=__FIG_SIZE if has_chromagram else __FIG_HALF_SIZE)
 
-    __plt_bars(correct_df, predict_df, ax_bottom)
+    fig = __figures[has_chromagram]
+    fig.clear()
 
-    ax_bottom.sharex(ax_top)
+    return fig
 
-    as_suptitle = True
 
-else:
-    plt.figure(figsize=__FIG_HALF_SIZE)
+def __render(job: _Job) -> str:
+    fig = __get_figure(job.chromas_path is not None)
+
+    if __draw(fig, job):
+        fig.suptitle(job.title)
+    else:
+        fig.axes[0].set_title(job.title)
+
+    fig.tight_layout()
+    fig.savefig(job.output)
+
+    return job.output
+
+
+def __init_worker() -> None:
+    import matplotlib
+
+    matplotlib.use("Agg")
+
+
+def __get_jobs(args: argparse.Namespace) -> list[_Job]:
+    if args.output is None:
+        raise ValueError("If set directories, you need output directory")
+
+    jobs = []
+    for correct_path, predict_path in get_paired_csv_paths(args.correct_path, args.predict_path):
+        name = get_file_name(correct_path)
+
+        chromas_path = None
+        if args.chromas_path:
+            chromas_path = os.path.join(args.chromas_path, os.path.basename(correct_path))
+            if not os.path.exists(chromas_path):
+                print(f"skip: {chromas_path} does not exist")
+                continue
+
+        jobs.append(
+            _Job(
+                correct_path=correct_path,
+                predict_path=predict_path,
+                chromas_path=chromas_path,
+                sample_rate=args.sample_rate,
+                win_length=args.win_length,
+                hop_length=args.hop_length,
+                title=name if args.title is None else f"{args.title} {name}",
+                output=os.path.join(args.output, f"{name}.{args.format}"),
+            )
+        )
+
+    return jobs
+
+
+def plot_directories(args: argparse.Namespace) -> None:
+    jobs = __get_jobs(args)
+    pending = [job for job in jobs if args.force or not job.is_up_to_date()]
+
+    print(f"{len(jobs) - len(pending)}/{len(jobs)} plots are up to date")
+
+    os.makedirs(args.output, exist_ok=True)
+
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=__init_worker) as executor:
+        for output_path in executor.map(__render, pending, chunksize=max(len(pending) // 64, 1)):
+            print(output_path)
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("correct_path", type=str, help="Path to the CSV file or directory")
+    parser.add_argument("predict_path", type=str, help="Path to the CSV file or directory")
+    parser.add_argument("--chromas_path", type=str, help="Path to the input data file (CSV format) or directory")
+    parser.add_argument("--sample_rate", type=int, help="Sample rate for the data")
+    parser.add_argument("--win_length", type=int, help="Window size for stft")
+    parser.add_argument("--hop_length", type=int, help="Stride length for stft")
+    parser.add_argument("--title", type=str, help="Title for the plot")
+    parser.add_argument("--output", type=str, help="Output file path. Output directory path for directories")
+    parser.add_argument("--format", type=str, default="pdf", help="Output file format for directories")
+    parser.add_argument("--force", action="store_true", help="Render up-to-date plots again for directories")
+    parser.add_argument("-j", "--workers", type=int, help="number of processes. default is cpu count")
+
+
+def plot(args: argparse.Namespace) -> None:
+    if os.path.isdir(args.correct_path):
+        plot_directories(args)
+        return
+
+    import matplotlib.pyplot as plt
+
+    job = _Job(
+        correct_path=args.correct_path,
+        predict_path=args.predict_path,
+        chromas_path=args.chromas_path,
+        sample_rate=args.sample_rate,
+        win_length=args.win_length,
+        hop_length=args.hop_length,
+    )
+
+    fig = plt.figure(figsize=__FIG_SIZE if args.chromas_path else __FIG_HALF_SIZE)
+    as_suptitle = __draw(fig, job)
 
-    __plt_bars(correct_df, predict_df)
+    output(args, as_suptitle)
 
-plt.subplots_adjust(left=0.05, right=0.95)
 
-output(args, as_suptitle)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    add_arguments(parser)
+    plot(parser.parse_args())
@@ -0,0 +1,63 @@
+"""
+行列の1つの軸についての多重解像度(LOD)ピラミッド
+段kは元の行列を2^k個ずつmaxまたはmeanでプーリングしたもので、必要になった段まで1つ前の段から順に作る
+描画する図の画素数を下回らない最も粗い段を選ぶことで、表示できない細かさのデータを描画しない
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+METHODS = ["max", "mean"]
+
+
+class Pyramid:
+    def __init__(self, data: np.ndarray, method: str = "max") -> None:
+        """
+        dataの0番目の軸をプーリングする。meanの場合は合計を持っておき、段を取り出すときに要素数で割る
+        """
+        if method not in METHODS:
+            raise ValueError(f"method must be one of {METHODS}")
+
+        self.method = method
+
+        # 各段の値(meanなら合計)と、各要素が元の行列で何番目から何個の要素をまとめたものか
+        self._levels = [np.asarray(data)]
+        self._starts = [np.arange(len(data))]
+        self._counts = [np.ones(len(data), dtype=int)]
+
+    def _build_next_level(self) -> None:
+        data, starts, counts = self._levels[-1], self._starts[-1], self._counts[-1]
+        indices = np.arange(0, len(data), 2)
+
+        reduce = np.maximum if self.method == "max" else np.add
+
+        self._levels.append(reduce.reduceat(data, indices, axis=0))
+        self._starts.append(starts[indices])
+        self._counts.append(np.add.reduceat(counts, indices))
+
+    def get_level(self, size: int) -> int:
+        """
+        要素数がsize以上の段のうち、最も粗い段の番号。要素数が1になった段より粗い段は作らない
+        """
+        level = 0
+        while len(self._levels[level]) > 1 and (len(self._levels[level]) + 1) // 2 >= max(size, 1):
+            if level + 1 == len(self._levels):
+                self._build_next_level()
+            level += 1
+
+        return level
+
+    def select(self, size: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        要素数がsize以上の段のうち最も粗いものと、その各要素の中心の元の行列での添字を返す
+        """
+        level = self.get_level(size)
+
+        data, starts, counts = self._levels[level], self._starts[level], self._counts[level]
+        centers = starts + (counts - 1) / 2
+
+        if self.method == "mean" and level > 0:
+            data = data / counts.reshape(-1, *[1] * (data.ndim - 1))
+
+        return data, centers
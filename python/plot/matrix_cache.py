@@ -0,0 +1,78 @@
+"""
+スペクトログラムやクロマグラムのCSVを float32 の .npy に変換してキャッシュし、2回目以降はメモリマップで読み込む
+キャッシュのキーは (絶対パス, 更新時刻, サイズ) なので、CSVを書き直すと自動的に作り直される
+キャッシュの合計サイズが上限を超えた場合は、最後に使われた時刻が古いものから削除する
+"""
+
+import glob
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CACHE_DIR = "test/outputs/.cache/matrices"
+DEFAULT_MAX_BYTES = 2 * 1024**3
+
+
+def _get_cache_path(path: str, cache_dir: str) -> str:
+    stat = os.stat(path)
+    key = f"{os.path.abspath(path)}\0{stat.st_mtime_ns}\0{stat.st_size}"
+    return os.path.join(cache_dir, f"{hashlib.sha1(key.encode()).hexdigest()}.npy")
+
+
+def _evict(cache_dir: str, max_bytes: int, keep: str) -> None:
+    """
+    最終使用時刻(ヒット時に更新するmtime)の古い順に、合計サイズがmax_bytes以下になるまで削除する
+    """
+    entries = []
+    for cache_path in glob.glob(os.path.join(cache_dir, "*.npy")):
+        try:
+            stat = os.stat(cache_path)
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, cache_path))
+
+    total = sum(size for _, size, _ in entries)
+
+    for _, size, cache_path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if cache_path == keep:
+            continue
+        try:
+            os.remove(cache_path)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+
+def _write(path: str, cache_path: str) -> None:
+    data = pd.read_csv(path, header=None, dtype=np.float32).to_numpy()
+
+    # 並列に描画している他のプロセスが書きかけのファイルを読まないように、一時ファイルから置き換える
+    temp_path = f"{cache_path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as f:
+        np.save(f, data)
+    os.replace(temp_path, cache_path)
+
+
+def load_matrix(path: str, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES) -> np.ndarray:
+    """
+    pd.read_csv(path, header=None).to_numpy() の代わりに使う。戻り値は読み取り専用のメモリマップ
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    cache_path = _get_cache_path(path, cache_dir)
+
+    if os.path.exists(cache_path):
+        try:
+            data = np.load(cache_path, mmap_mode="r")
+            os.utime(cache_path)
+            return data
+        except (OSError, ValueError):
+            pass
+
+    _write(path, cache_path)
+    _evict(cache_dir, max_bytes, keep=cache_path)
+
+    return np.load(cache_path, mmap_mode="r")
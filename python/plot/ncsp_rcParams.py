@@ -3,7 +3,11 @@ from matplotlib import pyplot as plt
 # plt.rcParams["figure.figsize"] = (6.4, 4.8)
 # plt.rcParams["figure.figsize"] = (12.8, 9.6)
 
-plt.rcParams["font.size"] = 18
-plt.rcParams["axes.labelsize"] = 28
+RC_PARAMS = {
+    "font.size": 18,
+    "axes.labelsize": 28,
+    "figure.autolayout": True,
+}
 
-plt.rcParams["figure.autolayout"] = True
+# importした時点で適用する。plot/cli.pyのように1つのプロセスで複数の図を描く場合は、図ごとにRC_PARAMSを適用する
+plt.rcParams.update(RC_PARAMS)
@@ -1,106 +1,123 @@
-import os
+import argparse
 import sys
 
 import japanize_matplotlib  # noqa
 import matplotlib
 import numpy as np
-import pandas as pd
 from matplotlib import pyplot as plt
 
 sys.path.append(".")
 
 import python.plot.ics_rcParams  # noqa
-from python.analyzer.analyze import get_scores_with_average  # noqa
+from python.analyzer.experiment_index import ExperimentIndex, RunParameters  # noqa
+from python.analyzer.loader import add_workers_argument, load_scores_with_average  # noqa
 from python.const import (  # noqa
     LINE_STYLES,
     MARKER_STYLES,
     WINDOW_SIZES,
+    ChromaCalculator,
     Scaling,
     WindowFunction,
 )
-from python.path_util import get_sorted_csv_paths  # noqa
 
 # SCALE = Scaling.NONE
 SCALE = Scaling.LN
 WINDOW_FUNCTION = WindowFunction.HANNING
 
-DIRECTORY_PATH = (
-    "test/outputs/cross_validations/window_function/chunkSize_{}__chunkStride_0__sampleRate_22050__window_{}"  # noqa
-)
+EXPERIMENT_ROOT_PATH = "test/outputs/cross_validations/window_function"
+CHUNK_STRIDE = 0
+SAMPLE_RATE = 22050
 
 plt.rcParams["font.size"] = 14
 LABELS = ["Comb", "ET-scale", "Comb*", "ET-scale*"]
 # LABELS = ["コムフィルタ", "平均律ビン", "コムフィルタ*", "平均律ビン*"]
 
 
-def __get_index(basename: str) -> int:
-    if f"normal_distribution_comb_filter__stft_mags_{SCALE}_scaled" in basename:
-        return 0
-    if f"et-scale_sparse_non_reassign_frequency_{SCALE}_scaled" in basename:
-        return 1
-    if f"normal_distribution_comb_filter__sparse_mags_{SCALE}_scaled" in basename:
-        return 2
-    if f"et-scale_sparse_{SCALE}_scaled" in basename:
-        return 3
+__CHROMA_CALCULATORS = [
+    ChromaCalculator.COMB_FILTER,
+    ChromaCalculator.NON_REASSIGN_ET_SCALE,
+    ChromaCalculator.REASSIGN_COMB_FILTER,
+    ChromaCalculator.ET_SCALE,
+]
+
+
+def __get_index(parameters: RunParameters) -> int:
+    if parameters.chroma_calculator in __CHROMA_CALCULATORS:
+        return __CHROMA_CALCULATORS.index(parameters.chroma_calculator)
 
     return -1
 
 
-scores_list = np.zeros((4, len(WINDOW_SIZES)))
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="plot accuracy for every window size")
+    add_workers_argument(parser)
+    args = parser.parse_args()
+
+    scores_list = np.zeros((4, len(WINDOW_SIZES)))
+
+    max_score = 0.0
+    max_window = 0.0
 
-max_score = 0.0
-max_window = 0.0
+    experiment_index = ExperimentIndex.load(EXPERIMENT_ROOT_PATH)
 
-for i, size in enumerate(WINDOW_SIZES):
-    dir_path = DIRECTORY_PATH.format(size, WINDOW_FUNCTION)
-    paths = get_sorted_csv_paths(dir_path)
-    if len(paths) == 0:
-        print(f"There is no files window size of {size}. Please check directory path: {dir_path}")
-    for path in paths:
-        index = __get_index(os.path.basename(path))
-        if index == -1:
+    paths = experiment_index.find(
+        window_function=WINDOW_FUNCTION,
+        scaling=SCALE,
+        chunk_stride=CHUNK_STRIDE,
+        sample_rate=SAMPLE_RATE,
+    )
+    paths = [path for path in paths if __get_index(experiment_index[path]) != -1]
+
+    for size in WINDOW_SIZES:
+        if all(experiment_index[path].window_size != size for path in paths):
+            print(f"There is no files window size of {size}. Please check directory path: {EXPERIMENT_ROOT_PATH}")
+
+    for path, scores in load_scores_with_average(paths, workers=args.workers).items():
+        parameters = experiment_index[path]
+        if parameters.window_size not in WINDOW_SIZES:
             continue
 
-        df = pd.read_csv(path, skiprows=1, header=None)
-        score = get_scores_with_average(df)[-1] * 100
+        index = __get_index(parameters)
+        i = WINDOW_SIZES.index(parameters.window_size)
+        score = scores[-1] * 100
 
         if max_score < score:
             max_score = score
-            max_window = size
+            max_window = parameters.window_size
 
         scores_list[index, i] = score
 
-print(scores_list)
-for i, scores in enumerate(scores_list):
-    plt.plot(
-        WINDOW_SIZES,
-        scores,
-        marker=MARKER_STYLES[i],
-        linestyle=LINE_STYLES[i],
-        label=LABELS[i],
+    print(scores_list)
+    for i, scores in enumerate(scores_list):
+        plt.plot(
+            WINDOW_SIZES,
+            scores,
+            marker=MARKER_STYLES[i],
+            linestyle=LINE_STYLES[i],
+            label=LABELS[i],
+        )
+
+    plt.xscale("log")
+    plt.xticks(WINDOW_SIZES)
+    plt.ylim(0, 100)
+    plt.xlabel("Window Size")
+    plt.ylabel("Accuracy Rate[%]")
+
+    xaxis = plt.gca().get_xaxis()
+
+    xaxis.set_major_formatter(matplotlib.ticker.ScalarFormatter())
+    xaxis.set_tick_params(which="minor", size=0)
+    xaxis.set_tick_params(which="minor", width=0)
+
+    plt.annotate(
+        f"Max: {max_score:.3f}%",
+        (max_window, max_score),
+        textcoords="offset points",
+        xytext=(0, 30),
+        ha="center",
+        arrowprops=dict(color="gray", arrowstyle="-|>"),
     )
 
-plt.xscale("log")
-plt.xticks(WINDOW_SIZES)
-plt.ylim(0, 100)
-plt.xlabel("Window Size")
-plt.ylabel("Accuracy Rate[%]")
-
-xaxis = plt.gca().get_xaxis()
-
-xaxis.set_major_formatter(matplotlib.ticker.ScalarFormatter())
-xaxis.set_tick_params(which="minor", size=0)
-xaxis.set_tick_params(which="minor", width=0)
-
-plt.annotate(
-    f"Max: {max_score:.3f}%",
-    (max_window, max_score),
-    textcoords="offset points",
-    xytext=(0, 30),
-    ha="center",
-    arrowprops=dict(color="gray", arrowstyle="-|>"),
-)
-
-plt.legend()
+    plt.legend()
 
-plt.show()
+    plt.show()
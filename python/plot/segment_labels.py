@@ -0,0 +1,81 @@
+"""
+区間の帯に重ねるラベルを1つのArtistで描画する
+描画のたびに現在の表示範囲と大きさから、帯の中に収まるラベルだけを描くため、拡大すると隠れていたラベルが現れる
+"""
+
+import numpy as np
+from matplotlib.artist import Artist, allow_rasterization
+from matplotlib.backend_bases import RendererBase
+from matplotlib.text import Text
+
+
+class SegmentLabels(Artist):
+    def __init__(
+        self,
+        starts: np.ndarray,
+        ends: np.ndarray,
+        labels: np.ndarray,
+        y: float,
+        padding: float = 2.0,
+        **text_kwargs,
+    ) -> None:
+        """
+        paddingはラベルの左右に空ける余白[px]
+        """
+        super().__init__()
+        self.set_zorder(Text.zorder)  # 帯(PatchCollection)より上に描く
+
+        self.starts = np.asarray(starts, dtype=float)
+        self.ends = np.asarray(ends, dtype=float)
+        self.y = y
+        self.padding = padding
+
+        self.vocabulary, self.label_indices = np.unique(np.asarray(labels, dtype=str), return_inverse=True)
+
+        self._text = Text(ha="center", va="center", **text_kwargs)
+        self._widths: dict[float, np.ndarray] = {}
+
+    def _get_label_widths(self, renderer: RendererBase) -> np.ndarray:
+        """
+        語彙ごとのラベルの幅[px]。dpiが同じなら使い回す
+        """
+        if renderer.dpi not in self._widths:
+            widths = []
+            for label in self.vocabulary:
+                self._text.set_text(label)
+                widths.append(self._text.get_window_extent(renderer).width)
+            self._widths[renderer.dpi] = np.array(widths)
+
+        return self._widths[renderer.dpi]
+
+    @allow_rasterization
+    def draw(self, renderer: RendererBase) -> None:
+        if not self.get_visible() or self.axes is None or len(self.starts) == 0:
+            return
+
+        x_min, x_max = sorted(self.axes.get_xlim())
+
+        # 表示範囲と重なる部分の中央に置き、その部分にラベルが収まる区間だけを描く
+        starts = np.maximum(self.starts, x_min)
+        ends = np.minimum(self.ends, x_max)
+        visible = ends > starts
+
+        transform = self.axes.transData
+        self._text.set_figure(self.figure)
+        self._text.set_transform(transform)
+        self._text.set_clip_box(self.axes.bbox)
+
+        left = transform.transform(np.column_stack([starts, np.full(len(starts), self.y)]))[:, 0]
+        right = transform.transform(np.column_stack([ends, np.full(len(ends), self.y)]))[:, 0]
+
+        widths = self._get_label_widths(renderer)[self.label_indices]
+        fits = visible & (np.abs(right - left) >= widths + 2 * self.padding)
+
+        renderer.open_group("segment_labels", gid=self.get_gid())
+        for i in np.flatnonzero(fits):
+            self._text.set_text(self.vocabulary[self.label_indices[i]])
+            self._text.set_position(((starts[i] + ends[i]) / 2, self.y))
+            self._text.draw(renderer)
+        renderer.close_group("segment_labels")
+
+        self.stale = False
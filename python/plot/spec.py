@@ -1,39 +1,144 @@
+"""
+スペクトログラム(またはクロマグラム)のCSVを librosa.display.specshow で描画するスクリプト
+--lodを指定すると、時間方向と周波数方向をプーリングしたピラミッドから図の画素数に見合う解像度を選んで描画する
+数分以上の録音でも、表示できない細かさのデータを描画しないため速く、メモリも少なく済む
+
+ex) python3 python/plot/spec.py test/outputs/spec.csv 22050 8192 1024 --y_min 40 --y_max 2000 --lod max \
+        --output spec.pdf
+"""
+
+from __future__ import annotations
+
 import argparse
+import math
+from typing import TYPE_CHECKING
 
-import librosa.display
-import matplotlib.pyplot as plt
-import pandas as pd
 from args import output, set_y_limit
+from lod import METHODS, Pyramid
+
+if TYPE_CHECKING:
+    import numpy as np
+    from matplotlib.axes import Axes
+
+# 周波数(Hz)を縦軸とするy_axis。このうち線形の軸だけは周波数方向もプーリングする
+__HZ_AXES = ["linear", "fft", "hz", "log"]
+__LINEAR_HZ_AXES = ["linear", "fft", "hz"]
+
+
+def __get_pixels(ax: Axes) -> tuple[int, int]:
+    """
+    保存時の解像度での、軸の描画領域の幅と高さ[px]
+    """
+    import matplotlib.pyplot as plt
+
+    fig = ax.get_figure()
+    dpi = plt.rcParams["savefig.dpi"]
+    if dpi == "figure":
+        dpi = fig.dpi
+
+    bbox = ax.get_position()
+
+    return (
+        math.ceil(bbox.width * fig.get_figwidth() * dpi),
+        math.ceil(bbox.height * fig.get_figheight() * dpi),
+    )
+
+
+def __get_bin_range(frequencies: np.ndarray, y_min: float | None, y_max: float | None) -> slice:
+    """
+    y_minからy_maxまでを描画するのに必要なビンの範囲。端のセルが欠けないよう外側に1つずつ広げる
+    """
+    import numpy as np
+
+    start = 0 if y_min is None else max(int(np.searchsorted(frequencies, y_min, side="right")) - 1, 0)
+    stop = len(frequencies) if y_max is None else int(np.searchsorted(frequencies, y_max, side="left")) + 1
+
+    return slice(start, stop)
+
+
+def __reduce(data: np.ndarray, args: argparse.Namespace, hop_length: int) -> tuple[np.ndarray, dict]:
+    """
+    表示範囲外の周波数を除き、図の画素数に見合う段までプーリングした行列と、specshowに渡す座標を返す
+    """
+    import librosa
+    import matplotlib.pyplot as plt
+    import numpy as np
+
+    width, height = __get_pixels(plt.gca())
+    coords = {}
+
+    frequencies = None
+    if args.y_axis in __HZ_AXES:
+        # specshowがn_fftを指定されなかったときと同じ周波数
+        frequencies = librosa.fft_frequencies(sr=args.sample_rate, n_fft=2 * (data.shape[1] - 1))
+        bin_range = __get_bin_range(frequencies, args.y_min, args.y_max)
+        data = data[:, bin_range]
+        frequencies = frequencies[bin_range]
+
+    data, frames = Pyramid(data, args.lod).select(width)
+    coords["x_coords"] = frames * hop_length / args.sample_rate
+
+    if frequencies is not None:
+        if args.y_axis in __LINEAR_HZ_AXES:
+            data, bins = Pyramid(data.T, args.lod).select(height)
+            data = data.T
+            frequencies = np.interp(bins, np.arange(len(frequencies)), frequencies)
+        coords["y_coords"] = frequencies
+
+    return data, coords
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("data_file", type=str, help="Path to the input data file (CSV format)")
+    parser.add_argument("sample_rate", type=int, help="Sample rate for the data")
+    parser.add_argument("win_length", type=int, help="Window size for stft")
+    parser.add_argument("hop_length", type=int, help="Stride length for stft")
+    parser.add_argument("--title", type=str, help="Title for the spectrogram")
+    parser.add_argument("--output", type=str, help="Output file path for the spectrogram image")
+    parser.add_argument("--y_axis", type=str, help="y_axis type", default="log")
+    parser.add_argument("--y_min", type=float, help="Minimum value for the Y-axis")
+    parser.add_argument("--y_max", type=float, help="Maximum value for the Y-axis")
+    parser.add_argument(
+        "--lod",
+        type=str,
+        choices=METHODS,
+        help="Pool the data down to the figure resolution with the given method before drawing",
+    )
+
+
+def plot(args: argparse.Namespace) -> None:
+    import librosa.display
+    import matplotlib.pyplot as plt
+    from matrix_cache import load_matrix
+
+    data = load_matrix(args.data_file)
+    hop_length = args.hop_length if args.hop_length != 0 else args.win_length
+
+    coords = {}
+    if args.lod:
+        data, coords = __reduce(data, args, hop_length)
+
+    librosa.display.specshow(
+        data.T,
+        x_axis="time",
+        y_axis=args.y_axis,
+        sr=args.sample_rate,
+        win_length=args.win_length,
+        hop_length=hop_length,
+        cmap="magma",
+        **coords,
+    )
+
+    plt.xlabel("Time[s]")
+    if args.y_axis == "log":
+        plt.ylabel("Frequency[Hz]")
+
+    set_y_limit(args)
+
+    output(args)
+
 
-parser = argparse.ArgumentParser(description="Generate and display a spectrogram from a 2D array data file")
-parser.add_argument("data_file", type=str, help="Path to the input data file (CSV format)")
-parser.add_argument("sample_rate", type=int, help="Sample rate for the data")
-parser.add_argument("win_length", type=int, help="Window size for stft")
-parser.add_argument("hop_length", type=int, help="Stride length for stft")
-parser.add_argument("--title", type=str, help="Title for the spectrogram")
-parser.add_argument("--output", type=str, help="Output file path for the spectrogram image")
-parser.add_argument("--y_axis", type=str, help="y_axis type", default="log")
-parser.add_argument("--y_min", type=float, help="Minimum value for the Y-axis")
-parser.add_argument("--y_max", type=float, help="Maximum value for the Y-axis")
-args = parser.parse_args()
-
-data: pd.DataFrame = pd.read_csv(args.data_file, header=None)
-
-librosa.display.specshow(
-    data.to_numpy().T,
-    x_axis="time",
-    y_axis=args.y_axis,
-    sr=args.sample_rate,
-    win_length=args.win_length,
-    hop_length=args.hop_length if args.hop_length != 0 else args.win_length,
-    cmap="magma",
-)
-
-
-plt.xlabel("Time[s]")
-if args.y_axis == "log":
-    plt.ylabel("Frequency[Hz]")
-
-set_y_limit(args)
-
-output(args)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate and display a spectrogram from a 2D array data file")
+    add_arguments(parser)
+    plot(parser.parse_args())
@@ -1,103 +1,109 @@
+import argparse
 import sys
 from dataclasses import dataclass
+from typing import Any
 
 import pandas as pd
 
 sys.path.append(".")
 
-from python.analyzer.analyze import SOUND_SOURCE_LENGTH, get_scores_with_average  # noqa
+from python.analyzer.analyze import SOUND_SOURCE_LENGTH  # noqa
+from python.analyzer.experiment_index import ExperimentIndex  # noqa
+from python.analyzer.loader import add_workers_argument, load_scores_with_average  # noqa
+from python.const import ChromaCalculator, Estimator, Scaling  # noqa
 
 COLUMNS = ["GA" + str(i + 1) for i in range(SOUND_SOURCE_LENGTH)] + ["Average"]
 COLUMNS_JA = ["A", "B", "C", "D", "平均"]
 
 
+EXPERIMENT_ROOT_PATH = "test/outputs/cross_validations/NCSP_paper"
+METHODS_DIR_PATH = f"{EXPERIMENT_ROOT_PATH}/methods"
+PCP_CALCULATORS_DIR_PATH = f"{EXPERIMENT_ROOT_PATH}/pcp_calculators"
+
+Query = dict[str, Any]
+
+
 @dataclass
 class __DataSource:
-    paths: list[str]
+    queries: list[Query]
     index: list[str]
     columns: list[str]
 
 
+def __method_queries() -> list[Query]:
+    return [
+        dict(
+            directory=METHODS_DIR_PATH,
+            estimator=estimator,
+            chroma_calculator=ChromaCalculator.COMB_FILTER,
+            scaling=Scaling.LN,
+        )
+        for estimator in [Estimator.SEARCH_TREE, Estimator.MATCHING, Estimator.MATCHING_4, Estimator.MATCHING_6]
+    ]
+
+
+def __pcp_queries(scaling: Scaling) -> list[Query]:
+    return [
+        dict(
+            directory=PCP_CALCULATORS_DIR_PATH,
+            estimator=Estimator.MATCHING_6,
+            chroma_calculator=chroma_calculator,
+            scaling=scaling,
+            override_chunk_size=8192 if chroma_calculator == ChromaCalculator.REASSIGN_COMB_FILTER else None,
+        )
+        for chroma_calculator in [
+            ChromaCalculator.COMB_FILTER,
+            ChromaCalculator.NON_REASSIGN_ET_SCALE,
+            ChromaCalculator.REASSIGN_COMB_FILTER,
+            ChromaCalculator.ET_SCALE,
+        ]
+    ]
+
+
 method = __DataSource(
-    paths=[
-        "test/outputs/cross_validations/NCSP_paper/methods/search_tree_0.55_threshold_4_notes__normal_distribution_comb_filter__stft_mags_ln_scaled__E2-D#6__select_by_db.csv",
-        "test/outputs/cross_validations/NCSP_paper/methods/mean_matching_cosine_similarity_none_template_scaled__normal_distribution_comb_filter__stft_mags_ln_scaled__E2-D#6__minor_flat_five_priority.csv",
-        "test/outputs/cross_validations/NCSP_paper/methods/mean_matching_cosine_similarity_harmonic_0.6-4_template_scaled__normal_distribution_comb_filter__stft_mags_ln_scaled__E2-D#6__minor_flat_five_priority.csv",
-        "test/outputs/cross_validations/NCSP_paper/methods/mean_matching_cosine_similarity_harmonic_0.6-6_template_scaled__normal_distribution_comb_filter__stft_mags_ln_scaled__E2-D#6__minor_flat_five_priority.csv",
-    ],
+    queries=__method_queries(),
     index=["Search Tree", "Matching", "Matching-4", "Matching-6"],
     columns=COLUMNS,
 )
 
 method_ja = __DataSource(
-    paths=[
-        "test/outputs/cross_validations/NCSP_paper/methods/search_tree_0.55_threshold_4_notes__normal_distribution_comb_filter__stft_mags_ln_scaled__E2-D#6__select_by_db.csv",
-        "test/outputs/cross_validations/NCSP_paper/methods/mean_matching_cosine_similarity_none_template_scaled__normal_distribution_comb_filter__stft_mags_ln_scaled__E2-D#6__minor_flat_five_priority.csv",
-        "test/outputs/cross_validations/NCSP_paper/methods/mean_matching_cosine_similarity_harmonic_0.6-4_template_scaled__normal_distribution_comb_filter__stft_mags_ln_scaled__E2-D#6__minor_flat_five_priority.csv",
-        "test/outputs/cross_validations/NCSP_paper/methods/mean_matching_cosine_similarity_harmonic_0.6-6_template_scaled__normal_distribution_comb_filter__stft_mags_ln_scaled__E2-D#6__minor_flat_five_priority.csv",
-    ],
+    queries=__method_queries(),
     index=["Search Tree", "Matching", "Matching-4", "Matching-6"],
     columns=COLUMNS_JA,
 )
 
 pcp_log_amp = __DataSource(
-    paths=[
-        "test/outputs/cross_validations/NCSP_paper/pcp_calculators/mean_matching_cosine_similarity_harmonic_0.6-6_template_scaled__normal_distribution_comb_filter__stft_mags_ln_scaled__E2-D#6__minor_flat_five_priority.csv",
-        "test/outputs/cross_validations/NCSP_paper/pcp_calculators/mean_matching_cosine_similarity_harmonic_0.6-6_template_scaled__et-scale_sparse_non_reassign_frequency_ln_scaled__E2-D#6__minor_flat_five_priority.csv",
-        "test/outputs/cross_validations/NCSP_paper/pcp_calculators/mean_matching_cosine_similarity_harmonic_0.6-6_template_scaled__normal_distribution_comb_filter__sparse_mags_ln_scaled_override_by_8192__E2-D#6__minor_flat_five_priority.csv",
-        "test/outputs/cross_validations/NCSP_paper/pcp_calculators/mean_matching_cosine_similarity_harmonic_0.6-6_template_scaled__et-scale_sparse_ln_scaled__E2-D#6__minor_flat_five_priority.csv",
-    ],
+    queries=__pcp_queries(Scaling.LN),
     index=["Comb", "ET-scale", "Comb*", "ET-scale*"],
     columns=COLUMNS,
 )
 
 pcp = __DataSource(
-    paths=[
-        "test/outputs/cross_validations/NCSP_paper/pcp_calculators/mean_matching_cosine_similarity_harmonic_0.6-6_template_scaled__normal_distribution_comb_filter__stft_mags_none_scaled__E2-D#6__minor_flat_five_priority.csv",
-        "test/outputs/cross_validations/NCSP_paper/pcp_calculators/mean_matching_cosine_similarity_harmonic_0.6-6_template_scaled__et-scale_sparse_non_reassign_frequency_none_scaled__E2-D#6__minor_flat_five_priority.csv",
-        "test/outputs/cross_validations/NCSP_paper/pcp_calculators/mean_matching_cosine_similarity_harmonic_0.6-6_template_scaled__normal_distribution_comb_filter__sparse_mags_none_scaled_override_by_8192__E2-D#6__minor_flat_five_priority.csv",
-        "test/outputs/cross_validations/NCSP_paper/pcp_calculators/mean_matching_cosine_similarity_harmonic_0.6-6_template_scaled__et-scale_sparse_none_scaled__E2-D#6__minor_flat_five_priority.csv",
-    ],
+    queries=__pcp_queries(Scaling.NONE),
     index=["Comb", "ET-scale", "Comb*", "ET-scale*"],
     columns=COLUMNS,
 )
 
 
 pcp_log_amp_ja = __DataSource(
-    paths=[
-        "test/outputs/cross_validations/NCSP_paper/pcp_calculators/mean_matching_cosine_similarity_harmonic_0.6-6_template_scaled__normal_distribution_comb_filter__stft_mags_ln_scaled__E2-D#6__minor_flat_five_priority.csv",
-        "test/outputs/cross_validations/NCSP_paper/pcp_calculators/mean_matching_cosine_similarity_harmonic_0.6-6_template_scaled__et-scale_sparse_non_reassign_frequency_ln_scaled__E2-D#6__minor_flat_five_priority.csv",
-        "test/outputs/cross_validations/NCSP_paper/pcp_calculators/mean_matching_cosine_similarity_harmonic_0.6-6_template_scaled__normal_distribution_comb_filter__sparse_mags_ln_scaled_override_by_8192__E2-D#6__minor_flat_five_priority.csv",
-        "test/outputs/cross_validations/NCSP_paper/pcp_calculators/mean_matching_cosine_similarity_harmonic_0.6-6_template_scaled__et-scale_sparse_ln_scaled__E2-D#6__minor_flat_five_priority.csv",
-    ],
+    queries=__pcp_queries(Scaling.LN),
     index=["コムフィルタ", "平均律ビン", "コムフィルタ*", "平均律ビン*"],
     columns=COLUMNS_JA,
 )
 
 pcp_ja = __DataSource(
-    paths=[
-        "test/outputs/cross_validations/NCSP_paper/pcp_calculators/mean_matching_cosine_similarity_harmonic_0.6-6_template_scaled__normal_distribution_comb_filter__stft_mags_none_scaled__E2-D#6__minor_flat_five_priority.csv",
-        "test/outputs/cross_validations/NCSP_paper/pcp_calculators/mean_matching_cosine_similarity_harmonic_0.6-6_template_scaled__et-scale_sparse_non_reassign_frequency_none_scaled__E2-D#6__minor_flat_five_priority.csv",
-        "test/outputs/cross_validations/NCSP_paper/pcp_calculators/mean_matching_cosine_similarity_harmonic_0.6-6_template_scaled__normal_distribution_comb_filter__sparse_mags_none_scaled_override_by_8192__E2-D#6__minor_flat_five_priority.csv",
-        "test/outputs/cross_validations/NCSP_paper/pcp_calculators/mean_matching_cosine_similarity_harmonic_0.6-6_template_scaled__et-scale_sparse_none_scaled__E2-D#6__minor_flat_five_priority.csv",
-    ],
+    queries=__pcp_queries(Scaling.NONE),
     index=["コムフィルタ", "平均律ビン", "コムフィルタ*", "平均律ビン*"],
     columns=COLUMNS_JA,
 )
 
 
-def __print(source: __DataSource) -> None:
-    scores_table = [
-        get_scores_with_average(
-            pd.read_csv(
-                path,
-                dtype=str,
-                skiprows=1,
-                header=None,
-            )
-        )
-        for path in source.paths
-    ]
+def __print(source: __DataSource, workers: int | None = None) -> None:
+    experiment_index = ExperimentIndex.load(EXPERIMENT_ROOT_PATH)
+    paths = [experiment_index.find_one(**query) for query in source.queries]
+
+    scores = load_scores_with_average(paths, workers=workers)
+    scores_table = [scores[path] for path in paths]
     df = pd.DataFrame(
         scores_table,
         index=source.index,
@@ -112,9 +118,13 @@ def __print(source: __DataSource) -> None:
 
 
 if __name__ == "__main__":
-    # __print(method)
-    # __print(method_ja)
-    # __print(pcp_log_amp)
-    # __print(pcp)
-    __print(pcp_log_amp_ja)
-    __print(pcp_ja)
+    parser = argparse.ArgumentParser(description="print accuracy tables for every sound source")
+    add_workers_argument(parser)
+    args = parser.parse_args()
+
+    # __print(method, args.workers)
+    # __print(method_ja, args.workers)
+    # __print(pcp_log_amp, args.workers)
+    # __print(pcp, args.workers)
+    __print(pcp_log_amp_ja, args.workers)
+    __print(pcp_ja, args.workers)
@@ -1,4 +1,4 @@
-import os
+import argparse
 import sys
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
@@ -9,9 +9,15 @@ import pandas as pd
 
 sys.path.append(".")
 
-from python.analyzer.analyze import get_scores_with_average  # noqa
-from python.const import WINDOW_SIZES  # noqa
-from python.path_util import get_sorted_csv_paths  # noqa
+from python.analyzer.experiment_index import ExperimentIndex, RunParameters  # noqa
+from python.analyzer.loader import add_workers_argument, load_scores_with_average  # noqa
+from python.const import (  # noqa
+    WINDOW_SIZES,
+    ChromaCalculator,
+    Estimator,
+    Scaling,
+    WindowFunction,
+)
 from python.terminal_util import print_divider  # noqa
 
 
@@ -60,7 +66,7 @@ class SimpleLaTeXFormatter(LaTeXFormattable):
     tables: Tables
 
     def __call__(self) -> None:
-        for key, table in tables.items():
+        for key, table in self.tables.items():
             fig = table.to_latex(
                 index=[
                     "コムフィルタ",
@@ -83,7 +89,7 @@ class BoldLaTeXFormatter(LaTeXFormattable):
     tables: Tables
 
     def __call__(self) -> None:
-        for key, table in tables.items():
+        for key, table in self.tables.items():
             fig = table.to_latex(
                 index=[
                     "コムフィルタ",
@@ -111,65 +117,67 @@ class BoldLaTeXFormatter(LaTeXFormattable):
         return f"{x*100:.3f}"
 
 
-def __get_experiment_dir_path(window_length: int) -> str:
-    base_path = "test/outputs/cross_validations/ICS/chunkSize_{}__chunkStride_0__sampleRate_22050__window_hanning"
-    return base_path.format(window_length)
+EXPERIMENT_ROOT_PATH = "test/outputs/cross_validations/ICS"
 
+__FIGURE_KEYS = {
+    Estimator.MATCHING: "matching",
+    Estimator.MATCHING_4: "matching 4",
+    Estimator.MATCHING_6: "matching 6",
+}
 
-def __get_figure_key(basename: str) -> str:
-    if "search_tree" in basename:
-        return "search tree"
+__ROWS = [
+    (ChromaCalculator.COMB_FILTER, Scaling.NONE),
+    (ChromaCalculator.COMB_FILTER, Scaling.LN),
+    (ChromaCalculator.NON_REASSIGN_ET_SCALE, Scaling.NONE),
+    (ChromaCalculator.NON_REASSIGN_ET_SCALE, Scaling.LN),
+    (ChromaCalculator.REASSIGN_COMB_FILTER, Scaling.NONE),
+    (ChromaCalculator.REASSIGN_COMB_FILTER, Scaling.LN),
+    (ChromaCalculator.ET_SCALE, Scaling.NONE),
+    (ChromaCalculator.ET_SCALE, Scaling.LN),
+]
 
-    if "mean_matching_cosine_similarity_none_template_scaled" in basename:
-        return "matching"
 
-    if "mean_matching_cosine_similarity_harmonic_0.6-4_template_scaled" in basename:
-        return "matching 4"
+def __get_figure_key(parameters: RunParameters) -> str:
+    if parameters.estimator.startswith("search_tree"):
+        return "search tree"
 
-    if "mean_matching_cosine_similarity_harmonic_0.6-6_template_scaled" in basename:
-        return "matching 6"
+    if parameters.estimator in __FIGURE_KEYS:
+        return __FIGURE_KEYS[parameters.estimator]
 
     raise NotImplementedError()
 
 
-def __get_index(basename: str) -> int:
-    if "normal_distribution_comb_filter__stft_mags_none_scaled" in basename:
-        return 0
-    if "normal_distribution_comb_filter__stft_mags_ln_scaled" in basename:
-        return 1
-    if "et-scale_sparse_non_reassign_frequency_none_scaled" in basename:
-        return 2
-    if "et-scale_sparse_non_reassign_frequency_ln_scaled" in basename:
-        return 3
-    if "normal_distribution_comb_filter__sparse_mags_none_scaled" in basename:
-        return 4
-    if "normal_distribution_comb_filter__sparse_mags_ln_scaled" in basename:
-        return 5
-    if "et-scale_sparse_none_scaled" in basename:
-        return 6
-    if "et-scale_sparse_ln_scaled" in basename:
-        return 7
+def __get_index(parameters: RunParameters) -> int:
+    key = (parameters.chroma_calculator, parameters.scaling)
+    if key in __ROWS:
+        return __ROWS.index(key)
 
     raise NotImplementedError()
 
 
-tables: Tables = {}
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="print accuracy tables for every window size")
+    add_workers_argument(parser)
+    args = parser.parse_args()
 
-for window_index, window_length in enumerate(WINDOW_SIZES):
-    dir_path = __get_experiment_dir_path(window_length)
+    tables: Tables = {}
 
-    for path in get_sorted_csv_paths(dir_path):
-        df = pd.read_csv(path, dtype=str, skiprows=1, header=None)
+    experiment_index = ExperimentIndex.load(EXPERIMENT_ROOT_PATH)
 
-        basename = os.path.basename(path)
-        score = get_scores_with_average(df)[-1]
+    paths = experiment_index.find(chunk_stride=0, sample_rate=22050, window_function=WindowFunction.HANNING)
+    scores = load_scores_with_average(paths, workers=args.workers)
 
-        figure_key = __get_figure_key(basename)
-        row_index = __get_index(basename)
+    for path, score in scores.items():
+        parameters = experiment_index[path]
+        if parameters.window_size not in WINDOW_SIZES:
+            continue
 
-        array = tables.setdefault(figure_key, FixedSize2DArray(8, 5))
-        array[row_index, window_index] = score
+        figure_key = __get_figure_key(parameters)
+        row_index = __get_index(parameters)
+        window_index = WINDOW_SIZES.index(parameters.window_size)
 
+        array = tables.setdefault(figure_key, FixedSize2DArray(len(__ROWS), len(WINDOW_SIZES)))
+        array[row_index, window_index] = score[-1]
 
-formatter = BoldLaTeXFormatter(tables)
-formatter()
+    formatter = BoldLaTeXFormatter(tables)
+    formatter()
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from python.analyzer import analyze
+from python.analyzer.result_store import get_scores_with_average_from_store
+
+
+@pytest.fixture
+def result_path(tmp_path):
+    path = tmp_path / "result.csv"
+    path.write_text("header\n1_correct,C#,Am,C/E\n1_s,Db,Am,C\n")
+    return str(path)
+
+
+def test_scorers_use_the_same_comparison(result_path, tmp_path):
+    expected = [1 / 3, 1 / 3]
+
+    assert analyze.get_scores_with_average(analyze.read_result_csv(result_path)) == pytest.approx(expected)
+    assert analyze.get_scores_with_average_from_paths([result_path], workers=1)[0] == pytest.approx(expected)
+
+    store_scores = get_scores_with_average_from_store([result_path], str(tmp_path / ".store"), workers=1)
+    assert store_scores[0] == pytest.approx(expected)
+
+
+def test_average_ignores_padded_sources():
+    names = np.array(
+        [
+            ["1_correct", "1_a", "", ""],
+            ["1_correct", "1_a", "1_b", "1_c"],
+        ],
+        dtype=object,
+    )
+    labels = np.array(
+        [
+            [["C"], ["C"], [""], [""]],
+            [["C"], ["C"], ["G"], ["C"]],
+        ],
+        dtype=object,
+    )
+
+    scores = analyze.get_batch_scores_with_average(names, labels)
+
+    assert scores[0].tolist() == [1, 0, 0, 1]
+    assert scores[1] == pytest.approx([1, 0, 1, 2 / 3])
+
+
+def test_level_average_ignores_padded_sources(tmp_path):
+    one_source = tmp_path / "one.csv"
+    three_sources = tmp_path / "three.csv"
+    one_source.write_text("header\n1_correct,C,G\n1_a,C,G\n")
+    three_sources.write_text("header\n1_correct,C,G\n1_a,C,G\n1_b,C,G\n1_c,C,G\n")
+
+    scores = analyze.get_level_scores_with_average_from_paths(
+        [str(one_source), str(three_sources)], levels=["root"], workers=1
+    )
+
+    assert scores.shape == (1, 2, 4)
+    assert scores[0, :, -1].tolist() == [1, 1]
@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+
+from python import chord_vocabulary
+from python.analyzer import chord_levels
+
+# (正解, 推定, [root, majmin, sevenths, tetrads])。Noneは評価の対象外
+# 期待値は mir_eval.chord の root, majmin, sevenths, tetrads (0.8.2) の結果と同じ
+CASES = [
+    # root
+    ("C", "Cm", [1, 0, 0, 0]),
+    ("C", "G", [0, 0, 0, 0]),
+    ("Cm", "Am", [0, 0, 0, 0]),
+    ("C#", "Db", [1, 1, 1, 1]),
+    # majmin: 根音と短3度・長3度・完全5度のみを比較する
+    ("C", "C7", [1, 1, 0, 0]),
+    ("C", "C9", [1, 1, 0, 0]),
+    ("C", "Csus4", [1, 0, 0, 0]),
+    ("C7", "Cm7", [1, 0, 0, 0]),
+    ("Cm11", "Cm", [1, 1, 0, 0]),
+    ("C11", "C", [1, 1, 0, 0]),
+    ("C6", "C", [1, 1, None, 0]),
+    ("CmM7", "Cm", [1, 1, None, 0]),
+    ("Csus2", "C", [1, None, None, 0]),
+    ("Caug", "C", [1, None, None, 0]),
+    ("Cdim", "Cdim", [1, None, None, 1]),
+    # sevenths: maj, min, maj7, 7, min7 のみを評価する。9, 11, 13のテンションは比較しない
+    ("C7", "C", [1, 1, 0, 0]),
+    ("C7", "C9", [1, 1, 1, 1]),
+    ("C9", "C7", [1, 1, 1, 1]),
+    ("Cm9", "Cm7", [1, 1, 1, 1]),
+    ("C13", "C7", [1, 1, 1, 1]),
+    ("CM9", "CM7", [1, 1, 1, 1]),
+    ("Cm7", "Cm", [1, 1, 0, 0]),
+    ("Cm7b5", "Cm7b5", [1, None, None, 1]),
+    # tetrads
+    ("C", "Cadd9", [1, 1, 1, 1]),
+    ("Cadd9", "C", [1, 1, 1, 1]),
+    ("Cdim7", "Cdim", [1, None, None, 0]),
+    ("Csus4", "Csus4", [1, None, None, 1]),
+    # N
+    ("N", "N", [1, 1, 1, 1]),
+    ("N", "C", [0, 0, 0, 0]),
+    ("C", "N", [0, 0, 0, 0]),
+    # 空や文法に合わない正解は評価しない
+    ("", "C", [None, None, None, None]),
+    ("X", "X", [None, None, None, None]),
+    ("X", "C", [None, None, None, None]),
+]
+
+
+@pytest.mark.parametrize(("reference", "estimated", "expected"), CASES)
+def test_compare(reference, estimated, expected):
+    codes = chord_vocabulary.encode([reference, estimated])
+
+    matches, valid = chord_levels.compare(codes[:1], codes[1:])
+
+    actual = [int(match[0]) if is_valid[0] else None for match, is_valid in zip(matches, valid)]
+    assert actual == expected
+
+
+def test_compare_all_cases_at_once():
+    reference = chord_vocabulary.encode([case[0] for case in CASES])
+    estimated = chord_vocabulary.encode([case[1] for case in CASES])
+
+    matches, valid = chord_levels.compare(reference, estimated)
+
+    assert matches.shape == valid.shape == (len(chord_levels.LEVELS), len(CASES))
+    for i, (_, _, expected) in enumerate(CASES):
+        assert [int(m) if v else None for m, v in zip(matches[:, i], valid[:, i])] == expected
+
+
+def test_score_weights_by_duration():
+    reference = chord_vocabulary.encode(["C", "C7", "Cdim", ""])
+    estimated = chord_vocabulary.encode(["C", "C", "Cdim", "C"])
+
+    scores = chord_levels.score(reference, estimated, weights=np.array([1.0, 3.0, 2.0, 5.0]))
+
+    assert scores["root"] == pytest.approx(1.0)
+    assert scores["majmin"] == pytest.approx(1.0)
+    assert scores["sevenths"] == pytest.approx(1 / 4)
+    assert scores["tetrads"] == pytest.approx(3 / 6)
+
+
+def test_score_without_valid_references_is_nan():
+    scores = chord_levels.score(chord_vocabulary.encode(["Cdim"]), chord_vocabulary.encode(["Cdim"]))
+
+    assert scores["root"] == 1.0
+    assert np.isnan(scores["majmin"])
+    assert np.isnan(scores["sevenths"])
@@ -0,0 +1,40 @@
+import numpy as np
+
+from python import chord_vocabulary
+from python.chord_vocabulary import NO_CHORD_CODE, PAD_CODE, ChordVocabulary
+
+
+def test_codes_are_one_to_one_with_labels():
+    labels = ["C#", "Db", "C/E", "C", "C#", "N", "", "unknown"]
+
+    vocabulary = ChordVocabulary()
+    codes = vocabulary.encode(labels)
+
+    assert len(set(codes.tolist())) == len(set(labels))
+    assert codes[5] == NO_CHORD_CODE
+    assert codes[6] == PAD_CODE
+    assert vocabulary.decode(codes).tolist() == labels
+
+
+def test_pitch_classes_ignore_spelling_only_when_requested():
+    vocabulary = ChordVocabulary()
+    sharp, flat, inversion, root = vocabulary.encode(["C#", "Db", "C/E", "C"])
+
+    assert sharp != flat and inversion != root
+
+    pitch_classes = chord_vocabulary.to_pitch_classes(np.array([sharp, flat, inversion, root]))
+    assert pitch_classes[0] == pitch_classes[1]
+    assert pitch_classes[2] == pitch_classes[3]
+
+
+def test_roots_and_masks():
+    codes = ChordVocabulary().encode(["Am7", "Db", "N", ""])
+
+    assert chord_vocabulary.get_roots(codes).tolist() == [9, 1, -1, -1]
+    assert chord_vocabulary.get_masks(codes)[0] == chord_vocabulary.to_mask((0, 3, 7, 10))
+
+
+def test_same_registration_order_gives_same_codes():
+    labels = ["C", "C/E", "Cmaj", "N"]
+
+    assert ChordVocabulary(labels).encode(labels).tolist() == ChordVocabulary(labels).encode(labels).tolist()
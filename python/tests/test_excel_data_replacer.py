@@ -0,0 +1,56 @@
+import pytest
+
+openpyxl = pytest.importorskip("openpyxl")
+
+from python.analyzer.excel_data_replacer import ExcelDataReplacer  # noqa: E402
+
+
+def _write_csvs(tmp_path, contents: list[str]) -> list[str]:
+    paths = []
+    for i, content in enumerate(contents):
+        path = tmp_path / f"{i}.csv"
+        path.write_text(content)
+        paths.append(str(path))
+    return paths
+
+
+def _read_values(output_path: str) -> dict[tuple[int, int], object]:
+    ws = openpyxl.load_workbook(output_path)["Sheet1"]
+    return {(cell.row, cell.column): cell.value for row in ws.iter_rows() for cell in row if cell.value is not None}
+
+
+def test_shrinking_layout_clears_previous_extent(tmp_path):
+    output_path = str(tmp_path / "result.xlsx")
+
+    large = "a,b,c,d\n1,2,3,4\n5,6,7,8\n9,10,11,12\n13,14,15,16\n"
+    paths = _write_csvs(tmp_path, [large, large])
+    ExcelDataReplacer(paths, start_row=1, start_column=1).write(output_path)
+
+    paths = _write_csvs(tmp_path, ["a,b\n1,2\n3,4\n", "c,d\n5,6\n7,8\n"])
+    ExcelDataReplacer(paths, start_row=1, start_column=1).write(output_path)
+
+    assert _read_values(output_path) == {
+        (1, 1): "a",
+        (1, 2): "b",
+        (2, 1): "1",
+        (2, 2): "2",
+        (3, 1): "3",
+        (3, 2): "4",
+        (5, 1): "c",
+        (5, 2): "d",
+        (6, 1): "5",
+        (6, 2): "6",
+        (7, 1): "7",
+        (7, 2): "8",
+    }
+
+
+def test_fewer_csvs_clear_trailing_blocks(tmp_path):
+    output_path = str(tmp_path / "result.xlsx")
+
+    paths = _write_csvs(tmp_path, ["a,b\n1,2\n", "c,d\n3,4\n", "e,f\n5,6\n"])
+    ExcelDataReplacer(paths, start_row=3, start_column=2).write(output_path)
+    ExcelDataReplacer(paths[:2], start_row=3, start_column=2).write(output_path)
+
+    values = _read_values(output_path)
+    assert sorted(set(values.values())) == ["1", "2", "3", "4", "a", "b", "c", "d"]
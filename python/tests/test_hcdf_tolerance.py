@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+from python.analyzer.hcdf_tolerance import calculate_fscores
+
+
+def test_estimates_sharing_nearest_reference_match_other_references():
+    # 0.1と0.12はどちらも0.0が最も近いが、0.12は0.3にも許容誤差内で一致できる
+    scores = calculate_fscores([np.array([0.0, 0.3])], [np.array([0.1, 0.12])], [0.25])
+
+    fscore, precision, recall, tp, fp, fn = scores[0, 0]
+    assert (tp, fp, fn) == (2, 0, 0)
+    assert fscore == 1.0
+
+
+def test_tolerances_are_evaluated_independently():
+    scores = calculate_fscores([np.array([0.0, 0.3])], [np.array([0.1, 0.12])], [0.05, 0.15, 0.25])
+
+    assert scores[:, 0, 3].tolist() == [0, 1, 2]
+
+
+def test_tracks_do_not_match_each_other():
+    scores = calculate_fscores([np.array([1.0]), np.array([])], [np.array([]), np.array([1.0])], [0.5])
+
+    assert scores[0, :, 3].tolist() == [0, 0]
+    assert scores[0, 0, 5] == 1
+    assert scores[0, 1, 4] == 1
+    assert scores[0, :, 0] == pytest.approx([0, 0])
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from python.analyzer.interval_score import COLUMNS, Intervals, score, score_directories
+
+
+def _intervals(rows: list[tuple[str, float, float]]) -> Intervals:
+    return Intervals.from_dataframe(pd.DataFrame(rows, columns=["label", "start", "end"]))
+
+
+def test_score():
+    reference = _intervals([("C", 0, 1), ("G", 1, 3)])
+    estimated = _intervals([("C", 0, 2), ("G", 2, 3)])
+
+    scores = score(reference, estimated)
+
+    assert scores["accuracy"] == pytest.approx(2 / 3)
+    assert scores["over_segmentation"] == pytest.approx(2 / 3)
+    assert scores["under_segmentation"] == pytest.approx(2 / 3)
+
+
+def test_score_empty_reference():
+    reference = _intervals([])
+    estimated = _intervals([("C", 0, 1)])
+
+    scores = score(reference, estimated, levels=["root"])
+
+    assert list(scores) == [*COLUMNS, "root"]
+    assert all(np.isnan(value) for value in scores.values())
+
+
+def test_score_directories_with_header_only_reference(tmp_path):
+    reference_dir = tmp_path / "reference"
+    estimated_dir = tmp_path / "estimated"
+    reference_dir.mkdir()
+    estimated_dir.mkdir()
+
+    (reference_dir / "a.csv").write_text("label,start,end\nC,0,1\n")
+    (estimated_dir / "a.csv").write_text("label,start,end\nC,0,1\n")
+    (reference_dir / "b.csv").write_text("label,start,end\n")
+    (estimated_dir / "b.csv").write_text("label,start,end\nC,0,1\n")
+
+    df = score_directories(str(reference_dir), str(estimated_dir), workers=1)
+
+    assert np.isnan(df.loc["b", "accuracy"])
+    assert df.loc["Average", "accuracy"] == 1.0
@@ -228,6 +228,17 @@ Future<void> main() async {
     });
   });
 
+  //python/analyzer/hcdf_sweep.py で閾値を総当たりするためのクロマを書き出す
+  test('export chroma', () async {
+    final cc = f.guitar.reassignment(scalar: MagnitudeScalar.ln);
+
+    await Future.wait(contexts.map(
+      (context) => Table.fromMatrix(cc(context.data)).toCSV(
+        'test/outputs/HCDF/chroma/${context.soundSourceName}/${context.musicName}.csv',
+      ),
+    ));
+  });
+
   group('visualize', () {
     Table.bypass = false;
     test('v all', () async {